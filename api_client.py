@@ -0,0 +1,188 @@
+"""
+Cliente HTTP del API para los dashboards (app.py y frontend/app.py).
+
+- Una sola requests.Session con pool de conexiones (keep-alive): las
+  llamadas reutilizan la conexión TCP en lugar de abrir una por pedido.
+- Reintentos automáticos en 429/503 respetando Retry-After (cola de modelos
+  llena o API aún cargando datos).
+- Pronóstico + evaluación usan /sales/analysis (una sola llamada y una sola
+  agregación en el servidor) y se guardan en una caché local (LRU con TTL)
+  por tupla de filtros.
+- Los pronósticos se piden en formato Arrow (o columnar JSON sin pyarrow) y
+  llegan como DataFrames indexados por fecha: "history" (Sales) y
+  "forecast" (Sales Forecast, Lower Bound, Upper Bound), sin armar filas.
+
+Es el único módulo cliente: frontend/app.py lo importa desde la raíz del
+repositorio (su imagen se construye con la raíz como contexto).
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import pyarrow as pa
+except ImportError:  # sin pyarrow se usa el formato columnar JSON
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+FORECAST_COLUMNS = ["Sales Forecast", "Lower Bound", "Upper Bound"]
+
+
+def _dates(days):
+    return pd.DatetimeIndex(pd.to_datetime(np.asarray(days, dtype="int64"), unit="D"), name="Date")
+
+
+def _decode_arrow(content):
+    table = pa.ipc.open_stream(content).read_all()
+    meta = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    df = table.to_pandas(date_as_object=False).set_index("Date")
+    part = df.pop("Part").astype(str)
+    result = {"status": meta.pop("status"), "model_used": meta.pop("model_used"),
+              "freq": meta.pop("freq", "MS"),
+              "history": df.loc[part == "history", ["Sales"]],
+              "forecast": df.loc[part == "forecast", FORECAST_COLUMNS]}
+    result.update({k: json.loads(v) for k, v in meta.items()})
+    return result
+
+
+def _decode_columnar(res):
+    history, forecast = res["history"], res["forecast"]
+    res["history"] = pd.DataFrame({"Sales": np.asarray(history["Sales"], dtype=float)},
+                                  index=_dates(history["Date"]))
+    res["forecast"] = pd.DataFrame({c: np.asarray(forecast[c], dtype=float)
+                                    for c in FORECAST_COLUMNS},
+                                   index=_dates(forecast["Date"]))
+    return res
+
+
+def _decode_records(res):
+    # API anterior (sin formatos): filas con fechas como texto
+    index = pd.DatetimeIndex(pd.to_datetime(res["history"]["index"]), name="Date")
+    res["history"] = pd.DataFrame({"Sales": res["history"]["data"]}, index=index)
+    forecast = pd.DataFrame(res["forecast"], columns=["Date"] + FORECAST_COLUMNS)
+    forecast["Date"] = pd.to_datetime(forecast["Date"])
+    res["forecast"] = forecast.set_index("Date").astype(float)
+    return res
+
+
+def decode_forecast(response):
+    """
+    Respuesta de /sales/forecast o /sales/analysis -> dict con "history" y
+    "forecast" como DataFrames. Los errores se devuelven tal cual (dict).
+    """
+    if response.headers.get("content-type", "").startswith(ARROW_MEDIA_TYPE):
+        return _decode_arrow(response.content)
+    res = response.json()
+    if res.get("status") != "success":
+        return res
+    if res.get("format") == "columnar":
+        return _decode_columnar(res)
+    return _decode_records(res)
+
+
+class ApiClient:
+
+    def __init__(self, base_url, timeout=20, pool_size=8, retries=3,
+                 cache_size=128, cache_ttl=600):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 503),
+                      allowed_methods=frozenset({"GET"}), respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()  # llave -> (expira_en, respuesta)
+        self._lock = threading.Lock()
+        self.format = "arrow" if pa is not None else "columnar"
+
+    # ---------- HTTP ----------
+
+    def get(self, path, params=None, timeout=None):
+        r = self.session.get(f"{self.base_url}{path}", params=params,
+                             timeout=timeout or self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def get_forecast(self, path, params, timeout=None):
+        """GET de un pronóstico en self.format, decodificado con decode_forecast."""
+        r = self.session.get(f"{self.base_url}{path}", params={**params, "format": self.format},
+                             timeout=timeout or self.timeout)
+        r.raise_for_status()
+        return decode_forecast(r)
+
+    def post(self, path, json=None, timeout=None):
+        r = self.session.post(f"{self.base_url}{path}", json=json,
+                              timeout=timeout or self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    # ---------- Caché local ----------
+
+    def _cached(self, key, fetch, ok):
+        now = time.monotonic()
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None and item[0] > now:
+                self._cache.move_to_end(key)
+                return item[1]
+        value = fetch()
+        if ok(value):
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, value)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ---------- Endpoints ----------
+
+    def health(self):
+        return self.get("/health", timeout=5)
+
+    def filters(self):
+        return self.get("/config/filters", timeout=10)
+
+    def kpis(self, category, region, year):
+        return self.get("/sales/kpis", params=dict(category=category, region=region, year=year))
+
+    def analysis(self, model_type, category, region, year, steps=12, freq="MS"):
+        """Pronóstico + evaluación en una llamada (en caché por modelo + filtros + horizonte)."""
+        params = dict(model_type=model_type, category=category, region=region,
+                      year=year, steps=steps, freq=freq)
+        return self._cached(("analysis",) + tuple(params.values()),
+                            lambda: self.get_forecast("/sales/analysis", params),
+                            lambda res: res.get("status") == "success")
+
+    def forecast_and_evaluation(self, model_type, category, region, year, steps=12, freq="MS"):
+        """
+        Pronóstico y evaluación del mismo segmento con /sales/analysis.
+        Retorna {"forecast": (resultado, error), "evaluation": (resultado, error)}.
+        """
+        try:
+            res = self.analysis(model_type, category, region, year, steps, freq)
+        except Exception as e:
+            return {"forecast": (None, str(e)), "evaluation": (None, str(e))}
+        if res.get("status") != "success":
+            return {"forecast": (res, None), "evaluation": (res, None)}
+        evaluation = res.get("evaluation")
+        forecast = {k: v for k, v in res.items() if k != "evaluation"}
+        return {"forecast": (forecast, None), "evaluation": (evaluation, None)}
+
+    def close(self):
+        self.session.close()
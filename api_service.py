@@ -1,15 +1,59 @@
-from fastapi import FastAPI, Query, HTTPException
+import time
+
+# Referencia de los tiempos de arranque (importación, datos listos, primera respuesta)
+STARTED_AT = time.perf_counter()
+
+import asyncio
+import os
+from concurrent.futures import BrokenExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Header, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from src.data_processing import aggregate_sales, aggregate_sales_batch, kpis
+from src.data_store import DataStore, source_signature
+from src.frequency import FREQUENCIES, get_frequency
+from src.result_cache import ResultCache
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS
+from src.model_executor import ModelExecutor, QueueFullError, JobTimeoutError
+from src.model_registry import ModelRegistry
+from src.metrics import METRICS, MetricsMiddleware, run_traced, span
+from src.model_backends import BACKENDS, call_backend, get_backend, import_times, is_loaded, warm_up
+from src.readiness import Readiness
+from src.serialization import ForecastSeries, encode_json, negotiate
+from src.hierarchy import (
+    RECONCILIATION_METHODS, HierarchicalForecast, build_hierarchy, forecast_node,
+    nodes_to_fit, reconcile
+)
+
+# Pool de ejecución para los ajustes de modelos (MODEL_EXECUTOR, MODEL_WORKERS,
+# MODEL_QUEUE_SIZE, MODEL_JOB_TIMEOUT)
+EXECUTOR = ModelExecutor.from_env()
+
+# Estado de arranque: /health responde desde el inicio y /ready cuando hay datos
+READINESS = Readiness(STARTED_AT)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # La carga de datos no bloquea el arranque del servidor
+    startup = asyncio.create_task(start_up())
+    yield
+    startup.cancel()
+    EXECUTOR.shutdown()
+    if REGISTRY is not None:
+        REGISTRY.close()
 
-from src.data_processing import load_data, aggregate_sales, list_years, kpis
-from src.sarima_model import get_sarima_forecast, run_backtest_sarima
-from src.xgboost_model import get_xgboost_forecast, run_backtest_xgboost
 
 app = FastAPI(
     title="Retail Forecasting API",
     description="Pronósticos (SARIMA/XGBoost) y KPIs filtrados por categoría, región y año.",
-    version="2.3.0"
+    version="2.3.0",
+    lifespan=lifespan
 )
 
 # CORS abierto para pruebas locales
@@ -21,28 +65,216 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Carga de datos al iniciar
-DF_RAW, STATUS = load_data()
-if DF_RAW is None:
-    print(f"[ERROR] {STATUS}")
-else:
-    print("[OK] Datos cargados.")
-    CATEGORIES = ['All Categories'] + \
-        sorted(DF_RAW['Category'].unique().tolist())
-    REGIONS = ['All Regions'] + sorted(DF_RAW['Region'].unique().tolist())
-    YEARS = ["All years"] + list_years(DF_RAW)
+# Latencia por endpoint y model_type (expuesta en /metrics)
+MODEL_TYPES = ("sarima", "xgboost", "xgboost_global")
+app.add_middleware(MetricsMiddleware, model_types=MODEL_TYPES,
+                   on_response=READINESS.record_response)
+
+# Dataset. STORE.current es una versión completa (DataFrame, cubo mensual,
+# índice de filas, filtros y huella); una recarga arma la siguiente aparte y
+# la cambia de una vez (ver src.data_store). Cada petición toma
+# STORE.current una sola vez y la usa hasta responder. La primera carga se
+# hace en segundo plano al arrancar (start_up).
+STORE = DataStore()
+
+# Segundos entre revisiones del archivo procesado (0 = sin vigilancia; queda /admin/reload)
+DATA_RELOAD_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "30"))
+# Si se define, /admin/reload exige el encabezado X-Admin-Token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Backends a importar en segundo plano tras cargar los datos (p. ej.
+# "sarima,xgboost"; vacío = se importan con el primer pedido de cada modelo)
+MODEL_WARMUP = [m for m in os.getenv("MODEL_WARMUP", "").replace(" ", "").split(",") if m]
+
+# Máximo de segmentos por llamada a /sales/forecast/batch
+MAX_BATCH_SLICES = int(os.getenv("MAX_BATCH_SLICES", "200"))
+
+# Caché de pronósticos y backtests (mismos filtros + mismo dataset = mismo resultado)
+RESULT_CACHE = ResultCache(
+    maxsize=int(os.getenv("FORECAST_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("FORECAST_CACHE_TTL", "3600"))
+)
+
+# Registro en disco de modelos ajustados (MODEL_REGISTRY_DIR, MODEL_REGISTRY_MAX_AGE):
+# sobrevive a reinicios, a diferencia de RESULT_CACHE
+REGISTRY = ModelRegistry.from_env()
+if REGISTRY is not None:
+    print(f"[OK] Registro de modelos: {REGISTRY.scan()} entradas vigentes.")
+
+# Hiperparámetros con los que se registra cada modelo y frecuencia (se leen
+# del backend la primera vez). Los parámetros SARIMA guardados son los del
+# ajuste con la serie sin el periodo de prueba (12 meses en MS).
+REGISTRY_PARAMS = {}
+
+
+async def backend(model_type):
+    """Módulo del backend; la primera vez se importa en un hilo (no bloquea el event loop)."""
+    if is_loaded(model_type):
+        return get_backend(model_type)
+    return await asyncio.to_thread(get_backend, model_type)
+
+
+async def registry_params(model_type, freq="MS"):
+    params = REGISTRY_PARAMS.get((model_type, freq))
+    if params is None:
+        module = await backend(model_type)
+        if model_type == "sarima":
+            params = {**module.hyperparams(freq), "test_months": get_frequency(freq).test_horizon}
+        elif model_type == "xgboost":
+            params = {**module.XGB_PARAMS, "features": module.FEATURE_SPECS[freq].as_dict()}
+        else:
+            params = {**module.GLOBAL_PARAMS, "freq": freq}
+        REGISTRY_PARAMS[(model_type, freq)] = params
+    return params
 
-# Umbral mínimo de puntos para modelar/evaluar
-MIN_POINTS = 24  # meses
+
+async def registry_load(model_type, hyperparams, segment, data_hash):
+    """Artefacto del registro para el segmento y la versión del dataset, o None."""
+    if REGISTRY is None:
+        return None
+    with span("registry.load"):
+        return await asyncio.to_thread(REGISTRY.load, model_type, hyperparams, segment, data_hash)
+
+
+def registry_save(model_type, hyperparams, segment, data_hash, artifact):
+    """Guarda un ajuste nuevo en segundo plano."""
+    if REGISTRY is not None and artifact is not None:
+        REGISTRY.save_async(model_type, hyperparams, segment, data_hash, artifact)
+
+
+@STORE.on_swap
+def _invalidate_previous(previous, current):
+    """Tras una recarga se descartan los resultados de la versión anterior."""
+    purged = RESULT_CACHE.purge(lambda key: key[-1] != current.data_hash)
+    GLOBAL_XGB.clear()
+    if previous.ok:
+        print(f"[OK] Dataset recargado: {previous.data_hash} -> {current.data_hash} "
+              f"({purged} resultados descartados).")
+    if not READINESS.ready:
+        READINESS.set("ready")
+
+
+async def start_up():
+    """Carga inicial del dataset, calentamiento opcional y vigilancia del archivo."""
+    READINESS.set("loading")
+    result = await reload_data(force=True)
+    if result["status"] == "error":
+        READINESS.set("failed", result["message"])
+        print(f"[ERROR] {result['message']}")
+    else:
+        print(f"[OK] Datos cargados ({result['rows']} filas, {READINESS.elapsed():.2f} s desde el inicio).")
+    if MODEL_WARMUP:
+        await warm_up_models(MODEL_WARMUP)
+    if DATA_RELOAD_INTERVAL > 0:
+        await watch_data(DATA_RELOAD_INTERVAL)
+
+
+async def warm_up_models(model_types):
+    """
+    Importa los backends en el proceso del API y en los workers del pool (un
+    trabajo por worker), así el primer pedido de cada modelo no paga la
+    importación de statsmodels/xgboost.
+    """
+    READINESS.warmup = {"status": "running", "backends": model_types}
+    start = time.perf_counter()
+    try:
+        api_times = await asyncio.to_thread(warm_up, model_types)
+        worker_times = await asyncio.gather(
+            *(run_model(warm_up, model_types) for _ in range(EXECUTOR.max_workers)))
+        READINESS.warmup = {
+            "status": "done", "backends": model_types,
+            "seconds": round(time.perf_counter() - start, 4),
+            "api_import_seconds": api_times,
+            "worker_import_seconds": worker_times
+        }
+    except Exception as e:
+        READINESS.warmup = {"status": "error", "backends": model_types,
+                            "message": getattr(e, "detail", str(e))}
+
+
+async def reload_data(force=False):
+    """Recarga en un hilo (no bloquea el event loop mientras se construye)."""
+    return await asyncio.to_thread(STORE.reload, force)
+
+
+async def watch_data(interval):
+    """
+    Revisa cada `interval` s si cambió el archivo procesado y recarga. Espera
+    a que la firma (mtime, tamaño) se repita en dos revisiones seguidas para
+    no leer un archivo que main.py todavía está escribiendo.
+    """
+    last_seen = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            seen, last_seen = last_seen, source_signature()
+            if last_seen != STORE.current.signature and last_seen == seen:
+                result = await reload_data()
+                if result["status"] == "error":
+                    print(f"[WARN] Recarga fallida: {result['message']}")
+        except Exception as e:
+            print(f"[WARN] Error vigilando el dataset: {e}")
+
+
+def current_data():
+    """
+    Versión vigente del dataset; 503 mientras se hace la primera carga y 500
+    si no hay datos cargados.
+    """
+    data = STORE.current
+    if not data.ok:
+        if READINESS.state in ("starting", "loading"):
+            raise HTTPException(status_code=503, detail="Cargando datos, reintente en unos segundos.",
+                                headers={"Retry-After": "2"})
+        raise HTTPException(
+            status_code=500, detail=f"Error de carga de datos: {data.status}")
+    return data
+
+
+def cache_set(data, key, value):
+    """
+    Guarda un resultado de la versión `data` solo si sigue vigente: un
+    cálculo que empezó antes de una recarga no desplaza entradas de la nueva
+    (su llave, con la huella anterior, ya no se consultaría).
+    """
+    if data.data_hash == STORE.current.data_hash:
+        RESULT_CACHE.set(key, value)
+
+
+async def run_model(fn, *args, **kwargs):
+    """
+    Ejecuta un ajuste en el pool; cola llena -> 429, tiempo agotado -> 504.
+    Los spans del worker vuelven con el resultado y se suman a METRICS; el
+    span model.job incluye además la espera en cola y la serialización.
+    """
+    try:
+        with span("model.job"):
+            result, events = await EXECUTOR.run(run_traced, fn, *args, **kwargs)
+        METRICS.merge(events)
+        return result
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": "5"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BrokenExecutor:
+        raise HTTPException(
+            status_code=503, detail="El pool de modelos se reinició, reintente.")
 
 
 @app.get("/health")
 def health():
-    """Health check sencillo para verificar que el servidor esté arriba."""
-    if DF_RAW is None:
-        raise HTTPException(
-            status_code=500, detail=f"Datos no cargados: {STATUS}")
-    return {"status": "ok", "detail": "API running"}
+    """Liveness: responde apenas arranca el servidor, con o sin datos cargados."""
+    return {"status": "ok", "detail": "API running", "state": READINESS.state,
+            "data": STORE.current.info()}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 cuando hay datos cargados, 503 mientras tanto (o si falló la carga)."""
+    body = {**READINESS.info(), "data": STORE.current.info(),
+            "backends": {name: is_loaded(name) for name in BACKENDS},
+            "backend_import_seconds": import_times()}
+    return JSONResponse(body, status_code=200 if READINESS.ready else 503)
 
 
 @app.get("/")
@@ -53,91 +285,657 @@ def root():
 @app.get("/config/filters")
 def get_filters():
     """Listas para poblar selectores del frontend."""
-    if DF_RAW is None:
-        raise HTTPException(
-            status_code=500, detail=f"Error de carga de datos: {STATUS}")
-    return {"categories": CATEGORIES, "regions": REGIONS, "years": YEARS}
+    data = current_data()
+    return {"categories": data.categories, "regions": data.regions, "years": data.years}
 
 
-@app.get("/sales/forecast", response_model=Dict)
-def sales_forecast_endpoint(
-    model_type: str = Query(
-        "sarima", description="Modelos disponibles: sarima | xgboost"),
-    category:   str = Query("All Categories"),
-    region:     str = Query("All Regions"),
-    year:       str = Query("All years"),
-    steps:      int = Query(12, ge=1, le=60)
-):
-    """Genera pronóstico futuro usando el modelo seleccionado."""
-    if DF_RAW is None:
-        raise HTTPException(
-            status_code=500, detail=f"Error de carga de datos: {STATUS}")
+def forecast_payload(model_type, ts_history, forecast_df, freq="MS"):
+    """Resultado de /sales/forecast (arreglos por columna, ver ForecastSeries)."""
+    with span("serialize"):
+        return ForecastSeries.from_frames(model_type, ts_history, forecast_df, freq)
+
+
+def response_format(format, accept):
+    """Formato pedido (parámetro `format` o encabezado Accept) o un error."""
+    try:
+        return negotiate(format, accept), None
+    except ValueError as e:
+        return None, {"status": "error", "message": str(e)}
+
+
+def respond(result, fmt, **extra):
+    """
+    Respuesta HTTP de un pronóstico en el formato pedido. Los errores
+    (dicts) siempre van como JSON.
+    """
+    if not isinstance(result, ForecastSeries):
+        return result
+    with span("serialize.encode"):
+        body, media_type = result.encode(fmt, **extra)
+    return Response(body, media_type=media_type)
+
+
+# Análisis SARIMA en curso por segmento: un pronóstico que llega mientras se
+# evalúa el mismo segmento (el dashboard pide ambos a la vez) espera esos
+# parámetros en lugar de ajustar otra vez
+SARIMA_INFLIGHT = {}
+
 
-    ts_history, ok = aggregate_sales(DF_RAW, category, region, year)
+async def sarima_analysis(data, category, region, year, ts_history, steps, folds=1, step=None,
+                          freq="MS"):
+    """
+    Un solo ajuste SARIMA sirve para /sales/evaluation y /sales/forecast:
+    se guardan en caché las métricas, el pronóstico y los parámetros, así la
+    siguiente llamada del mismo segmento no vuelve a optimizar. Si el
+    registro tiene parámetros para el segmento, el último pliegue solo filtra.
+    """
+    key = (category, region, year, freq, data.data_hash)
+    task = asyncio.ensure_future(
+        _sarima_analysis(data, category, region, year, ts_history, steps, folds, step, freq))
+    SARIMA_INFLIGHT[key] = task
+    task.add_done_callback(
+        lambda t: SARIMA_INFLIGHT.pop(key) if SARIMA_INFLIGHT.get(key) is t else None)
+    return await asyncio.shield(task)
+
+
+async def join_sarima_analysis(data, category, region, year, freq="MS"):
+    """Espera el análisis SARIMA en curso del segmento, si hay uno. True si esperó."""
+    pending = SARIMA_INFLIGHT.get((category, region, year, freq, data.data_hash))
+    if pending is None:
+        return False
+    await asyncio.wait([pending])
+    return True
+
+
+async def _sarima_analysis(data, category, region, year, ts_history, steps, folds, step, freq):
+    params_key = ("sarima_params", category, region, year, freq, data.data_hash)
+    params = RESULT_CACHE.get(params_key)
+    if params is None:
+        params = await registry_load("sarima", await registry_params("sarima", freq),
+                                     (category, region, year), data.data_hash)
+    analysis = await run_model(call_backend, "sarima", "run_sarima_analysis", ts_history,
+                               steps, get_frequency(freq).test_horizon, folds=folds, step=step,
+                               params=params, freq=freq)
+    if analysis.get("status") != "Success":
+        return analysis
+
+    if params is None:
+        registry_save("sarima", await registry_params("sarima", freq), (category, region, year),
+                      data.data_hash, analysis["params"])
+    cache_set(data, params_key, analysis["params"])
+    if analysis["metrics"].get("status") == "Success":
+        cache_set(data, ("evaluation", "sarima", category, region, year, folds, step, freq, data.data_hash),
+                         {**analysis["metrics"], "model_used": "sarima", "freq": freq})
+    cache_set(data, ("forecast", "sarima", category, region, year, steps, freq, data.data_hash),
+                     forecast_payload("sarima", ts_history, analysis["forecast"], freq))
+    return analysis
+
+
+# Modelo XGBoost global: uno por frecuencia y versión del dataset,
+# {freq: (data_hash, modelo)}
+GLOBAL_XGB = {}
+GLOBAL_XGB_INFLIGHT = {}
+GLOBAL_SEGMENT = ("__global__",)
+
+
+def segment_series(data, freq="MS"):
+    """Series completas de todos los segmentos (con agregados) para el modelo global."""
+    slices = [(c, r, "All years") for c in data.categories for r in data.regions]
+    series = aggregate_sales_batch(data.df, slices, cube=data.cube, freq=freq)
+    return {(c, r): ts for (c, r, _), (ts, ok) in zip(slices, series) if ok}
+
+
+async def _load_or_train_global(data, freq):
+    params = await registry_params("xgboost_global", freq)
+    model = await registry_load("xgboost_global", params, GLOBAL_SEGMENT, data.data_hash)
+    if model is None:
+        model = await run_model(call_backend, "xgboost_global", "train_global_xgboost",
+                                segment_series(data, freq), data.categories[1:], data.regions[1:],
+                                freq)
+        registry_save("xgboost_global", params, GLOBAL_SEGMENT, data.data_hash, model)
+    return model
+
+
+async def global_xgboost_model(data, freq="MS"):
+    """
+    Booster global de la versión `data` para la frecuencia `freq`. Se
+    entrena (o se carga del registro) solo cuando cambia el dataset; pedidos
+    simultáneos esperan el mismo entrenamiento.
+    """
+    current = GLOBAL_XGB.get(freq)
+    if current is not None and current[0] == data.data_hash:
+        return current[1]
+    key = (freq, data.data_hash)
+    task = GLOBAL_XGB_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_or_train_global(data, freq))
+        GLOBAL_XGB_INFLIGHT[key] = task
+        task.add_done_callback(lambda _: GLOBAL_XGB_INFLIGHT.pop(key, None))
+    model = await asyncio.shield(task)
+    # Solo se conserva el de la versión vigente (una recarga pudo llegar mientras tanto)
+    if data.data_hash == STORE.current.data_hash:
+        GLOBAL_XGB[freq] = (data.data_hash, model)
+    return model
+
+
+def slice_series(data, category, region, year, freq="MS"):
+    """Serie del segmento en la frecuencia `freq`: (ts, ok)."""
+    return aggregate_sales(data.df, category, region, year,
+                           cube=data.cube, index=data.row_index, freq=freq)
+
+
+def check_series(series, category, region, year, freq="MS"):
+    """Error (dict) si la serie no sirve para modelar, o None."""
+    ts_history, ok = series
     if not ok or len(ts_history) == 0:
         return {"status": "error", "message": f"Sin datos para {category}/{region}/{year}."}
 
-    if len(ts_history) < MIN_POINTS:
-        return {"status": "error", "message": f"Datos insuficientes: se requieren ≥{MIN_POINTS} meses y hay {len(ts_history)}."}
+    frequency = get_frequency(freq)
+    if len(ts_history) < frequency.min_history:
+        return {"status": "error", "message": (f"Datos insuficientes: se requieren ≥{frequency.min_history} "
+                                               f"{frequency.unit} y hay {len(ts_history)}.")}
+    return None
+
+
+def check_freq(freq, steps=None):
+    """Error (dict) si la frecuencia no está soportada o `steps` supera su máximo, o None."""
+    if freq not in FREQUENCIES:
+        return {"status": "error", "message": f"freq debe ser uno de: {', '.join(FREQUENCIES)}."}
+    frequency = FREQUENCIES[freq]
+    if steps is not None and steps > frequency.max_steps:
+        return {"status": "error",
+                "message": f"steps debe ser ≤{frequency.max_steps} con freq={freq}."}
+    return None
+
+
+async def forecast_slice(data, model_type, category, region, year, steps, series=None, freq="MS"):
+    """
+    Pronóstico de un segmento: ForecastSeries (en caché) o el dict de error de
+    /sales/forecast. `series` permite pasar la serie ya agregada: (ts, ok).
+    """
+    cache_key = ("forecast", model_type, category,
+                 region, year, steps, freq, data.data_hash)
+    cached = RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if series is None:
+        series = slice_series(data, category, region, year, freq)
+    error = check_series(series, category, region, year, freq)
+    if error:
+        return error
+    ts_history = series[0]
 
     # Selección de modelo
     if model_type == "sarima":
-        forecast_df, status = get_sarima_forecast(ts_history, steps)
+        params_key = ("sarima_params", category, region, year, freq, data.data_hash)
+        params = RESULT_CACHE.get(params_key)
+        if params is None and await join_sarima_analysis(data, category, region, year, freq):
+            cached = RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+            params = RESULT_CACHE.get(params_key)
+        if params is None:
+            params = await registry_load("sarima", await registry_params("sarima", freq),
+                                         (category, region, year), data.data_hash)
+            if params is not None:
+                cache_set(data, params_key, params)
+        if params is not None:
+            forecast_df, status = await run_model(
+                call_backend, "sarima", "get_sarima_forecast", ts_history, steps, params=params,
+                freq=freq)
+        else:
+            analysis = await sarima_analysis(data, category, region, year, ts_history, steps,
+                                             freq=freq)
+            forecast_df = analysis.get("forecast")
+            status = analysis.get("message", analysis["status"])
     elif model_type == "xgboost":
-        forecast_df, status = get_xgboost_forecast(ts_history, steps)
+        segment = (category, region, year)
+        params = await registry_params("xgboost", freq)
+        model = await registry_load("xgboost", params, segment, data.data_hash)
+        forecast_df, status, fitted = await run_model(
+            call_backend, "xgboost", "fit_xgboost_forecast", ts_history, steps, model=model,
+            freq=freq)
+        if model is None:
+            registry_save("xgboost", params, segment, data.data_hash, fitted)
+    elif model_type == "xgboost_global":
+        # Inferencia en el proceso del API: solo arma features y llama a predict
+        model = await global_xgboost_model(data, freq)
+        forecast_df, status = model.forecast(ts_history, category, region, steps)
     else:
-        return {"status": "error", "message": "model_type debe ser 'sarima' o 'xgboost'."}
+        return {"status": "error", "message": "model_type debe ser 'sarima', 'xgboost' o 'xgboost_global'."}
 
     if status != "Success" or forecast_df is None:
         return {"status": "error", "message": f"Error en el modelo {model_type}: {status}"}
 
-    # Serialización
-    history_json = {
-        "index": [i.strftime("%Y-%m-%d") for i in ts_history.index],
-        "data": ts_history.values.tolist()
+    result = forecast_payload(model_type, ts_history, forecast_df, freq)
+    cache_set(data, cache_key, result)
+    return result
+
+
+# Cálculos jerárquicos en curso: pedidos simultáneos esperan el mismo resultado
+HIERARCHY_INFLIGHT = {}
+
+
+async def _compute_hierarchy(data, model_type, year, steps, method, freq):
+    """Ajusta los nodos necesarios en paralelo y reconcilia toda la jerarquía."""
+    hierarchy = build_hierarchy(data.df, data.categories[1:], data.regions[1:], year,
+                                cube=data.cube, freq=freq)
+    if hierarchy is None:
+        return {"status": "error", "message": f"Sin datos para {year}."}
+    # Todos los nodos se ajustan sobre el rango del total: misma regla de
+    # historia mínima que un segmento suelto (si no, todo sería el respaldo naive)
+    error = check_series((hierarchy.fit_series(0), True), ALL_CATEGORIES, ALL_REGIONS, year, freq)
+    if error:
+        return error
+
+    fit_ids = nodes_to_fit(hierarchy, method)
+    slots = asyncio.Semaphore(EXECUTOR.max_workers)
+
+    async def fit(i):
+        async with slots:
+            return await run_model(forecast_node, hierarchy.fit_series(i), model_type, steps, freq)
+
+    results = await asyncio.gather(*(fit(i) for i in fit_ids))
+    base = [mean for mean, _ in results]
+    with span("hierarchy.reconcile"):
+        reconciled = reconcile(base, hierarchy.S, method)
+    fallback = [hierarchy.nodes[i] for i, (_, status) in zip(fit_ids, results)
+                if status != "Success"]
+    return HierarchicalForecast(hierarchy, reconciled, method, model_type, fallback, freq)
+
+
+async def hierarchical_forecast(data, model_type, year, steps, method, freq="MS"):
+    """
+    Pronóstico reconciliado de toda la jerarquía categoría × región (en caché):
+    un solo cálculo sirve a cualquier nodo. Retorna HierarchicalForecast o
+    el dict de error.
+    """
+    key = ("hierarchy", model_type, year, steps, method, freq, data.data_hash)
+    cached = RESULT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    task = HIERARCHY_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_compute_hierarchy(data, model_type, year, steps, method, freq))
+        HIERARCHY_INFLIGHT[key] = task
+        task.add_done_callback(lambda _: HIERARCHY_INFLIGHT.pop(key, None))
+    result = await asyncio.shield(task)
+    if isinstance(result, HierarchicalForecast):
+        cache_set(data, key, result)
+    return result
+
+
+def fallback_nodes(result):
+    return [{"category": c, "region": r} for c, r in result.fallback_nodes]
+
+
+def _check_hierarchy_params(model_type, reconciliation):
+    if model_type not in ("sarima", "xgboost"):
+        return {"status": "error", "message": "model_type debe ser 'sarima' o 'xgboost'."}
+    if reconciliation not in RECONCILIATION_METHODS:
+        return {"status": "error",
+                "message": f"reconciliation debe ser uno de: {', '.join(RECONCILIATION_METHODS)}."}
+    return None
+
+
+# Granularidad de las series (ver src.frequency); steps se cuenta en periodos
+FREQ_DESCRIPTION = "Granularidad: MS (mensual) | W-MON (semanal, termina en lunes) | D (diaria)"
+STEPS_DESCRIPTION = "Periodos a pronosticar (máximo 60 en MS, 104 en W-MON, 366 en D)"
+
+
+@app.get("/sales/forecast", response_model=Dict)
+async def sales_forecast_endpoint(
+    model_type: str = Query(
+        "sarima", description="Modelos disponibles: sarima | xgboost | xgboost_global"),
+    category:   str = Query("All Categories"),
+    region:     str = Query("All Regions"),
+    year:       str = Query("All years"),
+    steps:      int = Query(12, ge=1, le=366, description=STEPS_DESCRIPTION),
+    freq:       str = Query("MS", description=FREQ_DESCRIPTION),
+    reconciliation: Optional[str] = Query(
+        None, description="Pronóstico jerárquico coherente: bottom_up | ols | wls"),
+    format:     Optional[str] = Query(
+        None, description="Formato de respuesta: json | columnar | arrow (o encabezado Accept)"),
+    accept:     Optional[str] = Header(None)
+):
+    """
+    Genera pronóstico futuro usando el modelo seleccionado. Con
+    format=columnar o arrow las fechas y valores van como arreglos por columna.
+    """
+    fmt, error = response_format(format, accept)
+    if error:
+        return error
+    error = check_freq(freq, steps)
+    if error:
+        return error
+    data = current_data()
+    if reconciliation is None:
+        return respond(await forecast_slice(data, model_type, category, region, year, steps,
+                                            freq=freq), fmt)
+
+    error = _check_hierarchy_params(model_type, reconciliation)
+    if error:
+        return error
+    result = await hierarchical_forecast(data, model_type, year, steps, reconciliation, freq)
+    if not isinstance(result, HierarchicalForecast):
+        return result
+    node = result.node(category, region)
+    if node is None or len(node[0]) == 0:
+        return {"status": "error", "message": f"Sin datos para {category}/{region}/{year}."}
+    # Nodos cuyo pronóstico base fue el respaldo naive (no el modelo pedido)
+    return respond(forecast_payload(model_type, *node, freq), fmt, reconciliation=reconciliation,
+                   fallback_nodes=fallback_nodes(result))
+
+
+@app.get("/sales/forecast/hierarchy", response_model=Dict)
+async def sales_forecast_hierarchy_endpoint(
+    model_type: str = Query("sarima"),
+    year:       str = Query("All years"),
+    steps:      int = Query(12, ge=1, le=366, description=STEPS_DESCRIPTION),
+    freq:       str = Query("MS", description=FREQ_DESCRIPTION),
+    reconciliation: str = Query("bottom_up", description="bottom_up | ols | wls")
+):
+    """Pronósticos reconciliados de todos los nodos categoría × región (suman exacto)."""
+    error = check_freq(freq, steps) or _check_hierarchy_params(model_type, reconciliation)
+    if error:
+        return error
+    data = current_data()
+    result = await hierarchical_forecast(data, model_type, year, steps, reconciliation, freq)
+    if not isinstance(result, HierarchicalForecast):
+        return result
+
+    return {
+        "status": "success",
+        "model_used": model_type,
+        "freq": freq,
+        "reconciliation": reconciliation,
+        "dates": [d.strftime("%Y-%m-%d") for d in result.dates],
+        "fallback_nodes": fallback_nodes(result),
+        "nodes": [
+            {"category": c, "region": r,
+             "forecast": result.reconciled[i].round(2).tolist()}
+            for i, (c, r) in enumerate(result.hierarchy.nodes)
+        ]
     }
-    forecast_df.index = forecast_df.index.strftime('%Y-%m-%d')
-    forecast_json = (
-        forecast_df.reset_index()
-                   .rename(columns={'index': 'Date'})
-                   .to_dict(orient='records')
-    )
 
-    return {"status": "success", "model_used": model_type, "history": history_json, "forecast": forecast_json}
+
+class SliceRequest(BaseModel):
+    category: str = "All Categories"
+    region: str = "All Regions"
+    year: str = "All years"
+
+
+class BatchForecastRequest(BaseModel):
+    model_type: str = "sarima"
+    steps: int = Field(12, ge=1, le=366, description=STEPS_DESCRIPTION)
+    freq: str = Field("MS", description=FREQ_DESCRIPTION)
+    slices: List[SliceRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SLICES)
+    format: str = Field("json", pattern="^(json|columnar)$",
+                        description="Formato de cada línea: json | columnar")
+
+
+@app.post("/sales/forecast/batch")
+async def sales_forecast_batch_endpoint(req: BatchForecastRequest, request: Request):
+    """
+    Pronóstico para muchos segmentos en una sola llamada. Las series se
+    agregan en una pasada y los ajustes se reparten en el pool; la respuesta
+    es NDJSON (una línea por segmento, en el orden en que terminan; con
+    format=columnar cada línea trae arreglos por columna).
+    """
+    # model_type viene en el cuerpo: se lo indica a MetricsMiddleware
+    request.state.model_type = req.model_type
+    error = check_freq(req.freq, req.steps)
+    if error:
+        return error
+    data = current_data()
+    slices = [(s.category, s.region, s.year) for s in req.slices]
+    series = aggregate_sales_batch(data.df, slices, cube=data.cube, freq=req.freq)
+
+    # Un lote no debe ocupar él solo toda la cola del pool
+    slots = asyncio.Semaphore(EXECUTOR.max_workers)
+
+    async def run_one(i, category, region, year, serie):
+        try:
+            async with slots:
+                result = await forecast_slice(
+                    data, req.model_type, category, region, year, req.steps, serie, req.freq)
+        except HTTPException as e:
+            result = {"status": "error", "message": e.detail}
+        if isinstance(result, ForecastSeries):
+            result = result.to_columnar() if req.format == "columnar" else result.to_records()
+        return {"index": i, "category": category, "region": region, "year": year, **result}
+
+    async def stream():
+        tasks = [asyncio.ensure_future(run_one(i, *slc, serie))
+                 for i, (slc, serie) in enumerate(zip(slices, series))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield encode_json(await next_done) + b"\n"
+        finally:
+            # Si el cliente se desconecta no seguimos esperando los ajustes
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @app.get("/sales/evaluation", response_model=Dict)
-def sales_evaluation_endpoint(
+async def sales_evaluation_endpoint(
     model_type: str = Query("sarima"),
     category:   str = Query("All Categories"),
     region:     str = Query("All Regions"),
-    year:       str = Query("All years")
+    year:       str = Query("All years"),
+    folds:      int = Query(1, ge=1, le=12,
+                            description="Pliegues del backtest con origen móvil"),
+    step:       Optional[int] = Query(
+        None, ge=1, le=24, description="Periodos entre orígenes (por defecto el horizonte de prueba)"),
+    freq:       str = Query("MS", description=FREQ_DESCRIPTION)
 ):
-    """Backtest del modelo seleccionado y métricas de error."""
-    if DF_RAW is None:
-        raise HTTPException(
-            status_code=500, detail=f"Error de carga de datos: {STATUS}")
+    """
+    Backtest del modelo seleccionado y métricas de error (MAPE, sMAPE, RMSE,
+    MAE, MASE). El periodo de prueba es de 12 meses, 13 semanas o 28 días.
+    """
+    error = check_freq(freq)
+    if error:
+        return error
+    data = current_data()
+    return await evaluate_slice(data, model_type, category, region, year, folds, step, freq=freq)
 
-    ts_history, ok = aggregate_sales(DF_RAW, category, region, year)
-    if not ok or len(ts_history) == 0:
-        return {"status": "error", "message": f"Sin datos para {category}/{region}/{year}."}
 
-    if len(ts_history) < MIN_POINTS:
-        return {"status": "error", "message": f"Datos insuficientes: se requieren ≥{MIN_POINTS} meses y hay {len(ts_history)}."}
+async def evaluate_slice(data, model_type, category, region, year, folds=1, step=None, series=None,
+                         freq="MS"):
+    """
+    Backtest de un segmento con el mismo formato (y los mismos errores) que
+    /sales/evaluation. `series` permite pasar la serie ya agregada: (ts, ok).
+    """
+    cache_key = ("evaluation", model_type, category,
+                 region, year, folds, step, freq, data.data_hash)
+    cached = RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if series is None:
+        series = slice_series(data, category, region, year, freq)
+    error = check_series(series, category, region, year, freq)
+    if error:
+        return error
+    ts_history = series[0]
+    horizon = get_frequency(freq).test_horizon
 
     if model_type == "sarima":
-        metrics = run_backtest_sarima(ts_history, test_months=12)
+        if await join_sarima_analysis(data, category, region, year, freq):
+            cached = RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+        analysis = await sarima_analysis(data, category, region, year, ts_history, horizon,
+                                         folds=folds, step=step, freq=freq)
+        metrics = dict(analysis.get("metrics", analysis))
     elif model_type == "xgboost":
-        metrics = run_backtest_xgboost(ts_history, test_months=12)
+        metrics = await run_model(call_backend, "xgboost", "run_backtest_xgboost",
+                                  ts_history, horizon, folds=folds, step=step, freq=freq)
+    elif model_type == "xgboost_global":
+        metrics = await run_model(call_backend, "xgboost_global", "run_backtest_global_xgboost",
+                                  segment_series(data, freq), data.categories[1:], data.regions[1:],
+                                  ts_history, category, region, horizon, folds=folds, step=step,
+                                  freq=freq)
     else:
-        return {"status": "error", "message": "model_type debe ser 'sarima' o 'xgboost'."}
+        return {"status": "error", "message": "model_type debe ser 'sarima', 'xgboost' o 'xgboost_global'."}
 
     if metrics.get("status") != "Success":
         return {"status": "error", "message": metrics.get("message", "Error en backtest")}
     metrics["model_used"] = model_type
+    metrics["freq"] = freq
+    cache_set(data, cache_key, metrics)
     return metrics
 
 
+@app.get("/sales/analysis", response_model=Dict)
+async def sales_analysis_endpoint(
+    model_type: str = Query("sarima"),
+    category:   str = Query("All Categories"),
+    region:     str = Query("All Regions"),
+    year:       str = Query("All years"),
+    steps:      int = Query(12, ge=1, le=366, description=STEPS_DESCRIPTION),
+    folds:      int = Query(1, ge=1, le=12),
+    step:       Optional[int] = Query(None, ge=1, le=24),
+    freq:       str = Query("MS", description=FREQ_DESCRIPTION),
+    format:     Optional[str] = Query(
+        None, description="Formato de respuesta: json | columnar | arrow (o encabezado Accept)"),
+    accept:     Optional[str] = Header(None)
+):
+    """
+    Pronóstico y evaluación del segmento en una sola llamada: la serie se
+    agrega una vez y se responde con historia, pronóstico (con intervalos)
+    y métricas del backtest. Mismos formatos que /sales/forecast.
+    """
+    fmt, error = response_format(format, accept)
+    if error:
+        return error
+    error = check_freq(freq, steps)
+    if error:
+        return error
+    data = current_data()
+    series = slice_series(data, category, region, year, freq)
+    error = check_series(series, category, region, year, freq)
+    if error:
+        return error
+
+    if model_type == "sarima":
+        # Un solo análisis produce pronóstico y métricas (y deja ambos en caché)
+        forecast = RESULT_CACHE.get(("forecast", "sarima", category, region, year, steps, freq,
+                                     data.data_hash))
+        evaluation = RESULT_CACHE.get(("evaluation", "sarima", category, region, year, folds, step,
+                                       freq, data.data_hash))
+        if forecast is None or evaluation is None:
+            analysis = await sarima_analysis(data, category, region, year, series[0], steps,
+                                             folds=folds, step=step, freq=freq)
+            if analysis.get("status") != "Success":
+                return {"status": "error",
+                        "message": f"Error en el modelo sarima: {analysis.get('message')}"}
+            forecast = forecast_payload("sarima", series[0], analysis["forecast"], freq)
+            metrics = analysis["metrics"]
+            evaluation = ({**metrics, "model_used": "sarima", "freq": freq}
+                          if metrics.get("status") == "Success"
+                          else {"status": "error", "message": metrics.get("message", "Error en backtest")})
+    else:
+        forecast, evaluation = await asyncio.gather(
+            forecast_slice(data, model_type, category, region, year, steps, series, freq),
+            evaluate_slice(data, model_type, category, region, year, folds, step, series, freq))
+
+    return respond(forecast, fmt, evaluation=evaluation)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Contadores de la caché de pronósticos/backtests."""
+    return {"data_hash": STORE.current.data_hash, **RESULT_CACHE.stats()}
+
+
+@app.get("/executor/stats")
+def executor_stats():
+    """Estado del pool de modelos (trabajos pendientes, límites)."""
+    return EXECUTOR.stats()
+
+
+@app.get("/registry/stats")
+def registry_stats():
+    """Entradas y contadores del registro de modelos en disco."""
+    if REGISTRY is None:
+        return {"enabled": False}
+    return {"enabled": True, **REGISTRY.stats()}
+
+
+@app.get("/data/stats")
+def data_stats():
+    """Versión vigente del dataset y contadores de recargas."""
+    return STORE.stats()
+
+
+@app.post("/admin/reload")
+async def admin_reload(
+    force: bool = Query(False, description="Recargar aunque el archivo no haya cambiado"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Vuelve a leer el dataset procesado (p. ej. después de main.py) sin
+    reiniciar. La versión nueva se arma aparte y se cambia de una vez; las
+    peticiones en curso terminan con la anterior.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido.")
+    result = await reload_data(force)
+    if result["status"] == "error":
+        raise HTTPException(status_code=500, detail=f"Recarga fallida: {result['message']}")
+    return result
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas en formato de texto de Prometheus (spans, latencias, caché, dataset)."""
+    cache = RESULT_CACHE.stats()
+    data = STORE.current.info()
+    extra = [
+        ("forecast_cache_hits_total", "counter", "Aciertos de la caché de resultados.", cache["hits"], None),
+        ("forecast_cache_misses_total", "counter", "Fallos de la caché de resultados.", cache["misses"], None),
+        ("forecast_cache_evictions_total", "counter", "Desalojos LRU de la caché.", cache["evictions"], None),
+        ("forecast_cache_expirations_total", "counter", "Entradas expiradas por TTL.", cache["expirations"], None),
+        ("forecast_cache_entries", "gauge", "Entradas en la caché de resultados.", cache["size"], None),
+        ("dataset_rows", "gauge", "Filas del dataset cargado.", data["rows"], None),
+        ("dataset_version", "gauge", "Versión del dataset (sube en cada recarga).", data["version"], None),
+        ("dataset_info", "gauge", "Huella del dataset cargado.", 1, {"data_hash": data["data_hash"]}),
+        ("dataset_reloads_total", "counter", "Recargas del dataset aplicadas.", STORE.reloads, None),
+        ("dataset_reload_failures_total", "counter", "Recargas fallidas.", STORE.failed_reloads, None),
+        ("model_executor_pending_jobs", "gauge", "Trabajos en cola o en ejecución en el pool.", EXECUTOR.pending, None),
+        ("model_executor_max_workers", "gauge", "Workers del pool de modelos.", EXECUTOR.max_workers, None),
+        ("app_ready", "gauge", "1 si el API tiene datos cargados.", int(READINESS.ready), None),
+    ]
+    startup = READINESS.info()
+    if startup["import_seconds"] is not None:
+        extra.append(("app_import_seconds", "gauge", "Importación de api_service.",
+                      startup["import_seconds"], None))
+    if "ready" in startup["transitions_seconds"]:
+        extra.append(("app_time_to_ready_seconds", "gauge", "Desde el inicio hasta tener datos.",
+                      startup["transitions_seconds"]["ready"], None))
+    if startup["first_response_seconds"] is not None:
+        extra.append(("app_time_to_first_response_seconds", "gauge",
+                      "Desde el inicio hasta la primera respuesta 2xx.",
+                      startup["first_response_seconds"], None))
+    extra += [("model_backend_import_seconds", "gauge", "Importación de cada backend de modelos.",
+               seconds, {"backend": name}) for name, seconds in import_times().items()]
+    if REGISTRY is not None:
+        registry = REGISTRY.stats()
+        extra += [
+            ("model_registry_entries", "gauge", "Modelos vigentes en el registro.", registry["entries"], None),
+            ("model_registry_loads_total", "counter", "Modelos cargados del registro.", registry["loads"], None),
+            ("model_registry_misses_total", "counter", "Búsquedas sin modelo en el registro.", registry["misses"], None),
+            ("model_registry_saves_total", "counter", "Modelos guardados en el registro.", registry["saves"], None),
+        ]
+    return PlainTextResponse(METRICS.render(extra),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/sales/kpis", response_model=Dict)
 def sales_kpis_endpoint(
     category: str = Query("All Categories"),
@@ -145,8 +943,11 @@ def sales_kpis_endpoint(
     year:     str = Query("All years")
 ):
     """Devuelve KPIs: ventas totales, por región y por año (con filtros básicos)."""
-    if DF_RAW is None:
-        raise HTTPException(
-            status_code=500, detail=f"Error de carga de datos: {STATUS}")
-    results = kpis(DF_RAW, category=category, region=region, year=year)
+    data = current_data()
+    results = kpis(data.df, category=category, region=region,
+                   year=year, cube=data.cube, index=data.row_index)
     return {"status": "success", **results}
+
+
+# Fin de la importación del módulo (sin datos ni backends de modelos cargados)
+READINESS.import_seconds = READINESS.elapsed()
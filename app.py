@@ -1,8 +1,9 @@
 import os
 import streamlit as st
-import requests
 import pandas as pd
 
+from api_client import ApiClient
+
 st.set_page_config(page_title="Demand Planning Dashboard v2.3",
                    page_icon="🚀", layout="wide")
 
@@ -12,51 +13,30 @@ API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
 # ---------- Utilidades API ----------
 
 
+@st.cache_resource
+def get_client():
+    # Un cliente (sesión con pool de conexiones y caché de pronósticos)
+    # compartido por todos los reruns y sesiones
+    return ApiClient(API_URL)
+
+
+API = get_client()
+
+
 @st.cache_data(ttl=600)
 def get_filters():
     try:
-        r = requests.get(f"{API_URL}/config/filters", timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        data = API.filters()
         return data["categories"], data["regions"], data["years"]
     except Exception as e:
         st.error(f"No se pudo cargar filtros desde el API: {e}")
         return ["All Categories"], ["All Regions"], ["All years"]
 
 
-def get_forecast(model_type, category, region, year, steps):
-    params = dict(model_type=model_type, category=category,
-                  region=region, year=year, steps=steps)
-    try:
-        r = requests.get(f"{API_URL}/sales/forecast",
-                         params=params, timeout=20)
-        r.raise_for_status()
-        return r.json()
-    except Exception as e:
-        st.error(f"Error consultando /sales/forecast: {e}")
-        return None
-
-
-@st.cache_data(ttl=600)
-def get_eval(model_type, category, region, year):
-    params = dict(model_type=model_type, category=category,
-                  region=region, year=year)
-    try:
-        r = requests.get(f"{API_URL}/sales/evaluation",
-                         params=params, timeout=20)
-        r.raise_for_status()
-        return r.json()
-    except:
-        return None
-
-
 @st.cache_data(ttl=600)
 def get_kpis(category, region, year):
-    params = dict(category=category, region=region, year=year)
     try:
-        r = requests.get(f"{API_URL}/sales/kpis", params=params, timeout=20)
-        r.raise_for_status()
-        return r.json()
+        return API.kpis(category, region, year)
     except:
         return None
 
@@ -71,11 +51,7 @@ st.markdown(
 colh1, colh2 = st.columns([1, 3])
 if colh1.button("Probar API /health"):
     try:
-        r = requests.get(f"{API_URL}/health", timeout=5)
-        if r.ok:
-            st.success(r.json())
-        else:
-            st.warning(f"Health respondió: {r.status_code}")
+        st.success(API.health())
     except Exception as e:
         st.error(f"No se pudo contactar al API: {e}")
 
@@ -90,19 +66,29 @@ model = st.sidebar.radio(
 category = st.sidebar.selectbox('Categoría:', CATEGORIES, index=0)
 region = st.sidebar.selectbox('Región:', REGIONS, index=0)
 year = st.sidebar.selectbox('Año:', YEARS, index=0)
-steps = st.sidebar.slider('Horizonte (Meses):', 6, 36, 12, 1)
+# Granularidad de la serie: (etiqueta, unidad, periodos del backtest)
+FREQS = {"MS": ("Mensual", "meses", 12), "W-MON": ("Semanal", "semanas", 13),
+         "D": ("Diaria", "días", 28)}
+freq = st.sidebar.selectbox('Granularidad:', list(FREQS), index=0,
+                            format_func=lambda f: FREQS[f][0])
+label, unit, test_periods = FREQS[freq]
+steps = st.sidebar.slider(f'Horizonte ({unit.capitalize()}):', 6, 36, 12, 1)
 
 tab_forecast, tab_kpis = st.tabs(["📈 Pronóstico", "📊 KPIs"])
 
 with tab_forecast:
     if st.button("Generar Pronóstico"):
         with st.spinner("Generando..."):
-            ev = get_eval(model, category, region, year)
-            res = get_forecast(model, category, region, year, steps)
+            # Evaluación y pronóstico en una sola llamada (/sales/analysis)
+            results = API.forecast_and_evaluation(model, category, region, year, steps, freq)
+            ev, _ = results["evaluation"]
+            res, res_error = results["forecast"]
+        if res_error:
+            st.error(f"Error consultando /sales/forecast: {res_error}")
 
         st.subheader(
             f"Precisión del Modelo: {'SARIMA' if model == 'sarima' else 'XGBoost'}")
-        st.caption("Backtest sobre los últimos 12 meses del histórico filtrado")
+        st.caption(f"Backtest sobre los últimos {test_periods} {unit} del histórico filtrado")
         if ev:
             if ev.get("status") == "Success":
                 c1, c2 = st.columns(2)
@@ -118,23 +104,18 @@ with tab_forecast:
 
         if res:
             if res.get("status") == "success":
-                hist = pd.DataFrame(res["history"])
-                hist['Date'] = pd.to_datetime(hist['index'])
-                hist = hist.set_index('Date').rename(
-                    columns={'data': 'Ventas Históricas'})
-
-                fc = pd.DataFrame(res["forecast"])
-                fc['Date'] = pd.to_datetime(fc['Date'])
-                fc = fc.set_index('Date').rename(
-                    columns={'Sales Forecast': 'Pronóstico'})
+                # El cliente entrega historia y pronóstico como DataFrames por fecha
+                hist = res["history"].rename(columns={'Sales': 'Ventas Históricas'})
+                fc = res["forecast"].rename(columns={'Sales Forecast': 'Pronóstico'})
 
                 st.subheader("Serie Temporal")
                 st.line_chart(
                     pd.concat([hist['Ventas Históricas'], fc['Pronóstico']], axis=1))
 
-                st.subheader("Tabla del Pronóstico (primeros 12 meses)")
+                st.subheader(f"Tabla del Pronóstico (primeros 12 {unit})")
                 st.dataframe(
-                    pd.DataFrame(res["forecast"]).head(12).style.format({
+                    res["forecast"].head(12).reset_index().style.format({
+                        'Date': '{:%Y-%m-%d}',
                         'Sales Forecast': '${:,.2f}',
                         'Lower Bound': '${:,.2f}',
                         'Upper Bound': '${:,.2f}'
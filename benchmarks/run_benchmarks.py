@@ -0,0 +1,246 @@
+"""
+Suite de benchmarks del proyecto (sin red: datos locales y TestClient).
+
+Uso:
+    python -m benchmarks.run_benchmarks --output benchmarks/results.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.25
+
+- Micro benchmarks de load_data, aggregate_sales, kpis (filtro por máscara,
+  por índice y por cubo) a varios tamaños de dataset.
+- Ajustes de get_sarima_forecast / get_xgboost_forecast sobre la serie total
+  (mensual, semanal y diaria).
+- Latencia de los endpoints del API a través de TestClient (caché fría y
+  caliente).
+Los resultados se guardan en JSON; con --baseline se compara cada medición
+(mediana) y el proceso termina con código 1 si alguna empeora más que
+--threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src import data_processing as dp
+
+SIZES = (4_000, 40_000, 400_000)
+SLICE = ("Technology", "West", "2016")
+
+
+def measure(fn, repeat=5, number=1, setup=None):
+    """Tiempos por llamada (s): mínimo, mediana y media de `repeat` rondas."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "repeat": repeat,
+        "number": number
+    }
+
+
+def scale_dataset(df, n_rows, seed=0):
+    """
+    Dataset de `n_rows` filas muestreando filas reales (con reemplazo) y
+    desplazando la fecha unos días, con el mismo esquema que load_data.
+    """
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(df), n_rows)
+    scaled = df.take(idx).reset_index(drop=True)
+    scaled["Order_Date"] = scaled["Order_Date"] + pd.to_timedelta(rng.integers(0, 28, n_rows), "D")
+    scaled["Cod_Anio"] = scaled["Order_Date"].dt.year.astype("int16")
+    return dp.compact_frame(scaled)
+
+
+def synthetic_dataset(n_rows, seed=0):
+    """Dataset sintético (scripts.superstore_synthetic) con más segmentos e historia."""
+    from scripts.superstore_synthetic import generar_sintetico
+
+    chunks = generar_sintetico(n_rows, anios=6, n_categorias=6, n_regiones=8, seed=seed)
+    return dp.compact_frame(dp.apply_schema(pd.concat(chunks, ignore_index=True)))
+
+
+def bench_data(df, size, repeat):
+    """Benchmarks de carga, agregación y KPIs para un tamaño de dataset."""
+    results = {}
+    category, region, year = SLICE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "superstore.parquet")
+        df.to_parquet(path, index=False)
+        original = dp.PARQUET_PATH
+        dp.PARQUET_PATH = path
+        try:
+            results["load_data"] = measure(dp.load_data, repeat)
+        finally:
+            dp.PARQUET_PATH = original
+
+    cube = dp.build_cube(df)
+    index = dp.build_row_index(df)
+    results["build_cube"] = measure(lambda: dp.build_cube(df), repeat)
+    results["build_row_index"] = measure(lambda: dp.build_row_index(df), repeat)
+
+    for name, kwargs in (("mask", {}), ("index", {"index": index}), ("cube", {"cube": cube})):
+        results[f"aggregate_sales[{name}]"] = measure(
+            lambda: dp.aggregate_sales(df, category, region, year, **kwargs), repeat, number=10)
+        results[f"kpis[{name}]"] = measure(
+            lambda: dp.kpis(df, category, region, year, **kwargs), repeat, number=10)
+    results["aggregate_sales[cube,D]"] = measure(
+        lambda: dp.aggregate_sales(df, category, region, cube=cube, freq="D"), repeat, number=10)
+
+    return {f"{name}@{size}": {"size": size, **r} for name, r in results.items()}
+
+
+def bench_models(df, repeat):
+    """Ajustes de los modelos sobre la serie total (no dependen del tamaño)."""
+    from src.sarima_model import get_sarima_forecast
+    from src.xgboost_model import get_xgboost_forecast
+
+    cube = dp.build_cube(df)
+    results = {}
+    for freq in ("MS", "W-MON", "D"):
+        ts, _ = dp.aggregate_sales(df, cube=cube, freq=freq)
+        suffix = "" if freq == "MS" else f"[{freq}]"
+        results[f"get_sarima_forecast{suffix}"] = measure(
+            lambda: get_sarima_forecast(ts, 12, freq=freq), repeat)
+        results[f"get_xgboost_forecast{suffix}"] = measure(
+            lambda: get_xgboost_forecast(ts, 12, freq=freq), repeat)
+    return results
+
+
+def bench_api(repeat):
+    """Latencia de endpoints con TestClient (procesos del pool incluidos)."""
+    # Sin registro aunque el entorno lo defina: las latencias "en frío" deben
+    # ser ajustes reales, no modelos leídos de disco
+    os.environ["MODEL_REGISTRY_DIR"] = ""
+    from fastapi.testclient import TestClient
+    import api_service
+    if api_service.REGISTRY is not None:
+        raise RuntimeError("api_service se importó con el registro de modelos activo.")
+
+    params = {"category": SLICE[0], "region": SLICE[1]}
+    cold = api_service.RESULT_CACHE.clear
+    results = {}
+    with TestClient(api_service.app) as client:
+        def get(path, **extra):
+            return lambda: client.get(path, params={**params, **extra}).raise_for_status()
+
+        startup = time.perf_counter()
+        while client.get("/ready").status_code == 503:  # carga de datos en segundo plano
+            if time.perf_counter() - startup > 120:
+                raise RuntimeError("El API no quedó listo en 120 s.")
+            time.sleep(0.05)
+        get("/sales/forecast", model_type="xgboost")()  # arranca el pool
+        results["GET /sales/kpis"] = measure(get("/sales/kpis", year=SLICE[2]), repeat, number=20)
+        results["GET /config/filters"] = measure(get("/config/filters"), repeat, number=20)
+        for model in ("sarima", "xgboost"):
+            results[f"GET /sales/forecast[{model},cold]"] = measure(
+                get("/sales/forecast", model_type=model), repeat, setup=cold)
+            results[f"GET /sales/forecast[{model},warm]"] = measure(
+                get("/sales/forecast", model_type=model), repeat, number=20)
+            results[f"GET /sales/evaluation[{model},cold]"] = measure(
+                get("/sales/evaluation", model_type=model), repeat, setup=cold)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lista de regresiones: mediana actual > mediana base × (1 + threshold)."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_s"):
+            continue
+        ratio = current["median_s"] / base["median_s"]
+        current["baseline_median_s"] = base["median_s"]
+        current["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento del proyecto.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="Tamaños de dataset (filas) separados por coma.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results.json"))
+    parser.add_argument("--baseline", help="JSON de una corrida previa para comparar.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Empeoramiento relativo tolerado (0.25 = 25%%).")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Usar datos sintéticos en lugar de remuestrear el dataset real.")
+    parser.add_argument("--skip-models", action="store_true")
+    parser.add_argument("--skip-api", action="store_true")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    df, status = dp.load_data()
+    if df is None:
+        print(f"[ERROR] {status}")
+        return 2
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        print(f"Datos: {size} filas ...")
+        data = synthetic_dataset(size) if args.synthetic else scale_dataset(df, size)
+        results.update(bench_data(data, size, args.repeat))
+    if not args.skip_models:
+        print("Modelos ...")
+        results.update(bench_models(df, args.repeat))
+    if not args.skip_api:
+        print("Endpoints ...")
+        results.update(bench_api(args.repeat))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Benchmark':<48}{'Mediana ms':>12}{'Base ms':>10}{'Ratio':>8}")
+    for name, r in results.items():
+        base = r.get("baseline_median_s")
+        print(f"{name:<48}{r['median_s'] * 1000:>12.3f}"
+              f"{(base * 1000 if base else float('nan')):>10.3f}{r.get('ratio', float('nan')):>8.2f}")
+    print(f"\nResultados en {args.output}")
+
+    if regressions:
+        print(f"\n[REGRESIÓN] {len(regressions)} benchmark(s) sobre el umbral de {args.threshold:.0%}:")
+        for name, ratio in regressions:
+            print(f"  {name}: x{ratio:.2f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,51 @@
 import streamlit as st
-import requests
 import os
+import sys
+
+# El cliente del API es el de la raíz del repositorio (api_client.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from api_client import ApiClient
 
 # ===========================
 # API CONFIG
 # ===========================
 
+# API_URL debe apuntar al servicio de api_service.py de la raíz
+# (uvicorn api_service:app), que expone /sales/*. backend/api_service.py
+# solo tiene /forecast y no sirve para este dashboard.
 API_URL = st.secrets.get(
     "API_URL",
     os.getenv("API_URL", "http://127.0.0.1:8000")
 )
+# Endpoint que usa el dashboard; se verifica al arrancar
+REQUIRED_ENDPOINT = "/sales/analysis"
 
 st.caption(f"Backend API: {API_URL}")
 
 # Helpers
 
 
+@st.cache_resource
+def get_client():
+    # Sesión con pool de conexiones y caché de pronósticos, compartida entre reruns
+    return ApiClient(API_URL)
+
+
+API = get_client()
+
+
 def api_get(path, **kwargs):
-    res = requests.get(f"{API_URL}{path}", **kwargs)
-    res.raise_for_status()
-    return res.json()
+    return API.get(path, **kwargs)
 
 
 def api_post(path, **kwargs):
-    res = requests.post(f"{API_URL}{path}", **kwargs)
-    res.raise_for_status()
-    return res.json()
+    return API.post(path, **kwargs)
+
+
+@st.cache_data(ttl=600)
+def api_endpoints():
+    return sorted(api_get("/openapi.json", timeout=10).get("paths", {}))
 
 # ===========================
 # UI
@@ -34,6 +54,17 @@ def api_post(path, **kwargs):
 
 st.title("📊 Dashboard de Planificación de Demanda v3.0")
 
+# El API configurado debe ser el servicio con /sales/*
+try:
+    endpoints = api_endpoints()
+except Exception as e:
+    st.error(f"No se pudo contactar al API en {API_URL}: {e}")
+    st.stop()
+if REQUIRED_ENDPOINT not in endpoints:
+    st.error(f"El API en {API_URL} no expone {REQUIRED_ENDPOINT}: configura API_URL "
+             "con el servicio de api_service.py (raíz del repositorio), no backend/api_service.py.")
+    st.stop()
+
 # Load filters
 try:
     filters = api_get("/config/filters")
@@ -45,23 +76,27 @@ except Exception as e:
     st.stop()
 
 modelo = st.radio("Modelo de Pronóstico:", ["SARIMA", "XGBoost"])
-categoria = st.selectbox("Categoría", ["All"] + categories)
-region = st.selectbox("Región", ["All"] + regions)
-anio = st.selectbox("Año", ["All"] + years)
+categoria = st.selectbox("Categoría", categories)
+region = st.selectbox("Región", regions)
+anio = st.selectbox("Año", years)
 horizon = st.slider("Horizonte (meses)", 1, 24, 12)
 
 if st.button("Generar Pronóstico"):
-    try:
-        data = api_get(
-            "/forecast",
-            params={
-                "category": categoria,
-                "region": region,
-                "model": modelo.lower(),
-                "horizon": horizon
-            }
-        )
+    # Pronóstico y evaluación en una sola llamada (/sales/analysis)
+    results = API.forecast_and_evaluation(modelo.lower(), categoria, region, anio, horizon)
+    data, error = results["forecast"]
+    evaluation, _ = results["evaluation"]
+    if error:
+        st.error(f"Error al consultar pronóstico: {error}")
+    elif data.get("status") != "success":
+        st.warning(data.get("message", "No se pudo generar el pronóstico."))
+    else:
         st.success("Pronóstico generado correctamente")
-        st.json(data)
-    except Exception as e:
-        st.error(f"Error al consultar pronóstico: {e}")
+        if evaluation and evaluation.get("status") == "Success":
+            c1, c2 = st.columns(2)
+            c1.metric("MAPE", f"{evaluation['mape']:.2f} %")
+            c2.metric("RMSE", f"$ {evaluation['rmse']:,.2f}")
+        # Historia y pronóstico llegan como DataFrames indexados por fecha
+        st.line_chart(data["history"]["Sales"].rename("Ventas Históricas").to_frame()
+                      .join(data["forecast"]["Sales Forecast"].rename("Pronóstico"), how="outer"))
+        st.dataframe(data["forecast"])
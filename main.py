@@ -3,6 +3,7 @@ import os
 
 # TODO libreria sys para manejo de rutas de importacion de modulos
 import sys
+import argparse
 import pandas as pd
 
 from scripts.data_loader import DATA_PATH, cargar_datos_excel
@@ -14,9 +15,20 @@ from scripts.superstore_clean import (
     agregar_columnas_fecha
 )
 
-from scripts.superstore_saving import guardar_datos_limpios
+from scripts.superstore_saving import guardar_datos_limpios, guardar_datos_parquet
+from scripts.superstore_calendar import VERSION_NOMBRES
 from scripts.superstore_preparation import preparar_datos_para_analisis
 from scripts.superstore_groupin import agrupar_ventas
+from scripts.superstore_incremental import (
+    actualizar_almacen,
+    cargar_checkpoint,
+    compactar_almacen,
+    crear_checkpoint,
+    filtrar_nuevos,
+    guardar_checkpoint,
+    hash_archivo,
+    marca_checkpoint
+)
 # -----------------------------------------------------------
 # Importar módulos del proyecto
 # -----------------------------------------------------------
@@ -31,6 +43,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'scripts'))
 # -----------------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_PATH = os.path.join(BASE_DIR, "data", "processed", "superstore_clean.csv")
+PARQUET_OUTPUT_PATH = os.path.join(BASE_DIR, "data", "processed", "superstore_clean.parquet")
+# Checkpoint del modo incremental (hash de la fuente + marcas de agua Row ID / Order Date)
+CHECKPOINT_PATH = os.path.join(BASE_DIR, "data", "processed", "etl_checkpoint.json")
 columnas_actuales = {
     "Row ID": "Row_Id",
     "Order ID": "Order_Id",
@@ -55,24 +70,96 @@ columnas_actuales = {
     "Profit": "Profit"
 }
 
-if __name__ == "__main__":
-    # Cargar los datos
-    print("Cargando datos {DATA_PATH} ...")
-    df_superstore = cargar_datos_excel(DATA_PATH)
-    
+
+
+def transformar(df_superstore):
+    """Pipeline de limpieza: renombrar, ordenar fecha, columnas de fecha y selección."""
     # Renombrar columnas
     print("Renombrando columnas para evitar espacios ...")
     df_superstore_renamed = renombrar_columnas(df_superstore, columnas_actuales)
     # print(df_superstore.columns)
-    
-    # Ordenar y formatear la columna de fecha 'Order_Date'
-    df_superstore_order_date = ordenar_y_formatear_fecha(df_superstore_renamed, 'Order_Date')
-    
-    df_agregar_columnas = agregar_columnas_fecha(df_superstore_order_date, columna_fecha="Order_Date")
 
-    
+    # Ordenar la columna de fecha 'Order_Date' (se mantiene como datetime:
+    # convertirla a texto y volver a parsearla con dayfirst invertía día/mes)
+    df_superstore_order_date = ordenar_y_formatear_fecha(
+        df_superstore_renamed, 'Order_Date', formatear=False, copy=False)
+
+    df_agregar_columnas = agregar_columnas_fecha(
+        df_superstore_order_date, columna_fecha="Order_Date", copy=False)
+
     df_final = preparar_datos_para_analisis(df_agregar_columnas)
     print(df_final.columns)
-    
-    # Guardar los datos limpios
-    guardar_datos_limpios(df_final, OUTPUT_PATH)
\ No newline at end of file
+    return df_final
+
+
+def carga_completa(df_superstore, source_hash):
+    """Procesa toda la fuente y reescribe el almacén y el checkpoint."""
+    df_final = transformar(df_superstore)
+
+    # Guardar los datos limpios (CSV legible + Parquet tipado para el API)
+    ok = guardar_datos_limpios(df_final, OUTPUT_PATH)
+    ok = guardar_datos_parquet(df_final, PARQUET_OUTPUT_PATH) and ok
+    if ok:
+        marcas = [c for c in ("Row ID", "Order Date") if c in df_superstore.columns]
+        fuente = renombrar_columnas(df_superstore[marcas], columnas_actuales)
+        guardar_checkpoint(CHECKPOINT_PATH,
+                           crear_checkpoint(fuente, source_hash, len(df_final)))
+
+
+def carga_incremental(df_superstore, source_hash, checkpoint):
+    """Transforma solo las filas nuevas y las agrega al almacén procesado."""
+    df_superstore = df_superstore.reset_index(drop=True)
+    df_renamed = renombrar_columnas(df_superstore, columnas_actuales)
+    df_nuevos = filtrar_nuevos(df_renamed, checkpoint)
+    print(f"Filas nuevas desde el último checkpoint: {len(df_nuevos)}")
+
+    filas = checkpoint.get("rows", 0)
+    if checkpoint.get("nombres_calendario") != VERSION_NOMBRES:
+        # Almacén escrito con los nombres de mes/día de la versión con locale:
+        # se reescribe una vez para que no se mezclen con los del delta
+        print("Migrando los nombres de mes/día del almacén existente ...")
+        if not compactar_almacen(OUTPUT_PATH, PARQUET_OUTPUT_PATH, forzar=True):
+            return
+    if len(df_nuevos) > 0:
+        # El delta pasa por el mismo pipeline (nombres originales de columnas)
+        df_final = transformar(df_superstore.loc[df_nuevos.index])
+        if not actualizar_almacen(df_final, OUTPUT_PATH, PARQUET_OUTPUT_PATH,
+                                  marca_checkpoint(checkpoint)):
+            return
+        filas += len(df_final)
+
+    guardar_checkpoint(CHECKPOINT_PATH,
+                       crear_checkpoint(df_nuevos, source_hash, filas, checkpoint))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL del dataset Superstore.")
+    parser.add_argument("--full", action="store_true",
+                        help="Reprocesa toda la fuente aunque exista un checkpoint.")
+    parser.add_argument("--compactar", action="store_true",
+                        help="Incorpora las partes del delta incremental al Parquet base y termina.")
+    args = parser.parse_args()
+
+    if args.compactar:
+        sys.exit(0 if compactar_almacen(OUTPUT_PATH, PARQUET_OUTPUT_PATH) else 1)
+
+    checkpoint = None if args.full else cargar_checkpoint(CHECKPOINT_PATH)
+    almacen_existe = os.path.exists(OUTPUT_PATH) and os.path.exists(PARQUET_OUTPUT_PATH)
+    source_hash = hash_archivo(DATA_PATH)
+
+    if checkpoint is not None and almacen_existe and checkpoint.get("source_hash") == source_hash:
+        print("La fuente no cambió desde el último checkpoint; no hay nada que procesar.")
+        sys.exit(0)
+
+    # Cargar los datos
+    print(f"Cargando datos {DATA_PATH} ...")
+    df_superstore = cargar_datos_excel(DATA_PATH)
+    if df_superstore is None:
+        sys.exit(1)
+
+    if checkpoint is not None and almacen_existe:
+        print("Modo incremental: se procesan solo las filas nuevas.")
+        carga_incremental(df_superstore, source_hash, checkpoint)
+    else:
+        print("Carga completa de la fuente.")
+        carga_completa(df_superstore, source_hash)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# Tablas de nombres (índice 0 = enero / lunes, como dt.month - 1 y dt.dayofweek).
+# No dependen del locale del sistema: mismo resultado en cualquier host y sin
+# tocar estado global del proceso (locale.setlocale no es seguro con hilos).
+MESES = {
+    "es": ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+           "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"],
+    "en": ["January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December"],
+}
+DIAS = {
+    "es": ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"],
+    "en": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+}
+
+# Versión de los nombres que escribe el ETL (va en el checkpoint). La versión
+# con locale guardaba los acentos mal decodificados ("Miã©rcoles", "Sã¡bado"):
+# un almacén anterior se migra una vez con corregir_nombres antes de agregarle
+# filas nuevas, para que la columna no mezcle ambas escrituras.
+VERSION_NOMBRES = 2
+
+
+def _nombre_legado(nombre):
+    """Escritura de la versión con locale: UTF-8 leído como latin-1, capitalizado."""
+    return nombre.encode("utf-8").decode("latin-1").capitalize()
+
+
+NOMBRES_LEGADOS = {
+    _nombre_legado(nombre): nombre
+    for tablas in (MESES, DIAS) for tabla in tablas.values() for nombre in tabla
+    if _nombre_legado(nombre) != nombre
+}
+
+
+def corregir_nombres(serie):
+    """Reemplaza los nombres legados de mes/día por los de las tablas."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        legados = [c for c in serie.cat.categories if c in NOMBRES_LEGADOS]
+        if not legados:
+            return serie
+        serie = serie.astype(object)
+    return serie.replace(NOMBRES_LEGADOS)
+
+
+def _tabla(tablas, idioma):
+    if idioma not in tablas:
+        raise ValueError(f"Idioma no soportado: {idioma}. Usa: {list(tablas)}")
+    return tablas[idioma]
+
+
+def _codigos(valores, desplazamiento=0):
+    """Enteros (con nulos) -> códigos de categoría; nulo -> -1."""
+    valores = pd.array(valores, dtype="Int64")
+    return np.where(valores.isna(), -1, valores.fillna(0).to_numpy() - desplazamiento).astype(np.int64)
+
+
+def nombres_mes(meses, idioma="es"):
+    """Códigos de mes 1..12 -> categórico ordenado con el nombre del mes."""
+    return pd.Categorical.from_codes(
+        _codigos(meses, 1), categories=_tabla(MESES, idioma), ordered=True)
+
+
+def nombres_dia(dias_semana, idioma="es"):
+    """Día de la semana 0..6 (lunes = 0) -> categórico ordenado con el nombre."""
+    return pd.Categorical.from_codes(
+        _codigos(dias_semana), categories=_tabla(DIAS, idioma), ordered=True)
+
+
+def trimestre(meses):
+    """Trimestre 1..4 a partir del mes (aritmética entera)."""
+    meses = pd.array(meses, dtype="Int64")
+    return (meses - 1) // 3 + 1
+
+
+def _llave_periodo(anios, periodos, formato):
+    """
+    Llave texto por período (p. ej. '2014-Q1', '2014-01') como categórico
+    ordenado. Se formatea una vez por período distinto, no por fila.
+    """
+    anios = pd.array(anios, dtype="Int64")
+    periodos = pd.array(periodos, dtype="Int64")
+    nulos = np.asarray(anios.isna() | periodos.isna())
+    llaves = anios.fillna(0).to_numpy() * 100 + periodos.fillna(0).to_numpy()
+
+    unicas, codigos = np.unique(llaves[~nulos], return_inverse=True)
+    todos = np.full(len(llaves), -1, dtype=np.int64)
+    todos[~nulos] = codigos
+    etiquetas = [formato.format(k // 100, k % 100) for k in unicas.tolist()]
+    return pd.Categorical.from_codes(todos, categories=etiquetas, ordered=True)
+
+
+def llave_anio_trimestre(anios, trimestres):
+    """Llave 'AAAA-QT' (p. ej. 2014-Q1)."""
+    return _llave_periodo(anios, trimestres, "{}-Q{}")
+
+
+def llave_anio_mes(anios, meses):
+    """Llave 'AAAA-MM' (p. ej. 2014-01)."""
+    return _llave_periodo(anios, meses, "{}-{:02d}")
+
+
+def derivar_calendario(fechas, idioma="es"):
+    """
+    Columnas de calendario a partir de una serie datetime, sin formatear
+    fechas fila por fila.
+
+    Retorna dict con: anio, mes, dia (Int64), nom_mes, nom_dia (categóricos),
+    trimestre (Int64), anio_trimestre y anio_mes (categóricos ordenados).
+    """
+    fechas = pd.to_datetime(pd.Series(fechas))
+    anio = fechas.dt.year.astype("Int64")
+    mes = fechas.dt.month.astype("Int64")
+    trim = trimestre(mes)
+    return {
+        "anio": anio,
+        "mes": mes,
+        "dia": fechas.dt.day.astype("Int64"),
+        "nom_mes": nombres_mes(mes, idioma),
+        "nom_dia": nombres_dia(fechas.dt.dayofweek.astype("Int64"), idioma),
+        "trimestre": trim,
+        "anio_trimestre": llave_anio_trimestre(anio, trim),
+        "anio_mes": llave_anio_mes(anio, mes),
+    }
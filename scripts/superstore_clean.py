@@ -1,5 +1,6 @@
 import pandas as pd
-import locale
+
+from scripts.superstore_calendar import derivar_calendario
 
 # TODO Función para verificar valores nulos en el DataFrame
 
@@ -37,18 +38,20 @@ def verificar_nulos(df):
 
 # TODO Función para renombrar columnas del DataFrame
 
-def renombrar_columnas(df, nuevos_nombres):
+def renombrar_columnas(df, nuevos_nombres, copy=True):
     """
     Renombra columnas del DataFrame según un diccionario de equivalencias.
 
     Parámetros:
     df (pd.DataFrame): DataFrame original.
     nuevos_nombres (dict): Diccionario con formato {'columna_actual': 'nuevo_nombre'}.
+    copy (bool): Si es False se modifica `df` en sitio (sin copia completa).
 
     Retorna:
     pd.DataFrame con las columnas renombradas.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
     df.rename(columns=nuevos_nombres, inplace=True)
     print("Columnas renombradas correctamente.")
     print("Nuevas columnas:", df.columns.tolist())
@@ -56,18 +59,20 @@ def renombrar_columnas(df, nuevos_nombres):
 
 
 # TODO Función para convertir a mayúsculas el texto de columnas específicas
-def convertir_a_mayusculas(df):
+def convertir_a_mayusculas(df, copy=True):
     """
     Convierte a mayúsculas el texto de las columnas indicadas.
 
     Parámetros:
     df (pd.DataFrame): DataFrame con los datos.
     columnas (list): Lista con los nombres de las columnas a transformar.
+    copy (bool): Si es False se modifica `df` en sitio (sin copia completa).
 
     Retorna:
     pd.DataFrame con las columnas convertidas a mayúsculas.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
     texto_cols = df.select_dtypes(include=["object", "string"]).columns
     for col in texto_cols:
         df[col] = df[col].astype(str).str.strip().str.replace(
@@ -78,18 +83,22 @@ def convertir_a_mayusculas(df):
 
 
 # TODO Función para ordenar y formatear una columna de fecha
-def ordenar_y_formatear_fecha(df, columna_fecha):
+def ordenar_y_formatear_fecha(df, columna_fecha, formatear=True, copy=True):
     """
     Ordena un DataFrame por una columna de fecha y la convierte al formato 'YYYY-MM-DD'.
 
     Parámetros:
     df (pd.DataFrame): DataFrame que contiene la columna de fecha.
     columna_fecha (str): Nombre de la columna de fecha a ordenar.
+    formatear (bool): Si es False la fecha queda como datetime (evita el viaje
+        fecha -> texto -> fecha cuando la siguiente etapa vuelve a parsearla).
+    copy (bool): Si es False no se copia `df` antes de convertir la fecha.
 
     Retorna:
     pd.DataFrame: DataFrame ordenado y con la fecha formateada como texto.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
 
     # Verificar que la columna exista
     print(
@@ -103,17 +112,18 @@ def ordenar_y_formatear_fecha(df, columna_fecha):
         df[columna_fecha] = pd.to_datetime(
             df[columna_fecha], errors="coerce", dayfirst=True)
 
-    # Ordenar por la fecha
-    df = df.sort_values(by=columna_fecha, ascending=True)
+    # Ordenar por la fecha (estable: conserva el orden original en empates)
+    df = df.sort_values(by=columna_fecha, ascending=True, kind="mergesort")
 
     # Crear una versión formateada Y-M-d (año-mes-día)
-    df[columna_fecha] = df[columna_fecha].dt.strftime("%Y-%m-%d")
+    if formatear:
+        df[columna_fecha] = df[columna_fecha].dt.strftime("%Y-%m-%d")
     print(f"Columna '{columna_fecha}' ordenada y formateada correctamente.")
 
     return df.reset_index(drop=True)
 
 
-def agregar_columnas_fecha(df, columna_fecha):
+def agregar_columnas_fecha(df, columna_fecha, copy=True, idioma="es"):
     """
     Agrega columnas de año, mes, nombre del mes, día y nombre del día
     basadas en una columna de fecha existente.
@@ -121,36 +131,32 @@ def agregar_columnas_fecha(df, columna_fecha):
     Parámetros:
     df (pd.DataFrame): DataFrame con la columna de fecha.
     columna_fecha (str): Nombre de la columna de fecha.
+    copy (bool): Si es False las columnas se agregan sobre `df` en sitio.
+    idioma (str): 'es' | 'en' para los nombres de mes y día.
 
     Retorna:
     pd.DataFrame con las nuevas columnas agregadas.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
 
     # Verificar que la columna exista
     if columna_fecha not in df.columns:
         raise ValueError(
             f"La columna '{columna_fecha}' no existe en el DataFrame.")
 
-    # Convertir a tipo datetime
-    df[columna_fecha] = pd.to_datetime(
-        df[columna_fecha], errors='coerce', dayfirst=True)
-
-    # Configurar idioma español (puede variar según el sistema operativo)
-    try:
-        locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
-    except:
-        locale.setlocale(locale.LC_TIME, 'es_ES')
-
-    # Crear nuevas columnas
-    df['Cod_Anio'] = df[columna_fecha].dt.year.astype(
-        'Int64')  # entero nulo-seguro
-    df['Cod_Mes'] = df[columna_fecha].dt.month.astype('Int64')
-    df['Nom_Mes'] = df[columna_fecha].dt.strftime(
-        '%B').str.capitalize().astype('string')
-    df['Cod_Dia'] = df[columna_fecha].dt.day.astype('Int64')
-    df['Nom_Dia'] = df[columna_fecha].dt.strftime(
-        '%A').str.capitalize().astype('string')
+    # Convertir a tipo datetime (si ya lo es no se vuelve a parsear)
+    if not pd.api.types.is_datetime64_any_dtype(df[columna_fecha]):
+        df[columna_fecha] = pd.to_datetime(
+            df[columna_fecha], errors='coerce', dayfirst=True)
+
+    # Crear nuevas columnas (nombres desde tablas fijas, sin locale)
+    calendario = derivar_calendario(df[columna_fecha], idioma)
+    df['Cod_Anio'] = calendario['anio']  # entero nulo-seguro
+    df['Cod_Mes'] = calendario['mes']
+    df['Nom_Mes'] = calendario['nom_mes']
+    df['Cod_Dia'] = calendario['dia']
+    df['Nom_Dia'] = calendario['nom_dia']
 
     print(
         f"Se agregaron las columnas: Año, Mes, Nombre_mes, Día, Nombre_día basadas en '{columna_fecha}'.")
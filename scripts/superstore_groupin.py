@@ -1,8 +1,9 @@
 import pandas as pd
-import locale
 
+from scripts.superstore_calendar import derivar_calendario
 
-def _asegurar_derive_fecha(df, col_fecha="Order_Date"):
+
+def _asegurar_derive_fecha(df, col_fecha="Order_Date", idioma="es"):
     """Crea columnas cod_anio, cod_mes, cod_dia, nom_mes, nom_dia si no existen."""
     df = df.copy()
 
@@ -13,39 +14,64 @@ def _asegurar_derive_fecha(df, col_fecha="Order_Date"):
     if not pd.api.types.is_datetime64_any_dtype(df[col_fecha]):
         df[col_fecha] = pd.to_datetime(df[col_fecha], errors="coerce")
 
-    # Locale para nombres en español (si está disponible)
-    try:
-        locale.setlocale(locale.LC_TIME, "es_ES.UTF-8")
-    except:
-        try:
-            locale.setlocale(locale.LC_TIME, "es_ES")
-        except:
-            pass
+    calendario = derivar_calendario(df[col_fecha], idioma)
 
     # Derivadas si faltan
-    if "cod_anio" not in df.columns:
-        df["cod_anio"] = df[col_fecha].dt.year.astype("Int64")
-    if "cod_mes" not in df.columns:
-        df["cod_mes"] = df[col_fecha].dt.month.astype("Int64")
-    if "cod_dia" not in df.columns:
-        df["cod_dia"] = df[col_fecha].dt.day.astype("Int64")
-    if "nom_mes" not in df.columns:
-        df["nom_mes"] = df[col_fecha].dt.strftime(
-            "%B").str.capitalize().astype("string")
-    if "nom_dia" not in df.columns:
-        df["nom_dia"] = df[col_fecha].dt.strftime(
-            "%A").str.capitalize().astype("string")
-
-    # Soporte para trimestre / llaves compuestas
-    df["trimestre"] = df[col_fecha].dt.quarter.astype("Int64")
-    df["anio_trimestre"] = (df["cod_anio"].astype(
-        "string") + "-Q" + df["trimestre"].astype("string"))
-    df["anio_mes"] = df[col_fecha].dt.to_period(
-        "M").astype(str)  # p.ej. 2014-01
+    for col, clave in (("cod_anio", "anio"), ("cod_mes", "mes"), ("cod_dia", "dia"),
+                       ("nom_mes", "nom_mes"), ("nom_dia", "nom_dia")):
+        if col not in df.columns:
+            df[col] = calendario[clave]
+
+    # Soporte para trimestre / llaves compuestas (aritmética entera)
+    df["trimestre"] = calendario["trimestre"]
+    df["anio_trimestre"] = calendario["anio_trimestre"]  # p.ej. 2014-Q1
+    df["anio_mes"] = calendario["anio_mes"]  # p.ej. 2014-01
 
     return df
 
 
+NIVELES = ('diario', 'semanal', 'mensual', 'anio', 'trimestre',
+           'anio_trimestre', 'anio_mes', 'nom_mes', 'nom_dia')
+
+
+def _llave_tiempo(nivel, col_fecha):
+    """Llave temporal de groupby para un nivel de agregación."""
+    if nivel == "diario":
+        return pd.Grouper(key=col_fecha, freq="D")
+    elif nivel == "semanal":
+        # semana anclada a lunes
+        return pd.Grouper(key=col_fecha, freq="W-MON")
+    elif nivel == "mensual":
+        return pd.Grouper(key=col_fecha, freq="M")
+    elif nivel == "anio":
+        return "cod_anio"
+    elif nivel in NIVELES:
+        return nivel
+    raise ValueError(
+        "nivel inválido. Usa: 'diario','semanal','mensual','anio',"
+        "'trimestre','anio_trimestre','anio_mes','nom_mes','nom_dia'"
+    )
+
+
+def _kpis_y_orden(agg_base, key_time, por, col_fecha):
+    """Agrega Avg_Price y Profit_Margin y ordena por tiempo si corresponde."""
+    # KPIs derivados
+    agg_base["Avg_Price"] = (
+        agg_base["Sales"] / agg_base["Quantity"]).replace([pd.NA, pd.NaT], 0)
+    agg_base["Profit_Margin"] = (
+        agg_base["Profit"] / agg_base["Sales"]).replace([pd.NA, pd.NaT], 0)
+
+    # Ordenar por tiempo si corresponde
+    if isinstance(key_time, pd.Grouper):
+        agg_base = agg_base.sort_values(by=[col_fecha] + por)
+    elif key_time in {"cod_anio", "trimestre", "cod_mes", "cod_dia"}:
+        agg_base = agg_base.sort_values(by=[key_time] + por)
+    elif key_time in {"anio_trimestre", "anio_mes"}:
+        agg_base = agg_base.sort_values(by=[key_time] + por)
+    # para 'nom_mes' / 'nom_dia' queda el orden del calendario (categórico ordenado)
+    return agg_base
+
+
 def agrupar_ventas(df, nivel="semanal", por=["Region", "Category"], col_fecha="Order_Date"):
     """
     Agrupa las ventas por fecha y dimensiones adicionales.
@@ -69,37 +95,14 @@ def agrupar_ventas(df, nivel="semanal", por=["Region", "Category"], col_fecha="O
     df = _asegurar_derive_fecha(df.copy(), col_fecha)
 
     # Selección de llave temporal
-    if nivel == "diario":
-        key_time = pd.Grouper(key=col_fecha, freq="D")
-    elif nivel == "semanal":
-        # semana anclada a lunes
-        key_time = pd.Grouper(key=col_fecha, freq="W-MON")
-    elif nivel == "mensual":
-        key_time = pd.Grouper(key=col_fecha, freq="M")
-    elif nivel == "anio":
-        key_time = "cod_anio"
-    elif nivel == "trimestre":
-        key_time = "trimestre"
-    elif nivel == "anio_trimestre":
-        key_time = "anio_trimestre"
-    elif nivel == "anio_mes":
-        key_time = "anio_mes"
-    elif nivel == "nom_mes":
-        key_time = "nom_mes"
-    elif nivel == "nom_dia":
-        key_time = "nom_dia"
-    else:
-        raise ValueError(
-            "nivel inválido. Usa: 'diario','semanal','mensual','anio',"
-            "'trimestre','anio_trimestre','anio_mes','nom_mes','nom_dia'"
-        )
+    key_time = _llave_tiempo(nivel, col_fecha)
 
     # Validar columnas "por"
     por = [c for c in (por or []) if c in df.columns]
 
-    # Agrupar
+    # Agrupar (observed=True: las llaves categóricas no generan combinaciones vacías)
     agg_base = (
-        df.groupby(por + [key_time])
+        df.groupby(por + [key_time], observed=True)
           .agg(
               Sales=("Sales", "sum"),
               Quantity=("Quantity", "sum"),
@@ -108,22 +111,91 @@ def agrupar_ventas(df, nivel="semanal", por=["Region", "Category"], col_fecha="O
         )
         .reset_index()
     )
-
-    # KPIs derivados
-    agg_base["Avg_Price"] = (
-        agg_base["Sales"] / agg_base["Quantity"]).replace([pd.NA, pd.NaT], 0)
-    agg_base["Profit_Margin"] = (
-        agg_base["Profit"] / agg_base["Sales"]).replace([pd.NA, pd.NaT], 0)
-
-    # Ordenar por tiempo si corresponde
-    if isinstance(key_time, pd.Grouper):
-        agg_base = agg_base.sort_values(by=[col_fecha] + por)
-    elif key_time in {"cod_anio", "trimestre", "cod_mes", "cod_dia"}:
-        agg_base = agg_base.sort_values(by=[key_time] + por)
-    elif key_time in {"anio_trimestre", "anio_mes"}:
-        agg_base = agg_base.sort_values(by=[key_time] + por)
-    # para 'nom_mes' / 'nom_dia' mantenemos el orden alfabético
+    agg_base = _kpis_y_orden(agg_base, key_time, por, col_fecha)
 
     print(
         f"Datos agrupados por {por} con nivel '{nivel}'. Total filas: {len(agg_base)}")
     return agg_base
+
+
+def agrupar_ventas_rollup(df, niveles=NIVELES, conjuntos=(["Region", "Category"], ["Region"], ["Category"], []),
+                          col_fecha="Order_Date"):
+    """
+    Varias granularidades y subconjuntos de dimensiones en una sola pasada
+    (grouping sets / rollup).
+
+    El DataFrame completo se agrega una sola vez al grano más fino (día ×
+    todas las dimensiones pedidas), guardando suma y conteo de Discount; cada
+    nivel y subconjunto se obtiene re-agregando esa tabla, mucho más chica.
+    Las métricas son las mismas de agrupar_ventas.
+
+    Parámetros
+    ----------
+    df : pd.DataFrame
+    niveles : iterable[str]
+        Niveles como en agrupar_ventas.
+    conjuntos : iterable[list[str]]
+        Subconjuntos de columnas adicionales ([] = total por tiempo).
+    col_fecha : str
+        Nombre de la columna de fecha.
+
+    Retorna
+    -------
+    dict {(nivel, tuple(por)): pd.DataFrame} con el mismo formato de agrupar_ventas.
+    """
+    for nivel in niveles:
+        _llave_tiempo(nivel, col_fecha)  # valida antes de agregar
+
+    if col_fecha not in df.columns:
+        raise ValueError(
+            f"La columna '{col_fecha}' no existe en el DataFrame.")
+    fechas = df[col_fecha]
+    if not pd.api.types.is_datetime64_any_dtype(fechas):
+        fechas = pd.to_datetime(fechas, errors="coerce")
+
+    conjuntos = [[c for c in (por or []) if c in df.columns] for por in conjuntos]
+    dimensiones = list(dict.fromkeys(c for por in conjuntos for c in por))
+
+    # 1) Grano más fino: una sola pasada sobre el DataFrame completo
+    base = (
+        df[dimensiones + ["Sales", "Quantity", "Profit", "Discount"]]
+          .assign(**{col_fecha: fechas.dt.normalize()})
+          .groupby(dimensiones + [col_fecha], observed=True)
+          .agg(
+              Sales=("Sales", "sum"),
+              Quantity=("Quantity", "sum"),
+              Profit=("Profit", "sum"),
+              Discount_sum=("Discount", "sum"),
+              Discount_count=("Discount", "count"),
+        )
+        .reset_index()
+    )
+    # Columnas de calendario sobre la tabla diaria (no sobre cada fila)
+    base = _asegurar_derive_fecha(base, col_fecha)
+
+    # 2) Niveles y subconjuntos más gruesos a partir de la tabla diaria
+    resultados = {}
+    for nivel in niveles:
+        key_time = _llave_tiempo(nivel, col_fecha)
+        for por in conjuntos:
+            agg_base = (
+                base.groupby(por + [key_time], observed=True)
+                    .agg(
+                        Sales=("Sales", "sum"),
+                        Quantity=("Quantity", "sum"),
+                        Profit=("Profit", "sum"),
+                        Discount_sum=("Discount_sum", "sum"),
+                        Discount_count=("Discount_count", "sum"),
+                )
+                .reset_index()
+            )
+            agg_base.insert(
+                agg_base.columns.get_loc("Discount_sum"), "Discount_mean",
+                agg_base["Discount_sum"] / agg_base["Discount_count"].where(agg_base["Discount_count"] > 0))
+            agg_base = agg_base.drop(columns=["Discount_sum", "Discount_count"])
+            resultados[(nivel, tuple(por))] = _kpis_y_orden(agg_base, key_time, por, col_fecha)
+
+    print(
+        f"Rollup: {len(resultados)} tablas ({len(niveles)} niveles × {len(conjuntos)} conjuntos) "
+        f"desde {len(base)} filas diarias.")
+    return resultados
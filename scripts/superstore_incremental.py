@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scripts.superstore_calendar import VERSION_NOMBRES, corregir_nombres
+from scripts.superstore_saving import guardar_datos_parquet
+from src.data_processing import delta_dir, delta_parts
+from src.data_schema import COLUMN_ORDER, apply_schema
+
+
+# TODO Checkpoint del ETL incremental
+
+def hash_archivo(path, bloque=1 << 20):
+    """
+    Calcula el hash SHA-256 del archivo fuente (leído por bloques).
+    Si no cambió desde la última corrida no hay nada que procesar.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(bloque), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cargar_checkpoint(path):
+    """
+    Lee el checkpoint del ETL (hash de la fuente y marcas de agua).
+    Retorna None si no existe o está dañado (se hará una carga completa).
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_checkpoint(path, checkpoint):
+    """
+    Escribe el checkpoint de forma atómica (archivo temporal + rename), así
+    una corrida interrumpida no deja un checkpoint a medias.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def crear_checkpoint(df_fuente, source_hash, filas, anterior=None):
+    """
+    Nuevo checkpoint a partir de las filas fuente procesadas en esta corrida
+    (con columnas ya renombradas: Row_Id, Order_Date).
+
+    Las marcas de agua nunca retroceden: si la corrida no trajo filas se
+    conservan las del checkpoint anterior.
+    """
+    anterior = anterior or {}
+    max_row_id = anterior.get("max_row_id")
+    max_order_date = anterior.get("max_order_date")
+
+    if "Row_Id" in df_fuente.columns and df_fuente["Row_Id"].notna().any():
+        nuevo = int(df_fuente["Row_Id"].max())
+        max_row_id = nuevo if max_row_id is None else max(max_row_id, nuevo)
+
+    fechas = pd.to_datetime(df_fuente["Order_Date"], errors="coerce")
+    if fechas.notna().any():
+        nuevo = fechas.max().strftime("%Y-%m-%d")
+        max_order_date = nuevo if max_order_date is None else max(max_order_date, nuevo)
+
+    return {
+        "source_hash": source_hash,
+        "max_row_id": max_row_id,
+        "max_order_date": max_order_date,
+        "rows": int(filas),
+        "nombres_calendario": VERSION_NOMBRES,
+        "processed_at": datetime.now().isoformat(timespec="seconds")
+    }
+
+
+def filtrar_nuevos(df, checkpoint):
+    """
+    Filas de la fuente posteriores a las marcas de agua del checkpoint.
+
+    Se usa Row_Id cuando existe (identificador creciente del dataset); si no,
+    la fecha de orden. Se asume que la fuente solo crece: filas ya procesadas
+    que cambien exigen una carga completa (--full).
+    """
+    if checkpoint.get("max_row_id") is not None and "Row_Id" in df.columns:
+        return df[df["Row_Id"] > checkpoint["max_row_id"]]
+
+    fechas = pd.to_datetime(df["Order_Date"], errors="coerce")
+    return df[fechas > pd.Timestamp(checkpoint["max_order_date"])]
+
+
+# TODO Fusión ordenada del delta con el almacén procesado (compactación)
+
+def fusionar_ordenado(df_existente, df_delta, columna_fecha="Order_Date"):
+    """
+    Inserta el delta en el DataFrame existente (ya ordenado por fecha) sin
+    reordenar todo: solo se ordena el delta y cada fila se ubica con una
+    búsqueda binaria (searchsorted). Las filas nuevas quedan después de las
+    existentes con la misma fecha, igual que un ordenamiento estable.
+    """
+    delta = df_delta.sort_values(columna_fecha, kind="mergesort")
+    fechas_existentes = df_existente[columna_fecha].to_numpy()
+    posiciones = np.searchsorted(
+        fechas_existentes, delta[columna_fecha].to_numpy(), side="right")
+
+    n = len(df_existente)
+    orden = np.insert(np.arange(n), posiciones, n + np.arange(len(delta)))
+    combinado = pd.concat([df_existente, delta], ignore_index=True)
+    return combinado.take(orden).reset_index(drop=True)
+
+
+# TODO Almacén Parquet: base + partes del delta
+
+# Con más partes que esto, la corrida incremental compacta el almacén
+MAX_PARTES_DELTA = 24
+
+
+def marca_checkpoint(checkpoint):
+    """
+    Marca de agua del checkpoint como texto ordenable (Row_Id con ceros a la
+    izquierda o fecha ISO). Nombra la parte que escribe la corrida.
+    """
+    if checkpoint.get("max_row_id") is not None:
+        return f"{int(checkpoint['max_row_id']):010d}"
+    return str(checkpoint.get("max_order_date"))
+
+
+def _marca_parte(path):
+    """part-<marca>-<sello>.parquet -> marca."""
+    nombre = os.path.basename(path)[len("part-"):-len(".parquet")]
+    return nombre.rsplit("-", 1)[0]
+
+
+def escribir_parte(delta, parquet_path, marca):
+    """
+    Escribe el delta como una parte nueva junto al Parquet base, sin leer ni
+    reescribir lo existente (costo proporcional al delta).
+
+    Una parte con marca >= `marca` la dejó una corrida cuyo checkpoint no
+    llegó a guardarse: sus filas vienen otra vez en este delta, así que se
+    reemplaza (no se duplican filas).
+    """
+    directorio = delta_dir(parquet_path)
+    os.makedirs(directorio, exist_ok=True)
+    for parte in delta_parts(parquet_path):
+        if _marca_parte(parte) >= marca:
+            os.remove(parte)
+            print(f"Se descarta la parte de una corrida sin checkpoint: {parte}")
+
+    sello = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(directorio, f"part-{marca}-{sello}.parquet")
+    tmp_path = path + ".tmp"
+    delta.to_parquet(tmp_path, index=False, engine="pyarrow")
+    os.replace(tmp_path, path)
+    return path
+
+
+def compactar_almacen(csv_path, parquet_path, columna_fecha="Order_Date", forzar=False):
+    """
+    Incorpora las partes del delta al Parquet base (ordenado por fecha) y
+    reescribe el CSV en orden. Es la única operación que recorre todo el
+    almacén; se hace cada MAX_PARTES_DELTA corridas, con --compactar o
+    (`forzar`) para migrar los nombres de mes/día legados.
+    """
+    try:
+        partes = delta_parts(parquet_path)
+        if not partes and not forzar:
+            print("No hay partes del delta que compactar.")
+            return True
+        base = pd.read_parquet(parquet_path, engine="pyarrow")
+        if not base[columna_fecha].is_monotonic_increasing:
+            base = base.sort_values(columna_fecha, kind="mergesort").reset_index(drop=True)
+        if partes:
+            delta = pd.concat([pd.read_parquet(p, engine="pyarrow") for p in partes],
+                              ignore_index=True)
+            base = fusionar_ordenado(base, delta, columna_fecha)
+        for columna in ("Nom_Mes", "Nom_Dia"):
+            if columna in base.columns:
+                base[columna] = corregir_nombres(base[columna])
+        combinado = apply_schema(base)
+
+        # guardar_datos_parquet registra las partes como incorporadas y las borra
+        combinado.to_csv(csv_path, index=False)
+        if not guardar_datos_parquet(combinado, parquet_path):
+            return False
+        print(f"Almacén compactado: {len(partes)} partes, {len(combinado)} filas")
+        return True
+
+    except Exception as e:
+        print(f"Error al compactar el almacén procesado: {e}")
+        return False
+
+
+def actualizar_almacen(df_delta, csv_path, parquet_path, marca, columna_fecha="Order_Date"):
+    """
+    Agrega el delta (ya transformado) al almacén procesado sin releer ni
+    reescribir el histórico:
+
+    - Parquet: el delta se escribe como una parte nueva (ver escribir_parte);
+      load_data lee base + partes.
+    - CSV: el delta se agrega al final (ordenado por fecha). Es la copia
+      legible: si trae fechas anteriores a las guardadas (o se repite una
+      corrida sin checkpoint) queda desordenado o con filas repetidas hasta
+      la próxima compactación, que lo reescribe desde el Parquet.
+
+    Cuando se acumulan más de MAX_PARTES_DELTA partes se compacta.
+    Retorna True si se actualizó correctamente.
+    """
+    try:
+        columnas = [c for c in COLUMN_ORDER if c in df_delta.columns]
+        delta = apply_schema(df_delta[columnas].copy())
+        delta = delta.sort_values(columna_fecha, kind="mergesort")
+
+        path = escribir_parte(delta, parquet_path, marca)
+        print(f"Parquet: {len(delta)} filas nuevas en {path}")
+        df_delta[columnas].sort_values(columna_fecha, kind="mergesort").to_csv(
+            csv_path, mode="a", header=False, index=False)
+        print(f"Se agregaron {len(delta)} filas al final de {csv_path}")
+
+        if len(delta_parts(parquet_path)) > MAX_PARTES_DELTA:
+            return compactar_almacen(csv_path, parquet_path, columna_fecha)
+        return True
+
+    except Exception as e:
+        print(f"Error al actualizar el almacén procesado: {e}")
+        return False
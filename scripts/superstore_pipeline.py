@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.superstore_clean import (
+    agregar_columnas_fecha,
+    ordenar_y_formatear_fecha,
+    renombrar_columnas
+)
+from scripts.superstore_preparation import preparar_datos_para_analisis
+from src.data_processing import COMPACTED_PARTS_KEY, delta_parts
+from src.data_schema import CATEGORICAL_COLUMNS, COLUMN_ORDER, apply_schema
+
+
+# TODO Lectura de la fuente por bloques
+
+def leer_por_bloques(path, chunksize=100_000, columnas_fecha=None):
+    """
+    Generador de bloques de la fuente (DataFrames de hasta `chunksize` filas).
+
+    CSV y Parquet se leen por partes sin cargar el archivo completo. Los
+    libros de Excel no se pueden leer parcialmente: se cargan una vez y se
+    entregan en bloques. En CSV, `columnas_fecha` se parsean al leer (ISO),
+    igual que llegan ya como fecha desde Excel.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunksize, parse_dates=columnas_fecha or False)
+    elif ext == ".parquet":
+        archivo = pq.ParquetFile(path)
+        for batch in archivo.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif ext in (".xls", ".xlsx"):
+        df = pd.read_excel(path)
+        for inicio in range(0, len(df), chunksize):
+            yield df.iloc[inicio:inicio + chunksize].reset_index(drop=True)
+    else:
+        raise ValueError(f"Formato de fuente no soportado: {ext}")
+
+
+def con_marcas(bloques, marcas, columnas):
+    """
+    Deja pasar los bloques de la fuente y guarda en `marcas` el máximo de
+    Row ID y Order Date de cada uno (columnas ya renombradas), para el
+    checkpoint del ETL incremental (ver crear_checkpoint).
+    """
+    for df in bloques:
+        presentes = [c for c in ("Row ID", "Order Date") if c in df.columns]
+        if presentes and len(df):
+            fuente = df[presentes].rename(columns=columnas)
+            fuente["Order_Date"] = pd.to_datetime(fuente["Order_Date"], errors="coerce")
+            marcas.append(fuente.max().to_frame().T)
+        yield df
+
+
+# TODO Etapas componibles
+
+class Etapa:
+    """
+    Una etapa del pipeline: función DataFrame -> DataFrame aplicada a cada
+    bloque. Acumula filas procesadas, tiempo y memoria pico del bloque.
+    """
+
+    def __init__(self, nombre, fn):
+        self.nombre = nombre
+        self.fn = fn
+        self.filas = 0
+        self.segundos = 0.0
+        self.pico_bytes = 0
+
+    def __call__(self, df, medir_memoria=False):
+        if medir_memoria:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        filas = len(df)
+
+        df = self.fn(df)
+
+        self.segundos += time.perf_counter() - inicio
+        self.filas += filas
+        if medir_memoria:
+            # Memoria adicional que necesitó la etapa sobre lo ya reservado
+            self.pico_bytes = max(self.pico_bytes, tracemalloc.get_traced_memory()[1] - base)
+        return df
+
+    def reporte(self):
+        return {
+            "etapa": self.nombre,
+            "filas": self.filas,
+            "segundos": round(self.segundos, 4),
+            "filas_por_segundo": round(self.filas / self.segundos, 1) if self.segundos > 0 else None,
+            "pico_mb": round(self.pico_bytes / 2**20, 2)
+        }
+
+
+def etapas_superstore(columnas):
+    """
+    Etapas de limpieza del proyecto sin copias completas entre ellas y con
+    la fecha como datetime de principio a fin (sin pasar por texto).
+    El orden por fecha es dentro de cada bloque; SalidaBloques deja el
+    resultado ordenado en total (ver cerrar).
+    """
+    return [
+        Etapa("renombrar_columnas",
+              lambda df: renombrar_columnas(df, columnas, copy=False)),
+        Etapa("ordenar_fecha",
+              lambda df: ordenar_y_formatear_fecha(df, "Order_Date", formatear=False, copy=False)),
+        Etapa("agregar_columnas_fecha",
+              lambda df: agregar_columnas_fecha(df, "Order_Date", copy=False)),
+        Etapa("preparar_datos",
+              preparar_datos_para_analisis),
+        Etapa("aplicar_esquema",
+              lambda df: apply_schema(df[[c for c in COLUMN_ORDER if c in df.columns]])),
+    ]
+
+
+# TODO Escritura incremental del resultado
+
+class SalidaBloques:
+    """
+    Escribe cada bloque procesado al CSV (append) y a un Parquet abierto con
+    ParquetWriter, así nunca se junta el dataset completo en memoria.
+    Las categorías se escriben como texto para que todos los bloques
+    compartan el mismo esquema; apply_schema las restaura al leer.
+
+    Se escribe en archivos temporales que reemplazan a los finales en
+    cerrar(), así el API nunca lee un resultado a medias. El Parquet
+    reemplaza todo el almacén: las partes del delta incremental que hubiera
+    quedan registradas como incorporadas y se borran (ver
+    guardar_datos_parquet).
+    """
+
+    def __init__(self, csv_path=None, parquet_path=None, columna_fecha="Order_Date"):
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.columna_fecha = columna_fecha
+        self.ordenado = True        # cada bloque empieza después del anterior
+        self._ultima_fecha = None
+        self._writer = None
+        self._header = True
+        self._partes = delta_parts(parquet_path, include_compacted=True) if parquet_path else []
+        for path in (csv_path, parquet_path):
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def escribir(self, df):
+        fechas = df[self.columna_fecha].dropna() if self.columna_fecha in df.columns else None
+        if fechas is not None and len(fechas):
+            if self._ultima_fecha is not None and fechas.min() < self._ultima_fecha:
+                self.ordenado = False
+            self._ultima_fecha = max(fechas.max(), self._ultima_fecha or fechas.max())
+        if self.csv_path:
+            df.to_csv(self.csv_path + ".tmp", mode="w" if self._header else "a",
+                      header=self._header, index=False)
+            self._header = False
+        if self.parquet_path:
+            plano = df.astype({c: "string" for c in CATEGORICAL_COLUMNS if c in df.columns})
+            tabla = pa.Table.from_pandas(plano, preserve_index=False)
+            if self._writer is None:
+                schema = tabla.schema.with_metadata({
+                    **(tabla.schema.metadata or {}),
+                    COMPACTED_PARTS_KEY: json.dumps([os.path.basename(p) for p in self._partes])})
+                self._writer = pq.ParquetWriter(self.parquet_path + ".tmp", schema)
+            self._writer.write_table(tabla.cast(self._writer.schema))
+
+    def _ordenar(self, bloque=100_000):
+        """
+        Pasada final cuando los bloques no llegaron en orden de fecha: ordena
+        el Parquet temporal (tabla Arrow, orden estable) y reescribe el CSV
+        desde él por lotes.
+        """
+        if self.parquet_path:
+            tabla = pq.read_table(self.parquet_path + ".tmp")
+        else:
+            tabla = pa.Table.from_pandas(
+                pd.read_csv(self.csv_path + ".tmp", parse_dates=[self.columna_fecha]),
+                preserve_index=False)
+        tabla = tabla.sort_by(self.columna_fecha)
+        if self.parquet_path:
+            pq.write_table(tabla, self.parquet_path + ".tmp")
+        if self.csv_path:
+            header = True
+            for lote in tabla.to_batches(max_chunksize=bloque):
+                lote.to_pandas().to_csv(self.csv_path + ".tmp", mode="w" if header else "a",
+                                        header=header, index=False)
+                header = False
+
+    def cerrar(self, publicar=True):
+        """
+        Cierra el Parquet y, con `publicar`, ordena si hace falta y reemplaza
+        los archivos finales. Sin `publicar` (la corrida falló) se descartan
+        los temporales y el almacén anterior queda intacto.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        escritos = [p + ".tmp" for p in (self.csv_path, self.parquet_path)
+                    if p and os.path.exists(p + ".tmp")]
+        if not publicar:
+            for tmp_path in escritos:
+                os.remove(tmp_path)
+            return
+        if escritos and not self.ordenado:
+            self._ordenar()
+        for tmp_path in escritos:
+            os.replace(tmp_path, tmp_path[:-len(".tmp")])
+        if self.parquet_path and escritos:
+            for parte in self._partes:
+                os.remove(parte)
+
+
+def ejecutar_pipeline(bloques, etapas, salida=None, medir_memoria=True):
+    """
+    Pasa cada bloque por las etapas en orden y lo escribe en `salida`.
+
+    Retorna dict con filas totales, segundos, filas/s y el reporte por etapa
+    (filas, segundos, filas/s, memoria pico en MB).
+    """
+    iniciado_aqui = medir_memoria and not tracemalloc.is_tracing()
+    if iniciado_aqui:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    filas = 0
+    n_bloques = 0
+    completo = False
+    try:
+        for df in bloques:
+            for etapa in etapas:
+                df = etapa(df, medir_memoria)
+            if salida is not None:
+                salida.escribir(df)
+            filas += len(df)
+            n_bloques += 1
+        pico_total = tracemalloc.get_traced_memory()[1] if medir_memoria else 0
+        completo = True
+    finally:
+        if salida is not None:
+            salida.cerrar(publicar=completo)
+        if iniciado_aqui:
+            tracemalloc.stop()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "bloques": n_bloques,
+        "filas": filas,
+        "segundos": round(segundos, 4),
+        "filas_por_segundo": round(filas / segundos, 1) if segundos > 0 else None,
+        "pico_mb": round(pico_total / 2**20, 2),
+        "etapas": [etapa.reporte() for etapa in etapas]
+    }
+
+
+def imprimir_reporte(reporte):
+    """Tabla de rendimiento por etapa."""
+    print(f"\n{'Etapa':<24}{'Filas':>12}{'Seg':>10}{'Filas/s':>14}{'Pico MB':>10}")
+    for r in reporte["etapas"]:
+        fps = r["filas_por_segundo"] or 0
+        print(f"{r['etapa']:<24}{r['filas']:>12}{r['segundos']:>10.3f}{fps:>14.0f}{r['pico_mb']:>10.2f}")
+    print(f"Total: {reporte['filas']} filas en {reporte['bloques']} bloques, "
+          f"{reporte['segundos']:.3f} s, pico {reporte['pico_mb']:.2f} MB")
+
+
+if __name__ == "__main__":
+    from main import CHECKPOINT_PATH, OUTPUT_PATH, PARQUET_OUTPUT_PATH, columnas_actuales
+    from scripts.data_loader import DATA_PATH
+    from scripts.superstore_incremental import crear_checkpoint, guardar_checkpoint, hash_archivo
+
+    parser = argparse.ArgumentParser(description="Pipeline de limpieza por bloques.")
+    parser.add_argument("--source", default=DATA_PATH, help="CSV, Parquet o Excel de origen.")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--csv", default=OUTPUT_PATH)
+    parser.add_argument("--parquet", default=PARQUET_OUTPUT_PATH)
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="No medir memoria (tracemalloc agrega sobrecosto).")
+    args = parser.parse_args()
+
+    marcas = []
+    reporte = ejecutar_pipeline(
+        con_marcas(leer_por_bloques(args.source, args.chunksize, columnas_fecha=["Order Date"]),
+                   marcas, columnas_actuales),
+        etapas_superstore(columnas_actuales),
+        SalidaBloques(args.csv, args.parquet),
+        medir_memoria=not args.sin_memoria
+    )
+    imprimir_reporte(reporte)
+
+    # Si se reemplazó el almacén de main.py, su checkpoint debe describirlo:
+    # si no, la siguiente corrida incremental volvería a agregar estas filas
+    if os.path.abspath(args.csv) == OUTPUT_PATH or os.path.abspath(args.parquet) == PARQUET_OUTPUT_PATH:
+        if os.path.abspath(args.source) == os.path.abspath(DATA_PATH):
+            fuente = pd.concat(marcas, ignore_index=True) if marcas else pd.DataFrame(
+                {"Order_Date": pd.Series(dtype="datetime64[ns]")})
+            guardar_checkpoint(CHECKPOINT_PATH, crear_checkpoint(
+                fuente, hash_archivo(args.source), reporte["filas"]))
+            print(f"Checkpoint actualizado: {CHECKPOINT_PATH}")
+        elif os.path.exists(CHECKPOINT_PATH):
+            # El almacén ya no sale de la fuente de main.py: la próxima corrida será completa
+            os.remove(CHECKPOINT_PATH)
+            print(f"Checkpoint eliminado (otra fuente): {CHECKPOINT_PATH}")
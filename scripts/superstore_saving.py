@@ -1,6 +1,10 @@
+import json
 import pandas as pd
 import os
 
+from src.data_processing import COMPACTED_PARTS_KEY, delta_parts
+from src.data_schema import COLUMN_ORDER, apply_schema
+
 
 def guardar_datos_limpios(df, path):
     """
@@ -23,3 +27,43 @@ def guardar_datos_limpios(df, path):
         print(f"Error al guardar los datos: {e}")
 
         return False
+
+
+def guardar_datos_parquet(df, path):
+    """
+    guardar el df final en formato Parquet con el esquema fijo del proyecto
+    (categorías, fechas datetime64, montos float64)
+
+    El df reemplaza todo el almacén: las partes del delta incremental que
+    existían quedan registradas en la metadata como incorporadas (el API las
+    ignora) y después se borran. La escritura es atómica (temporal + rename).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        print("Se está guardando el archivo Parquet...")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        columnas = [c for c in COLUMN_ORDER if c in df.columns]
+        df_tipado = apply_schema(df[columnas].copy())
+        partes = delta_parts(path, include_compacted=True)
+        tabla = pa.Table.from_pandas(df_tipado, preserve_index=False)
+        metadata = {**(tabla.schema.metadata or {}),
+                    COMPACTED_PARTS_KEY: json.dumps([os.path.basename(p) for p in partes])}
+        tmp_path = path + ".tmp"
+        pq.write_table(tabla.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, path)
+        for parte in partes:
+            os.remove(parte)
+
+        print("\nArchivo Parquet guardado en:")
+        print(f"{path}")
+
+        return True
+
+    except Exception as e:
+        print(f"Error al guardar el Parquet: {e}")
+
+        return False
@@ -0,0 +1,165 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts.superstore_calendar import derivar_calendario
+from scripts.superstore_pipeline import SalidaBloques
+from src.data_schema import COLUMN_ORDER, apply_schema
+
+# Nombres reales del dataset; si se piden más se agregan sintéticos
+CATEGORIAS_BASE = {
+    "Furniture": ["Bookcases", "Chairs", "Furnishings", "Tables"],
+    "Office Supplies": ["Appliances", "Art", "Binders", "Envelopes", "Fasteners",
+                        "Labels", "Paper", "Storage", "Supplies"],
+    "Technology": ["Accessories", "Copiers", "Machines", "Phones"],
+}
+REGIONES_BASE = ["Central", "East", "South", "West"]
+
+# Perfil estacional mensual (ene..dic) parecido al de Superstore: fin de año alto
+ESTACIONALIDAD = np.array([0.55, 0.45, 0.85, 0.80, 0.85, 0.85,
+                           0.85, 0.85, 1.55, 0.95, 1.60, 1.65])
+# Peso por día de la semana (lunes..domingo)
+PESO_DIA = np.array([1.05, 1.0, 1.0, 1.0, 1.05, 0.95, 0.9])
+DESCUENTOS = np.array([0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 0.8])
+PROB_DESCUENTO = np.array([0.48, 0.05, 0.37, 0.02, 0.03, 0.01, 0.02, 0.02])
+
+
+def _estructura(n_categorias, subcategorias, n_regiones, estados, ciudades, rng):
+    """
+    Jerarquías de producto (categoría -> subcategorías) y geografía
+    (región -> estados -> ciudades) con pesos y precios por subcategoría.
+    """
+    categorias = list(CATEGORIAS_BASE)[:n_categorias]
+    categorias += [f"Category {i + 1}" for i in range(len(categorias), n_categorias)]
+    productos = []  # (categoría, subcategoría, precio_base, margen)
+    for c in categorias:
+        subs = CATEGORIAS_BASE.get(c, [])[:subcategorias]
+        subs += [f"{c} Sub {j + 1}" for j in range(len(subs), subcategorias)]
+        for s in subs:
+            productos.append((c, s, float(rng.lognormal(3.5, 1.0)), float(rng.uniform(0.05, 0.35))))
+
+    regiones = REGIONES_BASE[:n_regiones]
+    regiones += [f"Region {i + 1}" for i in range(len(regiones), n_regiones)]
+    lugares = []  # (región, estado, ciudad)
+    for r in regiones:
+        for e in range(estados):
+            for k in range(ciudades):
+                lugares.append((r, f"{r} State {e + 1}", f"{r} City {e + 1}-{k + 1}"))
+
+    peso_prod = rng.dirichlet(np.full(len(productos), 2.0))
+    peso_lugar = rng.dirichlet(np.full(len(lugares), 1.0))
+    return productos, peso_prod, lugares, peso_lugar
+
+
+def _prob_diaria(inicio, dias, crecimiento):
+    """Probabilidad de que una orden caiga en cada día (tendencia × estación × día)."""
+    fechas = pd.date_range(inicio, periods=dias, freq="D")
+    anios = (fechas - fechas[0]).days.to_numpy() / 365.25
+    peso = (ESTACIONALIDAD[fechas.month - 1] * PESO_DIA[fechas.dayofweek]
+            * (1 + crecimiento) ** anios)
+    return fechas, peso / peso.sum()
+
+
+def generar_sintetico(filas, anios=4, inicio="2014-01-01", n_categorias=3, subcategorias=4,
+                      n_regiones=4, estados=10, ciudades=5, crecimiento=0.15,
+                      chunksize=500_000, seed=42):
+    """
+    Generador de bloques con el mismo esquema que preparar_datos_para_analisis
+    (COLUMN_ORDER), ordenados por fecha.
+
+    Las órdenes por día se reparten de una vez (multinomial sobre los días con
+    tendencia y estacionalidad); luego se recorren los días en orden y se
+    emiten bloques de hasta `chunksize` filas, así el dataset completo nunca
+    está en memoria.
+    """
+    rng = np.random.default_rng(seed)
+    productos, peso_prod, lugares, peso_lugar = _estructura(
+        n_categorias, subcategorias, n_regiones, estados, ciudades, rng)
+    fechas, prob = _prob_diaria(pd.Timestamp(inicio), int(round(anios * 365.25)), crecimiento)
+    # Fila i pertenece al día d si acumulado[d-1] <= i < acumulado[d]
+    acumulado = np.cumsum(rng.multinomial(filas, prob))
+
+    cat_prod = np.array([p[0] for p in productos], dtype=object)
+    sub_prod = np.array([p[1] for p in productos], dtype=object)
+    precio_prod = np.array([p[2] for p in productos])
+    margen_prod = np.array([p[3] for p in productos])
+    reg_lugar = np.array([l[0] for l in lugares], dtype=object)
+    est_lugar = np.array([l[1] for l in lugares], dtype=object)
+    ciu_lugar = np.array([l[2] for l in lugares], dtype=object)
+
+    for inicio_bloque in range(0, filas, chunksize):
+        filas_bloque = np.arange(inicio_bloque, min(inicio_bloque + chunksize, filas))
+        dias = np.searchsorted(acumulado, filas_bloque, side="right")
+        n = len(dias)
+        prod = rng.choice(len(productos), n, p=peso_prod)
+        lugar = rng.choice(len(lugares), n, p=peso_lugar)
+        cantidad = 1 + rng.poisson(2.8, n)
+        descuento = rng.choice(DESCUENTOS, n, p=PROB_DESCUENTO)
+        precio = precio_prod[prod] * rng.lognormal(0.0, 0.35, n)
+        ventas = precio * cantidad * (1 - descuento)
+        ganancia = ventas * (margen_prod[prod] - 1.2 * descuento + rng.normal(0, 0.05, n))
+
+        fecha = pd.Series(fechas[dias])
+        calendario = derivar_calendario(fecha)
+        bloque = pd.DataFrame({
+            "Order_Date": fecha,
+            "Cod_Anio": calendario["anio"],
+            "Cod_Mes": calendario["mes"],
+            "Cod_Dia": calendario["dia"],
+            "Nom_Mes": calendario["nom_mes"],
+            "Nom_Dia": calendario["nom_dia"],
+            "Category": cat_prod[prod],
+            "Sub_Category": sub_prod[prod],
+            "Region": reg_lugar[lugar],
+            "State": est_lugar[lugar],
+            "City": ciu_lugar[lugar],
+            "Sales": ventas.round(4),
+            "Profit": ganancia.round(4),
+            "Quantity": cantidad,
+            "Discount": descuento,
+        })
+        yield apply_schema(bloque[COLUMN_ORDER])
+
+
+def escribir_sintetico(csv_path=None, parquet_path=None, **kwargs):
+    """Genera el dataset y lo escribe por bloques (CSV y/o Parquet). Retorna filas escritas."""
+    salida = SalidaBloques(csv_path, parquet_path)
+    filas = 0
+    completo = False
+    try:
+        for bloque in generar_sintetico(**kwargs):
+            salida.escribir(bloque)
+            filas += len(bloque)
+            print(f"  {filas} filas escritas ...")
+        completo = True
+    finally:
+        salida.cerrar(publicar=completo)
+    return filas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos Superstore.")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--anios", type=float, default=4)
+    parser.add_argument("--inicio", default="2014-01-01")
+    parser.add_argument("--categorias", type=int, default=3)
+    parser.add_argument("--subcategorias", type=int, default=4)
+    parser.add_argument("--regiones", type=int, default=4)
+    parser.add_argument("--estados", type=int, default=10, help="Estados por región.")
+    parser.add_argument("--ciudades", type=int, default=5, help="Ciudades por estado.")
+    parser.add_argument("--crecimiento", type=float, default=0.15, help="Crecimiento anual de ventas.")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", help="Ruta del CSV de salida.")
+    parser.add_argument("--parquet", help="Ruta del Parquet de salida.")
+    args = parser.parse_args()
+    if not args.csv and not args.parquet:
+        parser.error("Indica --csv y/o --parquet.")
+
+    total = escribir_sintetico(
+        args.csv, args.parquet, filas=args.filas, anios=args.anios, inicio=args.inicio,
+        n_categorias=args.categorias, subcategorias=args.subcategorias,
+        n_regiones=args.regiones, estados=args.estados, ciudades=args.ciudades,
+        crecimiento=args.crecimiento, chunksize=args.chunksize, seed=args.seed)
+    print(f"Dataset sintético: {total} filas.")
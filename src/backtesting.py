@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Periodo estacional usado para escalar MASE (naive estacional mensual)
+SEASONAL_PERIOD = 12
+
+
+def rolling_origin_splits(n, horizon=12, folds=1, step=None, window="expanding", min_train=24):
+    """
+    Cortes de validación cruzada con origen móvil sobre una serie de largo n.
+
+    El último pliegue prueba con los últimos `horizon` puntos y cada pliegue
+    anterior retrocede `step` puntos (por defecto `horizon`).
+    window="expanding" entrena desde el inicio; "rolling" usa una ventana de
+    largo fijo igual al entrenamiento del primer pliegue.
+    Retorna lista de (inicio_train, origen, fin_test).
+    """
+    if window not in ("expanding", "rolling"):
+        raise ValueError("window debe ser 'expanding' o 'rolling'.")
+    step = step or horizon
+    first_origin = n - horizon - (folds - 1) * step
+    if folds < 1 or first_origin < min_train:
+        raise ValueError(
+            f"Datos insuficientes: {folds} pliegue(s) de {horizon} con paso {step} "
+            f"requieren ≥ {min_train + horizon + (folds - 1) * step} puntos y hay {n}.")
+
+    splits = []
+    for k in range(folds):
+        origin = first_origin + k * step
+        start = 0 if window == "expanding" else origin - first_origin
+        splits.append((start, origin, origin + horizon))
+    return splits
+
+
+def _seasonal_naive_scale(train, m=SEASONAL_PERIOD):
+    """MAE dentro de muestra del naive estacional (denominador de MASE)."""
+    if len(train) <= m:
+        m = 1
+    if len(train) <= m:
+        return np.nan
+    scale = np.mean(np.abs(train[m:] - train[:-m]))
+    return scale if scale > 0 else np.nan
+
+
+def forecast_metrics(actual, predicted, scale=None):
+    """
+    Métricas vectorizadas sobre todos los pliegues y horizontes a la vez.
+
+    actual, predicted: arreglos (pliegues, horizonte).
+    scale: arreglo (pliegues,) con el denominador de MASE de cada pliegue.
+    Retorna (global, por_pliegue): dicts con mape, smape, rmse, mae, mase.
+    MAPE ignora los valores reales en cero; sMAPE está en [0, 200].
+    """
+    actual = np.atleast_2d(np.asarray(actual, dtype=float))
+    predicted = np.atleast_2d(np.asarray(predicted, dtype=float))
+    err = actual - predicted
+    abs_err = np.abs(err)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(actual != 0, abs_err / np.abs(actual), np.nan)
+        denom = np.abs(actual) + np.abs(predicted)
+        sape = np.where(denom > 0, 2 * abs_err / denom, 0.0)
+        if scale is None:
+            scaled = np.full_like(abs_err, np.nan)
+        else:
+            scaled = abs_err / np.asarray(scale, dtype=float)[:, None]
+
+    def _nanmean(a, axis=None):
+        # Evita el RuntimeWarning de nanmean cuando todo es NaN
+        counts = np.sum(~np.isnan(a), axis=axis)
+        sums = np.nansum(a, axis=axis)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    per_fold = {
+        "mape": _nanmean(ape, axis=1) * 100,
+        "smape": sape.mean(axis=1) * 100,
+        "rmse": np.sqrt(np.mean(err**2, axis=1)),
+        "mae": abs_err.mean(axis=1),
+        "mase": _nanmean(scaled, axis=1)
+    }
+    overall = {
+        "mape": float(_nanmean(ape) * 100),
+        "smape": float(sape.mean() * 100),
+        "rmse": float(np.sqrt(np.mean(err**2))),
+        "mae": float(abs_err.mean()),
+        "mase": float(_nanmean(scaled))
+    }
+    return overall, per_fold
+
+
+def _finite_or_none(x):
+    """NaN/inf -> None para que el resultado sea JSON válido."""
+    return float(x) if np.isfinite(x) else None
+
+
+def cross_validate(ts_history, fit_predict, horizon=12, folds=1, step=None,
+                   window="expanding", min_train=24, n_jobs=None, season=SEASONAL_PERIOD):
+    """
+    Backtest con origen móvil. `fit_predict(train, horizon)` debe devolver un
+    arreglo con `horizon` predicciones. Con n_jobs > 1 los pliegues se
+    ejecutan en hilos: solo acelera ajustes que liberan el GIL (XGBoost). El
+    ajuste de SARIMAX es en su mayor parte código Python que retiene el GIL,
+    por eso los backtests SARIMA pasan n_jobs=1 (el paralelismo entre
+    segmentos lo da el pool de procesos del API).
+    `season` es el periodo del naive estacional que escala MASE (12 en
+    series mensuales, 52 semanales, 7 diarias).
+
+    Retorna dict con status, métricas globales (mape, smape, rmse, mae, mase)
+    y el detalle por pliegue.
+    """
+    values = np.asarray(ts_history, dtype=float)
+    try:
+        splits = rolling_origin_splits(
+            len(values), horizon, folds, step, window, min_train)
+    except ValueError as e:
+        return {"status": "Error", "message": str(e)}
+
+    def _run(split):
+        start, origin, end = split
+        pred = np.asarray(fit_predict(ts_history[start:origin], horizon), dtype=float)
+        return pred[:horizon]
+
+    n_jobs = n_jobs or min(len(splits), os.cpu_count() or 1)
+    if n_jobs > 1 and len(splits) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            predictions = list(pool.map(_run, splits))
+    else:
+        predictions = [_run(split) for split in splits]
+
+    actual = np.stack([values[origin:end] for _, origin, end in splits])
+    scale = np.array([_seasonal_naive_scale(values[start:origin], season)
+                      for start, origin, _ in splits])
+    overall, per_fold = forecast_metrics(actual, np.stack(predictions), scale)
+
+    fold_details = [
+        {
+            "train_start": int(start), "origin": int(origin), "test_end": int(end),
+            **{name: _finite_or_none(per_fold[name][k]) for name in per_fold}
+        }
+        for k, (start, origin, end) in enumerate(splits)
+    ]
+    return {
+        "status": "Success",
+        "test_period_months": horizon,
+        "folds": len(splits),
+        **{name: _finite_or_none(value) for name, value in overall.items()},
+        "fold_metrics": fold_details
+    }
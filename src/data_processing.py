@@ -1,24 +1,92 @@
+import json
 import os
 import pandas as pd
 
+from src.data_schema import apply_schema
+from src.frequency import bin_series, day_ordinals
+from src.metrics import span
+from src.row_index import RowIndex
+from src.sales_cube import build_sales_cube
+
 # --- Rutas ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, '..'))
 # FILE_PATH = os.path.join(PROJECT_ROOT, 'data', 'US Superstore data.xls')
 FILE_PATH = os.path.join(PROJECT_ROOT, 'data',
                          'processed', 'superstore_clean.csv')
+# Artefacto columnar que genera main.py; se prefiere sobre el CSV
+PARQUET_PATH = os.path.join(PROJECT_ROOT, 'data',
+                            'processed', 'superstore_clean.parquet')
+
+
+# Llave de la metadata del Parquet base con las partes del delta que ya incluye
+COMPACTED_PARTS_KEY = b"compacted_parts"
+
+
+def delta_dir(parquet_path):
+    """
+    Carpeta de las partes que agrega el ETL incremental junto al Parquet
+    base (superstore_clean.parquet -> superstore_clean_delta/).
+    """
+    return os.path.splitext(parquet_path)[0] + "_delta"
+
+
+def compacted_parts(parquet_path):
+    """Nombres de las partes ya incorporadas al Parquet base (metadata del esquema)."""
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(parquet_path):
+        return []
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    return json.loads(metadata.get(COMPACTED_PARTS_KEY, b"[]"))
+
+
+def delta_parts(parquet_path, include_compacted=False):
+    """
+    Rutas de las partes del delta vigentes, en orden. Se omiten las que el
+    base ya incluye (salvo con `include_compacted`): una compactación
+    interrumpida antes de borrarlas no duplica filas.
+    """
+    directory = delta_dir(parquet_path)
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".parquet"))
+    except FileNotFoundError:
+        return []
+    if not names or include_compacted:
+        return [os.path.join(directory, n) for n in names]
+    folded = set(compacted_parts(parquet_path))
+    return [os.path.join(directory, n) for n in names if n not in folded]
+
+
+def read_parquet_store(parquet_path):
+    """Parquet base + partes del delta en un solo DataFrame (sin tipar ni ordenar)."""
+    frames = [pd.read_parquet(parquet_path)]
+    frames += [pd.read_parquet(path) for path in delta_parts(parquet_path)]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def _read_processed():
+    """Lee el Parquet (base + delta) si existe y es legible; si no, el CSV."""
+    if os.path.exists(PARQUET_PATH):
+        try:
+            return read_parquet_store(PARQUET_PATH)
+        except Exception as e:
+            print(f"[WARN] No se pudo leer {PARQUET_PATH} ({e}); se usa el CSV.")
+    return pd.read_csv(FILE_PATH)
 
 
 def load_data():
     """Carga y preprocesa el dataset."""
     try:
         # df = pd.read_excel(FILE_PATH)
-        df = pd.read_csv(FILE_PATH)
-        df = df.copy()
-        # Normaliza nombres de columnas (espacios y guiones)
-        df.columns = df.columns.str.replace(' ', '_').str.replace('-', '_')
-        # Normaliza fechas
-        df['Order_Date'] = pd.to_datetime(df['Order_Date'])
+        with span("data.read"):
+            df = _read_processed()
+        with span("data.schema"):
+            # Normaliza nombres de columnas (espacios y guiones)
+            df.columns = df.columns.str.replace(' ', '_').str.replace('-', '_')
+            # Tipos compactos (categorías, enteros pequeños) y fechas
+            df = apply_schema(df)
+            df = compact_frame(df)
         return df, "Success"
     except FileNotFoundError:
         return None, f"Archivo no encontrado: {FILE_PATH}"
@@ -26,64 +94,137 @@ def load_data():
         return None, f"Error al cargar datos: {e}"
 
 
+def compact_frame(df):
+    """
+    Forma compacta para el API: filas ordenadas por fecha, índice 0..n-1 y
+    año precalculado como int16 en 'Cod_Anio' (lo usan los filtros por año).
+    """
+    if not df['Order_Date'].is_monotonic_increasing:
+        df = df.sort_values('Order_Date', kind='stable', ignore_index=True)
+    elif not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+        df = df.reset_index(drop=True)
+    if 'Cod_Anio' not in df.columns or df['Cod_Anio'].dtype != 'int16':
+        df['Cod_Anio'] = df['Order_Date'].dt.year.astype('int16')
+    return df
+
+
+def build_row_index(df):
+    """Índice de posiciones por categoría/región/año (ver src.row_index)."""
+    if df is None or df.empty:
+        return None
+    with span("data.build_row_index"):
+        return RowIndex(df)
+
+
 def list_years(df):
     """Lista de años disponibles en el dataset."""
-    return sorted(df['Order_Date'].dt.year.unique().tolist())
+    years = df['Cod_Anio'] if 'Cod_Anio' in df.columns else df['Order_Date'].dt.year
+    return sorted(int(y) for y in years.unique())
 
 
-def _apply_filters(df, category="All Categories", region="All Regions", year="All years"):
-    """Aplica filtros básicos al dataframe."""
-    dff = df.copy()
+def _apply_filters(df, category="All Categories", region="All Regions", year="All years", index=None):
+    """
+    Aplica filtros básicos al dataframe. Con `index` (RowIndex) el filtro es
+    una lectura de posiciones precalculadas; sin él, una sola máscara booleana.
+    """
+    if index is not None:
+        pos = index.positions(category, region, year)
+        return df if pos is None else df.take(pos)
+
+    mask = pd.Series(True, index=df.index)
     if category != "All Categories":
-        dff = dff[dff['Category'] == category]
+        mask &= df['Category'] == category
     if region != "All Regions":
-        dff = dff[dff['Region'] == region]
+        mask &= df['Region'] == region
     if year != "All years":
-        dff = dff[dff['Order_Date'].dt.year == int(year)]
-    return dff
+        years = df['Cod_Anio'] if 'Cod_Anio' in df.columns else df['Order_Date'].dt.year
+        mask &= years == int(year)
+    return df[mask]
+
 
+def build_cube(df):
+    """Cubo mensual precalculado (ver src.sales_cube) o None si no hay datos."""
+    if df is None or df.empty:
+        return None
+    with span("data.build_cube"):
+        return build_sales_cube(df)
 
-def aggregate_sales(df, category="All Categories", region="All Regions", year="All years"):
+
+def aggregate_sales(df, category="All Categories", region="All Regions", year="All years", cube=None, index=None,
+                    freq="MS"):
     """
-    Filtra y agrega ventas a frecuencia mensual (MS: Month Start).
-    Devuelve: (pd.Series, bool) -> serie mensual y bandera de éxito.
+    Filtra y agrega ventas a frecuencia `freq`: MS (mensual, Month Start),
+    W-MON (semanas que terminan en lunes) o D (diaria).
+    Si se pasa `cube`, la serie se lee del cubo precalculado sin tocar `df`;
+    si se pasa `index` (RowIndex), el filtro usa posiciones precalculadas.
+    Sin cubo, la agregación es un bincount sobre los ordinales de día de las
+    filas filtradas (sin resample).
+    Devuelve: (pd.Series, bool) -> serie y bandera de éxito.
     """
+    if cube is not None:
+        with span("data.cube_series"):
+            return cube.series(category, region, year, freq)
     if df is None:
         return pd.Series(dtype='float64'), False
 
-    dff = _apply_filters(df, category, region, year)
-    if dff.empty:
+    with span("data.filter"):
+        dff = _apply_filters(df, category, region, year, index=index)
+    dates = dff['Order_Date']
+    valid = dates.notna().to_numpy()
+    if not valid.any():
         return pd.Series(dtype='float64'), False
 
-    dff = dff.set_index('Order_Date')
-    ts_monthly = dff['Sales'].resample('MS').sum()
-    return ts_monthly, True
+    with span("data.resample"):
+        ts = bin_series(day_ordinals(dates[valid]),
+                        dff['Sales'].to_numpy(dtype='float64')[valid], freq)
+    return ts, True
 
 
-def kpis(df, category="All Categories", region="All Regions", year="All years"):
+def aggregate_sales_batch(df, slices, cube=None, freq="MS"):
+    """
+    Agrega varias series (lista de tuplas (category, region, year)) con una
+    sola pasada sobre `df`: se construye el cubo una vez (o se usa el dado)
+    y cada serie es una lectura del cubo.
+    Devuelve: lista de (pd.Series, bool) en el mismo orden que `slices`.
+    """
+    if cube is None:
+        cube = build_cube(df)
+    if cube is None:
+        return [(pd.Series(dtype='float64'), False) for _ in slices]
+    return [cube.series(category, region, year, freq) for category, region, year in slices]
+
+
+def kpis(df, category="All Categories", region="All Regions", year="All years", cube=None, index=None):
     """
     KPIs: ventas totales, por región y por año (con filtros básicos).
+    Si se pasa `cube`, se calculan desde el cubo precalculado.
     Retorna dict con:
       - total_sales: float
       - by_region: [{Region, Sales}]
       - by_year: [{Year, Sales}]
     """
+    if cube is not None:
+        with span("data.cube_kpis"):
+            return cube.kpis(category, region, year)
     if df is None:
         return {"total_sales": 0, "by_region": [], "by_year": []}
 
-    dff = _apply_filters(df, category, region, year)
+    with span("data.filter"):
+        dff = _apply_filters(df, category, region, year, index=index)
     if dff.empty:
         return {"total_sales": 0, "by_region": [], "by_year": []}
 
+    # Sumas siempre en float64 (como el cubo), aunque la columna venga en float32
+    dff = dff.assign(Sales=dff['Sales'].astype('float64', copy=False))
     total_sales = float(dff['Sales'].sum())
 
     by_region = (
-        dff.groupby('Region', as_index=False)['Sales'].sum()
+        dff.groupby('Region', as_index=False, observed=True)['Sales'].sum()
         .sort_values('Sales', ascending=False)
     )
 
     by_year = (
-        dff.assign(Year=dff['Order_Date'].dt.year)
+        dff.assign(Year=dff['Order_Date'].dt.year.astype('int64'))
            .groupby('Year', as_index=False)['Sales'].sum()
            .sort_values('Year')
     )
@@ -100,22 +241,12 @@ def create_features_for_ml(ts_data):
     Crea features tabulares a partir de una serie mensual:
       - month, quarter, year
       - lag_12
-    Devuelve X (features) e y (target).
+    Devuelve X (features) e y (target). Envoltorio en DataFrame sobre
+    src.feature_engine (mismas columnas y relleno bfill de antes).
     """
-    df = pd.DataFrame(ts_data.copy())
-    df.columns = ['Sales']
-
-    # Features calendario
-    df['month'] = df.index.month
-    df['quarter'] = df.index.quarter
-    df['year'] = df.index.year
-
-    # Rezago de 12 meses
-    df['lag_12'] = df['Sales'].shift(12)
-
-    # Completar NaN del lag de los primeros 12 puntos
-    df = df.bfill()
+    from src.feature_engine import FeatureSpec, build_feature_matrix
 
-    X = df.drop(columns=['Sales'])
-    y = df['Sales']
-    return X, y
+    spec = FeatureSpec(calendar=("month", "quarter", "year"), lags=(12,), fill="bfill")
+    X, y, _ = build_feature_matrix([ts_data], spec)
+    X = pd.DataFrame(X, index=ts_data.index, columns=spec.names)
+    return X, pd.Series(y, index=ts_data.index, name='Sales')
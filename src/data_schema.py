@@ -0,0 +1,52 @@
+import pandas as pd
+
+# Esquema fijo del dataset procesado (salida de preparar_datos_para_analisis).
+# Lo comparten el ETL (al escribir Parquet) y el API (al cargar CSV o Parquet),
+# así ambos formatos producen exactamente los mismos tipos en memoria.
+CATEGORICAL_COLUMNS = ["Nom_Mes", "Nom_Dia", "Category",
+                       "Sub_Category", "Region", "State", "City"]
+INTEGER_COLUMNS = {"Cod_Anio": "int16", "Cod_Mes": "int8",
+                   "Cod_Dia": "int8", "Quantity": "int32"}
+# Montos en float64: en float32 las sumas (KPIs, cubo) se alejan de las del
+# CSV en los centavos; Discount es una fracción y basta float32
+FLOAT_COLUMNS = {"Sales": "float64", "Profit": "float64", "Discount": "float32"}
+DATE_COLUMN = "Order_Date"
+
+COLUMN_ORDER = [DATE_COLUMN, "Cod_Anio", "Cod_Mes", "Cod_Dia", "Nom_Mes", "Nom_Dia",
+                "Category", "Sub_Category", "Region", "State", "City",
+                "Sales", "Profit", "Quantity", "Discount"]
+
+
+def apply_schema(df):
+    """
+    Convierte las columnas conocidas a su tipo compacto (categorías, enteros
+    pequeños, floats y datetime64). Las columnas que falten se ignoran y las
+    que ya tengan el tipo correcto no se copian.
+
+    Las categorías siempre quedan con valores object, vengan de texto plano
+    (CSV, Parquet con columnas string como el del pipeline por bloques) o de
+    columnas de diccionario.
+    """
+    if DATE_COLUMN in df.columns and not pd.api.types.is_datetime64_any_dtype(df[DATE_COLUMN]):
+        df[DATE_COLUMN] = pd.to_datetime(
+            df[DATE_COLUMN], format="ISO8601", errors="coerce")
+
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+        categories = df[col].cat.categories
+        if categories.dtype != object:
+            df[col] = df[col].cat.rename_categories(categories.astype(object))
+
+    for col, dtype in INTEGER_COLUMNS.items():
+        # Con nulos no se puede usar un entero nativo: se deja como está
+        if col in df.columns and df[col].dtype != dtype and not df[col].isna().any():
+            df[col] = df[col].astype(dtype)
+
+    for col, dtype in FLOAT_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+
+    return df
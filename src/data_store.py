@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from src import data_processing
+from src.metrics import span
+from src.result_cache import data_fingerprint
+
+
+def source_signature():
+    """(ruta, mtime_ns, tamaño) de los archivos procesados que lee load_data."""
+    signature = []
+    paths = (data_processing.PARQUET_PATH, data_processing.FILE_PATH,
+             *data_processing.delta_parts(data_processing.PARQUET_PATH))
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+class DataSnapshot:
+    """
+    Una versión completa del dataset y sus estructuras derivadas (cubo,
+    índice de filas, listas de filtros, huella). Los datos no se modifican
+    después de construida: cada petición toma una y la usa de principio a fin.
+    """
+
+    def __init__(self, df, status, signature=None, version=0):
+        self.df = df
+        self.status = status
+        self.signature = signature
+        self.version = version
+        self.cube = data_processing.build_cube(df)
+        self.row_index = data_processing.build_row_index(df)
+        self.data_hash = data_fingerprint(df)
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+        if self.row_index is not None:
+            self.categories = ['All Categories'] + sorted(self.row_index.by_category)
+            self.regions = ['All Regions'] + sorted(self.row_index.by_region)
+            self.years = ["All years"] + self.row_index.years
+        else:
+            self.categories, self.regions, self.years = [], [], []
+
+    @property
+    def ok(self):
+        return self.df is not None
+
+    @classmethod
+    def pending(cls):
+        """Versión vacía mientras se hace la primera carga (en segundo plano)."""
+        return cls(None, "Datos aún no cargados.", version=-1)
+
+    @classmethod
+    def load(cls, version=0):
+        """Lee el dataset procesado y arma todas las estructuras derivadas."""
+        signature = source_signature()
+        with span("data.snapshot"):
+            df, status = data_processing.load_data()
+            return cls(df, status, signature, version)
+
+    def info(self):
+        return {
+            "version": self.version,
+            "data_hash": self.data_hash,
+            "rows": 0 if self.df is None else len(self.df),
+            "loaded_at": self.loaded_at,
+            "load_status": self.status
+        }
+
+
+class DataStore:
+    """
+    Doble búfer del dataset: `current` es la versión vigente y una recarga
+    construye la siguiente aparte; el cambio es una sola asignación, así
+    ninguna petición ve un dataset a medio cargar. Si la recarga falla se
+    conserva la versión anterior. Sin `snapshot` se empieza con una versión
+    vacía y la primera carga es un reload(force=True).
+    """
+
+    def __init__(self, snapshot=None):
+        self.current = snapshot if snapshot is not None else DataSnapshot.pending()
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+
+    def on_swap(self, fn):
+        """Registra fn(anterior, nueva), llamada después de cada cambio de versión."""
+        self._listeners.append(fn)
+        return fn
+
+    def changed(self):
+        """True si los archivos de origen cambiaron desde la versión vigente."""
+        return source_signature() != self.current.signature
+
+    def reload(self, force=False):
+        """
+        Recarga el dataset si cambió (o siempre con `force`). Bloqueante: en
+        el API se llama con asyncio.to_thread. Recargas simultáneas se
+        serializan y la segunda ve que ya no hay cambios.
+        Retorna dict con status "reloaded" | "unchanged" | "error".
+        """
+        with self._reload_lock:
+            previous = self.current
+            if not force and not self.changed():
+                return {**previous.info(), "status": "unchanged"}
+
+            start = time.perf_counter()
+            snapshot = DataSnapshot.load(version=previous.version + 1)
+            if not snapshot.ok:
+                self.failed_reloads += 1
+                self.last_error = snapshot.status
+                return {**previous.info(), "status": "error", "message": snapshot.status}
+            if snapshot.data_hash == previous.data_hash:
+                # Mismo contenido (p. ej. el archivo solo se reescribió): se
+                # conserva la versión vigente y sus resultados en caché
+                previous.signature = snapshot.signature
+                return {**previous.info(), "status": "unchanged"}
+
+            self.current = snapshot
+            self.reloads += 1
+            self.last_error = None
+            for fn in self._listeners:
+                fn(previous, snapshot)
+            return {**snapshot.info(), "status": "reloaded", "previous_hash": previous.data_hash,
+                    "seconds": round(time.perf_counter() - start, 3)}
+
+    def stats(self):
+        return {**self.current.info(), "reloads": self.reloads,
+                "failed_reloads": self.failed_reloads, "last_error": self.last_error}
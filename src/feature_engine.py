@@ -0,0 +1,181 @@
+import numpy as np
+
+from src import frequency
+
+# Codificaciones de calendario disponibles (a partir de la fecha de cada fila)
+CALENDAR_FEATURES = ("month", "quarter", "year", "month_sin", "month_cos",
+                     "week", "dayofweek", "dayofyear")
+
+
+class FeatureSpec:
+    """
+    Definición de features para series de frecuencia `freq` (MS, W-MON o D;
+    las filas y los rezagos se cuentan en periodos de esa frecuencia).
+
+    - calendar: columnas de CALENDAR_FEATURES.
+    - lags: rezagos (lag_k = y[t-k]).
+    - rolling: ventanas w de media y desviación estándar móviles sobre
+      y[t-shift-w+1 .. t-shift] (solo pasado; rolling_shift >= 1).
+    - fill: "bfill" completa los NaN iniciales de cada serie con el primer
+      valor válido de la columna (como create_features_for_ml); None los deja.
+    """
+
+    def __init__(self, calendar=("month", "quarter", "year"), lags=(12,), rolling=(),
+                 rolling_shift=1, fill="bfill", freq="MS"):
+        unknown = set(calendar) - set(CALENDAR_FEATURES)
+        if unknown:
+            raise ValueError(f"Features de calendario desconocidas: {sorted(unknown)}")
+        if rolling and rolling_shift < 1:
+            raise ValueError("rolling_shift debe ser >= 1 (solo datos pasados).")
+        frequency.get_frequency(freq)
+        self.freq = freq
+        self.calendar = tuple(calendar)
+        self.lags = tuple(sorted(set(lags)))
+        self.rolling = tuple(sorted(set(rolling)))
+        self.rolling_shift = rolling_shift
+        self.fill = fill
+
+    @property
+    def names(self):
+        return (list(self.calendar)
+                + [f"lag_{k}" for k in self.lags]
+                + [f"roll_mean_{w}" for w in self.rolling]
+                + [f"roll_std_{w}" for w in self.rolling])
+
+    @property
+    def block_size(self):
+        """
+        Pasos que se pueden predecir juntos en la generación recursiva: todos
+        sus rezagos ya están en la historia o en bloques anteriores.
+        """
+        limits = list(self.lags)
+        if self.rolling:
+            limits.append(self.rolling_shift)
+        return min(limits) if limits else np.inf
+
+    def as_dict(self):
+        return {"calendar": self.calendar, "lags": self.lags, "rolling": self.rolling,
+                "rolling_shift": self.rolling_shift, "fill": self.fill, "freq": self.freq}
+
+
+def _calendar(periods, name, freq="MS"):
+    """periods: llaves de periodo de `freq` (ver src.frequency.period_keys)."""
+    return frequency.calendar_values(frequency.period_days(periods, freq), name)
+
+
+def _fill_series(values, spec, first_period, rows, out):
+    """
+    Escribe en `out` (len(rows) × n_features) las features de las posiciones
+    `rows` de una serie. `values` puede tener NaN al final (futuro aún no
+    generado); solo se leen posiciones anteriores a cada fila.
+    """
+    col = 0
+    periods = first_period + rows
+    for name in spec.calendar:
+        out[:, col] = _calendar(periods, name, spec.freq)
+        col += 1
+
+    for k in spec.lags:
+        src = rows - k
+        out[:, col] = np.where(src >= 0, values[np.maximum(src, 0)], np.nan)
+        col += 1
+
+    if spec.rolling:
+        csum = np.concatenate([[0.0], np.cumsum(values)])
+        csq = np.concatenate([[0.0], np.cumsum(values ** 2)])
+        end = rows - spec.rolling_shift + 1          # exclusivo
+        for w in spec.rolling:
+            start = end - w
+            ok = start >= 0
+            s, e = np.maximum(start, 0), np.maximum(end, 0)
+            total = csum[e] - csum[s]
+            mean = np.where(ok, total / w, np.nan)
+            var = (csq[e] - csq[s] - w * mean ** 2) / max(w - 1, 1)
+            out[:, col] = mean
+            out[:, col + len(spec.rolling)] = np.where(ok, np.sqrt(np.maximum(var, 0)), np.nan)
+            col += 1
+
+
+def _bfill_columns(block):
+    """bfill por columna dentro de una serie (in situ)."""
+    for j in range(block.shape[1]):
+        column = block[:, j]
+        nan = np.isnan(column)
+        if nan.any() and not nan.all():
+            # índice del siguiente valor válido para cada posición
+            idx = np.where(~nan, np.arange(len(column)), len(column))
+            idx = np.minimum.accumulate(idx[::-1])[::-1]
+            fill = idx < len(column)
+            column[nan & fill] = column[idx[nan & fill]]
+
+
+def build_feature_matrix(series_list, spec):
+    """
+    Features de muchas series a la vez en una matriz preasignada.
+
+    series_list: lista de pd.Series de frecuencia spec.freq (índice de fechas).
+    Retorna (X, y, offsets): X (filas totales × n_features), y (filas
+    totales,) y offsets (n_series + 1,) con el rango de filas de cada serie.
+    """
+    lengths = np.array([len(ts) for ts in series_list], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    X = np.empty((offsets[-1], len(spec.names)), dtype=np.float64)
+    y = np.empty(offsets[-1], dtype=np.float64)
+
+    for i, ts in enumerate(series_list):
+        lo, hi = offsets[i], offsets[i + 1]
+        if hi == lo:
+            continue
+        values = ts.to_numpy(dtype=np.float64)
+        _fill_series(values, spec, frequency.first_key(ts.index, spec.freq), np.arange(hi - lo),
+                     X[lo:hi])
+        if spec.fill == "bfill":
+            _bfill_columns(X[lo:hi])
+        y[lo:hi] = values
+    return X, y, offsets
+
+
+def recursive_forecast(predict, series_list, steps, spec):
+    """
+    Generación recursiva de `steps` periodos para varias series a la vez.
+
+    Se avanza por bloques de spec.block_size pasos: las features de cada
+    bloque se leen de la historia y de las predicciones de bloques previos,
+    y cada bloque es una sola llamada a `predict` con las filas de todas las
+    series (sirve también para horizontes mayores que el rezago máximo).
+    Retorna lista de arreglos (steps,) con las predicciones.
+    """
+    n_series = len(series_list)
+    lengths = [len(ts) for ts in series_list]
+    extended = [np.concatenate([ts.to_numpy(dtype=np.float64), np.full(steps, np.nan)])
+                for ts in series_list]
+    first_periods = [frequency.first_key(ts.index, spec.freq) for ts in series_list]
+
+    # Valores de relleno (bfill) por serie: primera fila válida de la historia
+    fill_rows = None
+    if spec.fill == "bfill":
+        X_hist, _, offsets = build_feature_matrix(series_list, spec)
+        fill_rows = [X_hist[offsets[i]] if lengths[i] else None for i in range(n_series)]
+
+    block = int(min(spec.block_size, steps)) or 1
+    X = np.empty((n_series * block, len(spec.names)), dtype=np.float64)
+    for start in range(0, steps, block):
+        stop = min(start + block, steps)
+        width = stop - start
+        for i in range(n_series):
+            rows = lengths[i] + np.arange(start, stop)
+            out = X[i * width:(i + 1) * width]
+            _fill_series(extended[i], spec, first_periods[i], rows, out)
+            if fill_rows is not None and fill_rows[i] is not None:
+                nan = np.isnan(out)
+                out[nan] = np.broadcast_to(fill_rows[i], out.shape)[nan]
+        predictions = np.asarray(predict(X[:n_series * width]), dtype=np.float64)
+        for i in range(n_series):
+            extended[i][lengths[i] + start:lengths[i] + stop] = predictions[i * width:(i + 1) * width]
+
+    return [ext[length:] for ext, length in zip(extended, lengths)]
+
+
+def future_index(ts_history, steps, freq="MS"):
+    """Fechas de los `steps` periodos siguientes a la serie (MS, W-MON o D)."""
+    return frequency.future_index(ts_history, steps, freq)
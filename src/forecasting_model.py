@@ -5,6 +5,8 @@ import statsmodels.api as sm
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 import os # Importar 'os' para construir rutas absolutas
 
+from src.sarima_model import run_backtest_sarima
+
 # --- Constante de Ruta Absoluta (Solución Robusta) ---
 # 1. Obtener la ruta absoluta del script actual (forecasting_model.py)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -131,62 +133,13 @@ def get_sarima_forecast(ts_history, steps=12):
 
 # --- AÑADIR ESTA NUEVA FUNCIÓN AL FINAL ---
 
-def run_backtest(ts_history, test_months=12):
+def run_backtest(ts_history, test_months=12, folds=1, step=None):
     """
     Realiza un backtest del modelo SARIMA, entrenando con datos históricos
     y probando contra los últimos 'test_months' meses.
-    
-    Retorna un diccionario con las métricas de error (MAPE, RMSE).
-    """
-    
-    # 1. Validación de datos suficientes
-    # Necesitamos al menos 2 años para entrenar (24) + los meses de prueba
-    if len(ts_history) < (24 + test_months):
-        return {
-            "status": "Error",
-            "message": f"Datos insuficientes para backtest. Se necesitan > {24 + test_months} meses, se tienen {len(ts_history)}."
-        }
-
-    # 2. Dividir en Entrenamiento y Prueba
-    train_data = ts_history[:-test_months]
-    test_data = ts_history[-test_months:]
-
-    # 3. Entrenar el modelo (mismos parámetros que get_sarima_forecast)
-    try:
-        model = SARIMAX(
-            train_data,
-            order=(0, 1, 1),
-            seasonal_order=(0, 1, 1, 12),
-            enforce_stationarity=False,
-            enforce_invertibility=False
-        )
-        results = model.fit(disp=False)
 
-        # 4. Generar pronóstico para el período de prueba
-        forecast = results.get_forecast(steps=test_months)
-        predictions = forecast.predicted_mean
-
-        # 5. Calcular Métricas de Error
-        
-        # RMSE (Root Mean Squared Error) - Mide la magnitud del error en USD
-        rmse = np.sqrt(np.mean((test_data.values - predictions.values)**2))
-
-        # MAPE (Mean Absolute Percentage Error) - Mide el error en porcentaje
-        # Manejo de división por cero si las ventas reales fueron 0
-        mask = test_data.values != 0
-        mape = np.mean(
-            np.abs((test_data.values[mask] - predictions.values[mask]) / test_data.values[mask])
-        ) * 100
-
-        return {
-            "status": "Success",
-            "test_period_months": test_months,
-            "mape": mape,
-            "rmse": rmse
-        }
-
-    except Exception as e:
-        return {
-            "status": "Error",
-            "message": f"Error durante el backtesting: {e}"
-        }
\ No newline at end of file
+    Delegado al motor de origen móvil compartido (src.backtesting) vía
+    src.sarima_model, para no duplicar el cálculo de métricas.
+    Retorna un diccionario con las métricas de error (MAPE, RMSE, ...).
+    """
+    return run_backtest_sarima(ts_history, test_months=test_months, folds=folds, step=step)
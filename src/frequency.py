@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+# Las fechas se manejan como ordinales de día (días desde 1970-01-01) y cada
+# periodo tiene una llave entera:
+#   MS    -> año * 12 + (mes - 1)          (como SalesCube.first_period)
+#   W-MON -> semana que termina en lunes    (como resample('W-MON'))
+#   D     -> el mismo ordinal de día
+_EPOCH_MONTH = 1970 * 12
+
+
+class Frequency:
+    """
+    Granularidad de una serie y sus valores por defecto para modelar:
+    periodo estacional, horizonte del backtest, historia mínima, horizonte
+    máximo y features de calendario.
+    """
+
+    def __init__(self, code, unit, season, test_horizon, min_history, max_steps, calendar):
+        self.code = code
+        self.unit = unit
+        self.season = season
+        self.test_horizon = test_horizon
+        self.min_history = min_history
+        self.max_steps = max_steps
+        self.calendar = tuple(calendar)
+
+
+FREQUENCIES = {
+    "MS": Frequency("MS", "meses", 12, 12, 24, 60, ("month", "quarter", "year")),
+    "W-MON": Frequency("W-MON", "semanas", 52, 13, 52, 104, ("week", "month", "year")),
+    "D": Frequency("D", "días", 7, 28, 56, 366, ("dayofweek", "dayofyear", "month", "year")),
+}
+DEFAULT_FREQ = "MS"
+
+
+def get_frequency(freq=DEFAULT_FREQ):
+    """Frequency de `freq` o ValueError si no está soportada."""
+    try:
+        return FREQUENCIES[freq]
+    except KeyError:
+        raise ValueError(f"freq debe ser uno de: {', '.join(FREQUENCIES)}.") from None
+
+
+def day_ordinals(dates):
+    """Ordinales de día (int64) de fechas (Series/Index/arreglo datetime64)."""
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+
+def period_keys(days, freq):
+    """Llave del periodo de cada ordinal de día."""
+    days = np.asarray(days, dtype=np.int64)
+    if freq == "D":
+        return days
+    if freq == "W-MON":
+        return (days + 9) // 7
+    if freq == "MS":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) + _EPOCH_MONTH
+    raise ValueError(f"freq debe ser uno de: {', '.join(FREQUENCIES)}.")
+
+
+def period_days(keys, freq):
+    """Ordinal del día con que se etiqueta cada periodo (inicio de mes, lunes, día)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if freq == "D":
+        return keys
+    if freq == "W-MON":
+        return 7 * keys - 3
+    if freq == "MS":
+        return (keys - _EPOCH_MONTH).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    raise ValueError(f"freq debe ser uno de: {', '.join(FREQUENCIES)}.")
+
+
+def period_index(first_key, n, freq):
+    """DatetimeIndex de `n` periodos consecutivos desde la llave `first_key`."""
+    # Fechas por aritmética de días: date_range con anclas semanales recorre
+    # el offset fecha por fecha
+    days = period_days(int(first_key) + np.arange(n), freq)
+    return pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"),
+                            freq=freq, name='Order_Date')
+
+
+def first_key(index, freq):
+    """Llave del primer periodo de un índice de fechas."""
+    return int(period_keys(day_ordinals(index[:1]), freq)[0])
+
+
+def future_index(ts_history, steps, freq=DEFAULT_FREQ):
+    """Fechas de los `steps` periodos siguientes a la serie."""
+    last = int(period_keys(day_ordinals(ts_history.index[-1:]), freq)[0])
+    return period_index(last + 1, steps, freq).rename(None)
+
+
+def bin_series(days, weights, freq):
+    """
+    Serie de `freq` sumando `weights` por periodo (bincount sobre las llaves
+    de los días), con ceros en los periodos sin filas: lo mismo que
+    resample(freq).sum() sin armar un índice por fila.
+    """
+    keys = period_keys(days, freq)
+    first = int(keys.min())
+    values = np.bincount(keys - first, weights=weights)
+    return pd.Series(values, index=period_index(first, len(values), freq), name='Sales')
+
+
+def calendar_values(days, name):
+    """Feature de calendario `name` para ordinales de día."""
+    days = np.asarray(days, dtype=np.int64)
+    dates = days.astype("datetime64[D]")
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    if name == "year":
+        return months // 12 + 1970
+    if name == "month":
+        return months % 12 + 1
+    if name == "quarter":
+        return (months % 12) // 3 + 1
+    if name == "dayofweek":
+        return (days + 3) % 7          # lunes = 0
+    dayofyear = (dates - dates.astype("datetime64[Y]")).astype(np.int64) + 1
+    if name == "dayofyear":
+        return dayofyear
+    if name == "week":
+        return (dayofyear - 1) // 7 + 1
+    angle = 2 * np.pi * (months % 12) / 12
+    if name == "month_sin":
+        return np.sin(angle)
+    if name == "month_cos":
+        return np.cos(angle)
+    raise ValueError(f"Feature de calendario desconocida: {name}")
+
+
+def fourier_terms(days, terms, period=365.25):
+    """
+    Términos de Fourier (sin, cos) de la estacionalidad anual para ordinales
+    de día: (n, 2 * terms). Reemplazan a un rezago estacional largo (52
+    semanas, 365 días) con pocas columnas.
+    """
+    t = 2 * np.pi * np.asarray(days, dtype=np.float64)[:, None] / period
+    k = np.arange(1, terms + 1)
+    return np.hstack([np.sin(t * k), np.cos(t * k)])
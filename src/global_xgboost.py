@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+
+from src.backtesting import cross_validate
+from src.frequency import calendar_values, day_ordinals, future_index, get_frequency
+from src.metrics import count, span
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS
+
+# Hiperparámetros del modelo global (también forman parte de la llave del registro)
+GLOBAL_PARAMS = {
+    "objective": "reg:squarederror",
+    "n_estimators": 300,
+    "max_depth": 4,
+    "learning_rate": 0.05,
+    "tree_method": "hist",
+    "enable_categorical": True
+}
+
+
+def feature_names(freq="MS"):
+    """Columnas del modelo para `freq`: calendario, rezago de una temporada y segmento."""
+    frequency = get_frequency(freq)
+    return list(frequency.calendar) + [f"lag_{frequency.season}", "category", "region"]
+
+
+def _scale(values):
+    """Escala por serie (media de los periodos con ventas) para apilar segmentos."""
+    values = np.asarray(values, dtype=float)
+    positive = values[values > 0]
+    return float(positive.mean()) if positive.size else 1.0
+
+
+def _feature_frame(dates, lag_values, category, region, categories, regions, freq="MS"):
+    """Filas de features para `dates` de un segmento (lag ya escalado)."""
+    n = len(dates)
+    frequency = get_frequency(freq)
+    days = day_ordinals(dates)
+    return pd.DataFrame({
+        **{name: calendar_values(days, name) for name in frequency.calendar},
+        f"lag_{frequency.season}": lag_values,
+        "category": pd.Categorical([category] * n, categories=categories),
+        "region": pd.Categorical([region] * n, categories=regions),
+    })
+
+
+class GlobalXGBoost:
+    """
+    Un solo booster entrenado con las series apiladas de todos los segmentos
+    (categoría × región, incluidos los agregados "All"). Cada serie se
+    divide por su escala y el segmento entra como feature categórica; pronosticar
+    un segmento es armar sus filas de features y llamar a predict. Hay un
+    modelo por frecuencia (`freq`).
+    """
+
+    def __init__(self, model, categories, regions, freq="MS"):
+        self.model = model
+        self.freq = freq
+        self.features = feature_names(freq)
+        self.lag = get_frequency(freq).season
+        self.categories = [ALL_CATEGORIES] + sorted(categories)
+        self.regions = [ALL_REGIONS] + sorted(regions)
+        self._cat_code = {c: i for i, c in enumerate(self.categories)}
+        self._reg_code = {r: i for i, r in enumerate(self.regions)}
+        self._booster = model.get_booster()
+
+    def predict_values(self, ts_history, category, region, steps):
+        """Predicciones (sin escala) para los `steps` periodos siguientes."""
+        values = ts_history.to_numpy(dtype=float)
+        scale = _scale(values)
+        extended = np.concatenate([values / scale, np.full(steps, np.nan)])
+        n = len(values)
+        dates = future_index(ts_history, steps, self.freq)
+
+        # Matriz de features en NumPy (mismo orden que self.features; segmentos
+        # como códigos de categoría): predecir sin armar un DataFrame
+        calendar = self.features[:-3]
+        lag_col = len(calendar)
+        X = np.empty((steps, len(self.features)), dtype=np.float32)
+        days = day_ordinals(dates)
+        for j, name in enumerate(calendar):
+            X[:, j] = calendar_values(days, name)
+        X[:, lag_col + 1] = self._cat_code[category]
+        X[:, lag_col + 2] = self._reg_code[region]
+
+        # Bloques de una temporada: el lag de cada bloque ya está en la
+        # historia o en el bloque anterior
+        lag = self.lag
+        for start in range(0, steps, lag):
+            stop = min(start + lag, steps)
+            lag_pos = np.arange(n + start, n + stop) - lag
+            X[start:stop, lag_col] = np.where(lag_pos >= 0, extended[np.maximum(lag_pos, 0)], np.nan)
+            extended[n + start:n + stop] = self._booster.inplace_predict(X[start:stop])
+
+        return np.clip(extended[n:] * scale, 0, None), dates
+
+    def forecast(self, ts_history, category, region, steps=12):
+        """
+        Pronóstico con el mismo formato que get_xgboost_forecast.
+        Retorna (forecast_df, status).
+        """
+        try:
+            if category not in self._cat_code or region not in self._reg_code:
+                return None, f"Segmento desconocido para el modelo global: {category}/{region}."
+            with span("xgboost_global.predict"):
+                predictions, dates = self.predict_values(ts_history, category, region, steps)
+            forecast_df = pd.DataFrame({
+                'Sales Forecast': predictions,
+                'Lower Bound': np.nan,
+                'Upper Bound': np.nan
+            }, index=dates)
+            return forecast_df, "Success"
+        except Exception as e:
+            return None, f"Error en el pronóstico XGBoost global: {e}"
+
+
+def build_training_frame(series_by_segment, categories, regions, freq="MS"):
+    """
+    Apila las series {(categoría, región): pd.Series de frecuencia `freq`} en
+    una tabla de entrenamiento (X, y) con valores escalados por serie.
+    """
+    frequency = get_frequency(freq)
+    lag = frequency.season
+    all_categories = [ALL_CATEGORIES] + sorted(categories)
+    all_regions = [ALL_REGIONS] + sorted(regions)
+    frames, targets = [], []
+    for (category, region), ts in series_by_segment.items():
+        if len(ts) <= lag:
+            continue
+        values = ts.to_numpy(dtype=float) / _scale(ts.to_numpy())
+        lags = np.concatenate([np.full(lag, np.nan), values[:-lag]])
+        frames.append(_feature_frame(ts.index, lags, category, region,
+                                     all_categories, all_regions, freq))
+        targets.append(values)
+    if not frames:
+        raise ValueError(f"No hay series con más de {lag} {frequency.unit} para entrenar.")
+    return pd.concat(frames, ignore_index=True)[feature_names(freq)], np.concatenate(targets)
+
+
+def train_global_xgboost(series_by_segment, categories, regions, freq="MS"):
+    """Entrena el booster global (se ejecuta en el pool de modelos)."""
+    with span("xgboost_global.features"):
+        X, y = build_training_frame(series_by_segment, categories, regions, freq)
+    count("model_fits_total", model="xgboost_global", kind="fit")
+    with span("xgboost_global.fit"):
+        model = XGBRegressor(**GLOBAL_PARAMS)
+        model.fit(X, y)
+    return GlobalXGBoost(model, categories, regions, freq)
+
+
+def run_backtest_global_xgboost(series_by_segment, categories, regions, ts_history,
+                                category, region, test_months=12, folds=1, step=None, freq="MS"):
+    """
+    Backtest del modelo global para un segmento: en cada pliegue se entrena
+    con todas las series cortadas en el origen (sin ver el periodo de prueba).
+    """
+    def fit_predict(train, horizon):
+        cutoff = train.index[-1]
+        truncated = {seg: ts[ts.index <= cutoff] for seg, ts in series_by_segment.items()}
+        model = train_global_xgboost(truncated, categories, regions, freq)
+        return model.predict_values(train, category, region, horizon)[0]
+
+    frequency = get_frequency(freq)
+    try:
+        metrics = cross_validate(ts_history, fit_predict, horizon=test_months,
+                                 folds=folds, step=step, min_train=frequency.min_history,
+                                 season=frequency.season)
+    except Exception as e:
+        return {"status": "Error", "message": f"Error en backtesting XGBoost global: {e}"}
+    if metrics["status"] != "Success":
+        metrics["message"] = f"Backtest XGBoost global: {metrics['message']}"
+    return metrics
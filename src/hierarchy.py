@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from src.data_processing import aggregate_sales_batch
+from src.frequency import future_index, get_frequency
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS, ALL_YEARS
+
+# Métodos de reconciliación disponibles
+RECONCILIATION_METHODS = ("bottom_up", "ols", "wls")
+
+
+class Hierarchy:
+    """
+    Jerarquía agrupada categoría × región sobre un rango común de periodos.
+
+    Nodos: total, cada categoría, cada región y cada par (categoría, región)
+    (el nivel base). S es la matriz de suma: historia[nodos] = S @ historia[base].
+    """
+
+    def __init__(self, categories, regions, index, values):
+        self.categories = list(categories)
+        self.regions = list(regions)
+        self.index = index          # DatetimeIndex común (MS, W-MON o D)
+        self.values = values        # (n_nodos, periodos)
+        self.nodes = hierarchy_nodes(self.categories, self.regions)
+        self.bottom = [i for i, (c, r) in enumerate(self.nodes)
+                       if c != ALL_CATEGORIES and r != ALL_REGIONS]
+        self.S = summing_matrix(self.nodes, [self.nodes[i] for i in self.bottom])
+        self._position = {node: i for i, node in enumerate(self.nodes)}
+
+    def position(self, category, region):
+        return self._position.get((category, region))
+
+    def fit_series(self, i):
+        """Serie del nodo i sobre el rango común (para el pronóstico base)."""
+        return pd.Series(self.values[i], index=self.index, name='Sales')
+
+    def history(self, category, region):
+        """Serie de un nodo, recortada a los periodos con ventas."""
+        values = self.values[self._position[(category, region)]]
+        active = np.flatnonzero(values)
+        if active.size == 0:
+            return pd.Series(dtype='float64', name='Sales')
+        sl = slice(active[0], active[-1] + 1)
+        return pd.Series(values[sl], index=self.index[sl], name='Sales')
+
+
+def hierarchy_nodes(categories, regions):
+    """Nodos en orden: total, categorías, regiones, pares (nivel base)."""
+    return ([(ALL_CATEGORIES, ALL_REGIONS)]
+            + [(c, ALL_REGIONS) for c in categories]
+            + [(ALL_CATEGORIES, r) for r in regions]
+            + [(c, r) for c in categories for r in regions])
+
+
+def summing_matrix(nodes, bottom):
+    """S[i, j] = 1 si el nodo base j forma parte del nodo i."""
+    S = np.zeros((len(nodes), len(bottom)))
+    for i, (c, r) in enumerate(nodes):
+        for j, (bc, br) in enumerate(bottom):
+            if c in (ALL_CATEGORIES, bc) and r in (ALL_REGIONS, br):
+                S[i, j] = 1.0
+    return S
+
+
+def build_hierarchy(df, categories, regions, year=ALL_YEARS, cube=None, freq="MS"):
+    """
+    Series de todos los nodos con aggregate_sales (una lectura del cubo por
+    nodo), alineadas al rango del total y con ceros donde no hubo ventas.
+    Retorna Hierarchy o None si no hay datos.
+    """
+    nodes = hierarchy_nodes(categories, regions)
+    series = aggregate_sales_batch(df, [(c, r, year) for c, r in nodes], cube=cube, freq=freq)
+    total, ok = series[0]
+    if not ok or len(total) == 0:
+        return None
+
+    index = total.index
+    values = np.vstack([
+        ts.reindex(index, fill_value=0.0).to_numpy(dtype='float64') if ok
+        else np.zeros(len(index))
+        for ts, ok in series
+    ])
+    return Hierarchy(categories, regions, index, values)
+
+
+def reconcile(base, S, method="bottom_up", bottom=None):
+    """
+    Pronósticos coherentes a partir de los pronósticos base.
+
+    base: (n_nodos, h) para "ols"/"wls"; para "bottom_up" basta con las
+    filas del nivel base (`bottom` indica cuáles son si se pasa la matriz completa).
+    - bottom_up: S @ base_nivel_base
+    - ols: S (S'S)^-1 S' base
+    - wls: como ols con W = diag(S 1) (escala estructural, sin residuos)
+    """
+    base = np.asarray(base, dtype=float)
+    if method == "bottom_up":
+        if bottom is not None and base.shape[0] == S.shape[0]:
+            base = base[bottom]
+        return S @ base
+    if method == "ols":
+        weights = np.ones(S.shape[0])
+    elif method == "wls":
+        weights = 1.0 / S.sum(axis=1)
+    else:
+        raise ValueError(f"method debe ser uno de {RECONCILIATION_METHODS}.")
+    StW = S.T * weights
+    G = np.linalg.solve(StW @ S, StW)   # (n_base, n_nodos)
+    return S @ (G @ base)
+
+
+def nodes_to_fit(hierarchy, method):
+    """Índices de nodos que necesitan pronóstico base según el método."""
+    if method == "bottom_up":
+        return list(hierarchy.bottom)
+    return list(range(len(hierarchy.nodes)))
+
+
+def seasonal_naive(values, steps, m=12):
+    """Pronóstico de respaldo: repite la última temporada (o el último valor)."""
+    values = np.asarray(values, dtype=float)
+    if len(values) >= m:
+        return np.resize(values[-m:], steps)
+    return np.full(steps, values[-1] if len(values) else 0.0)
+
+
+def forecast_node(ts_history, model_type, steps, freq="MS"):
+    """
+    Pronóstico base de un nodo (se ejecuta en el pool de modelos).
+    Retorna (medias, status); status != "Success" indica que se usó el
+    respaldo naive estacional.
+    """
+    # Imports locales: el worker solo carga el modelo que usa
+    if np.allclose(ts_history.to_numpy(), 0):
+        return np.zeros(steps), "Serie sin ventas"
+    if model_type == "sarima":
+        from src.sarima_model import get_sarima_forecast
+        forecast_df, status = get_sarima_forecast(ts_history, steps, freq=freq)
+    elif model_type == "xgboost":
+        from src.xgboost_model import get_xgboost_forecast
+        forecast_df, status = get_xgboost_forecast(ts_history, steps, freq=freq)
+    else:
+        raise ValueError("model_type debe ser 'sarima' o 'xgboost'.")
+    if status != "Success" or forecast_df is None:
+        return seasonal_naive(ts_history.to_numpy(), steps, get_frequency(freq).season), status
+    return forecast_df['Sales Forecast'].to_numpy(dtype=float)[:steps], status
+
+
+class HierarchicalForecast:
+    """Resultado reconciliado: cualquier nodo se sirve sin volver a ajustar."""
+
+    def __init__(self, hierarchy, reconciled, method, model_type, fallback_nodes, freq="MS"):
+        self.hierarchy = hierarchy
+        self.reconciled = reconciled    # (n_nodos, h)
+        self.method = method
+        self.model_type = model_type
+        self.fallback_nodes = fallback_nodes
+        self.freq = freq
+        steps = reconciled.shape[1]
+        self.dates = future_index(pd.Series(index=hierarchy.index, dtype=float), steps, freq)
+
+    def node(self, category, region):
+        """
+        (historia, forecast_df) del nodo o None si no pertenece a la jerarquía.
+        Los pronósticos reconciliados no se recortan en cero para que la
+        jerarquía sume exactamente; no hay intervalos (NaN), como en XGBoost.
+        """
+        i = self.hierarchy.position(category, region)
+        if i is None:
+            return None
+        forecast_df = pd.DataFrame({
+            'Sales Forecast': self.reconciled[i].round(2),
+            'Lower Bound': np.nan,
+            'Upper Bound': np.nan
+        }, index=self.dates)
+        return self.hierarchy.history(category, region), forecast_df
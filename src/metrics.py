@@ -0,0 +1,266 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+
+# Límites (s) de los histogramas de latencia: de 0.5 ms a 2 min
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "stage_duration_seconds": ("histogram", "Duración de cada etapa instrumentada (span)."),
+    "http_request_duration_seconds": ("histogram", "Latencia de las peticiones por endpoint y modelo."),
+    "http_requests_total": ("counter", "Peticiones atendidas por endpoint, modelo y código."),
+    "model_fits_total": ("counter", "Ajustes de modelos por tipo (mle = optimización, filter = parámetros reutilizados)."),
+}
+
+# Eventos de la llamada actual cuando se ejecuta dentro de run_traced
+# (workers del pool); fuera de ella se registran directo en METRICS
+_EVENTS = contextvars.ContextVar("metrics_events", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Contadores e histogramas en memoria con salida en formato de texto de
+    Prometheus. Es segura entre hilos; las etiquetas se pasan como kwargs.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}    # nombre -> {label_key: valor}
+        self._histograms = {}  # nombre -> {label_key: [conteos por bucket..., suma, total]}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        self.observe_key(name, _label_key(labels), value)
+
+    def observe_key(self, name, key, value):
+        """observe con etiquetas ya normalizadas (ruta rápida de span)."""
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[slot] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def merge(self, events):
+        """Aplica eventos (kind, nombre, valor, etiquetas) de run_traced."""
+        for kind, name, value, labels in events:
+            if kind == "observe":
+                self.observe(name, value, **labels)
+            else:
+                self.inc(name, value, **labels)
+
+    def snapshot(self, name):
+        """{etiquetas: (conteo, suma)} de un histograma o {etiquetas: valor} de un contador."""
+        with self._lock:
+            if name in self._histograms:
+                return {key: (s[-1], s[-2]) for key, s in self._histograms[name].items()}
+            return dict(self._counters.get(name, {}))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self, extra=()):
+        """
+        Texto de exposición de Prometheus. `extra`: valores leídos al momento
+        (caché, dataset, pool) como tuplas (nombre, tipo, ayuda, valor, etiquetas).
+        """
+        lines = []
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            histograms = {n: {k: list(v) for k, v in s.items()}
+                          for n, s in self._histograms.items()}
+
+        for name, series in sorted(histograms.items()):
+            _, help_text = HELP.get(name, ("histogram", name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for key, state in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), state[:-2]):
+                    cumulative += count
+                    le = _format_labels(key, [("le", _format_value(float(bound)))])
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {state[-2]!r}")
+                lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+
+        for name, series in sorted(counters.items()):
+            _, help_text = HELP.get(name, ("counter", name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        seen = set()
+        for name, kind, help_text, value, labels in extra:
+            if name not in seen:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(_label_key(labels or {}))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro del proceso (el del API; en los workers solo se usa fuera de run_traced)
+METRICS = Metrics()
+
+
+def _record(kind, name, value, labels):
+    events = _EVENTS.get()
+    if events is not None:
+        events.append((kind, name, value, labels))
+    elif kind == "observe":
+        METRICS.observe(name, value, **labels)
+    else:
+        METRICS.inc(name, value, **labels)
+
+
+def count(name, amount=1, **labels):
+    """Incrementa un contador (p. ej. model_fits_total)."""
+    _record("inc", name, amount, labels)
+
+
+class span:
+    """
+    Mide la duración del bloque en stage_duration_seconds{stage=...}.
+    Clase en lugar de @contextmanager (la mitad de costo por span en rutas calientes).
+    """
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        events = _EVENTS.get()
+        if events is not None:
+            events.append(("observe", "stage_duration_seconds", elapsed, {"stage": self.stage}))
+        else:
+            METRICS.observe_key("stage_duration_seconds", (("stage", self.stage),), elapsed)
+        return False
+
+
+def run_traced(fn, *args, **kwargs):
+    """
+    Ejecuta `fn` juntando sus spans y contadores en lugar de registrarlos en
+    el proceso actual. Se usa como trabajo del pool de modelos: retorna
+    (resultado, eventos) y el proceso del API los aplica con METRICS.merge.
+    """
+    events = []
+    token = _EVENTS.set(events)
+    try:
+        return fn(*args, **kwargs), events
+    finally:
+        _EVENTS.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latencia de cada petición (hasta el último fragmento del
+    cuerpo, así cuenta también las respuestas en streaming) por endpoint
+    (plantilla de la ruta), método y model_type. El model_type se lee del
+    query string; los endpoints que lo reciben en el cuerpo (p. ej.
+    /sales/forecast/batch) lo fijan en request.state.model_type. Los
+    model_type fuera de `model_types` se agrupan como "other" para acotar las
+    series.
+    `on_response(status_code)` se llama al terminar cada respuesta.
+    """
+
+    def __init__(self, app, metrics=METRICS, model_types=(), on_response=None):
+        self.app = app
+        self.metrics = metrics
+        self.model_types = frozenset(model_types)
+        self.on_response = on_response
+        self._paths = {}  # endpoint -> plantilla de ruta
+
+    def _endpoint(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            path = self._paths[endpoint] = path or getattr(endpoint, "__name__", "unknown")
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500, "done": False}
+
+        def finish():
+            if status["done"]:
+                return
+            status["done"] = True
+            model_type = (scope.get("state") or {}).get("model_type")
+            if model_type is None:
+                query = scope.get("query_string", b"").decode("latin-1")
+                for part in query.split("&"):
+                    if part.startswith("model_type="):
+                        model_type = part[len("model_type="):]
+            if model_type is None:
+                model_type = ""
+            elif model_type not in self.model_types:
+                model_type = "other"
+            labels = {"endpoint": self._endpoint(scope), "method": scope["method"],
+                      "model_type": model_type}
+            self.metrics.observe("http_request_duration_seconds",
+                                 time.perf_counter() - start, **labels)
+            self.metrics.inc("http_requests_total", status=str(status["code"]), **labels)
+            if self.on_response is not None:
+                self.on_response(status["code"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
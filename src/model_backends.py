@@ -0,0 +1,55 @@
+import importlib
+import threading
+import time
+
+# Backends de modelos: se importan la primera vez que se usan (statsmodels y
+# xgboost tardan segundos en importarse y no hacen falta para arrancar el API)
+BACKENDS = {
+    "sarima": "src.sarima_model",
+    "xgboost": "src.xgboost_model",
+    "xgboost_global": "src.global_xgboost",
+}
+
+_modules = {}
+_import_seconds = {}
+_lock = threading.Lock()
+
+
+def get_backend(model_type):
+    """Módulo del backend `model_type`, importándolo si hace falta."""
+    module = _modules.get(model_type)
+    if module is not None:
+        return module
+    if model_type not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {model_type}. Opciones: {', '.join(BACKENDS)}.")
+    with _lock:
+        if model_type not in _modules:
+            start = time.perf_counter()
+            _modules[model_type] = importlib.import_module(BACKENDS[model_type])
+            _import_seconds[model_type] = round(time.perf_counter() - start, 4)
+        return _modules[model_type]
+
+
+def is_loaded(model_type):
+    return model_type in _modules
+
+
+def call_backend(model_type, name, *args, **kwargs):
+    """
+    Llama a `name` del backend. Se pasa al pool por nombre (no la función),
+    así el proceso del API no necesita importar el backend para encolar y
+    cada worker lo importa la primera vez.
+    """
+    return getattr(get_backend(model_type), name)(*args, **kwargs)
+
+
+def warm_up(model_types=None):
+    """Importa los backends indicados (todos por defecto). Retorna import_times()."""
+    for model_type in model_types or BACKENDS:
+        get_backend(model_type)
+    return import_times()
+
+
+def import_times():
+    """Segundos que tardó la importación de cada backend ya cargado."""
+    return dict(_import_seconds)
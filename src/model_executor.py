@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class QueueFullError(RuntimeError):
+    """La cola de trabajos de modelos está llena (el API responde 429)."""
+
+
+class JobTimeoutError(TimeoutError):
+    """Un trabajo superó el tiempo máximo permitido (el API responde 504)."""
+
+
+class ModelExecutor:
+    """
+    Ejecuta los ajustes de modelos (SARIMA/XGBoost) fuera del event loop.
+
+    - backend "process": pool de procesos (los ajustes son CPU-bound y en
+      parte retienen el GIL); "thread": pool de hilos, útil para depurar.
+    - max_pending acota los trabajos en cola + en ejecución; al superarlo
+      `run` lanza QueueFullError en lugar de encolar sin límite.
+    - timeout es el tiempo máximo de espera por trabajo. Un trabajo que ya
+      empezó no se puede interrumpir: sigue ocupando su cupo hasta terminar,
+      así la contrapresión refleja la carga real del pool.
+    """
+
+    def __init__(self, backend="process", max_workers=None, max_pending=None, timeout=120):
+        if backend not in ("process", "thread"):
+            raise ValueError("backend debe ser 'process' o 'thread'.")
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.timeout = timeout
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Configuración por variables de entorno (MODEL_*)."""
+        workers = os.getenv("MODEL_WORKERS")
+        pending = os.getenv("MODEL_QUEUE_SIZE")
+        return cls(
+            backend=os.getenv("MODEL_EXECUTOR", "process"),
+            max_workers=int(workers) if workers else None,
+            max_pending=int(pending) if pending else None,
+            timeout=float(os.getenv("MODEL_JOB_TIMEOUT", "120"))
+        )
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.backend == "process":
+                    # spawn: los workers no heredan el estado del servidor
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="model")
+            return self._pool
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs):
+        """Encola un trabajo y devuelve el concurrent.futures.Future."""
+        pool = self._get_pool()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(
+                    f"Cola de modelos llena ({self.max_pending} trabajos).")
+            self._pending += 1
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta `fn(*args, **kwargs)` en el pool y espera su resultado."""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise JobTimeoutError(
+                f"El modelo excedió el tiempo máximo de {self.timeout:g} s.")
+        except BrokenExecutor:
+            # Un worker murió: se descarta el pool y el siguiente trabajo crea uno nuevo
+            self._discard_pool()
+            raise
+
+    def _discard_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "timeout_seconds": self.timeout
+        }
+
+    def shutdown(self):
+        self._discard_pool()
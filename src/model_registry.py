@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, '..'))
+DEFAULT_REGISTRY_DIR = os.path.join(PROJECT_ROOT, 'models', 'registry')
+
+
+# --- Serialización por tipo de modelo ---
+# SARIMA: basta con los parámetros estimados; con ellos el modelo se
+# reconstruye filtrando la serie (sin MLE). XGBoost: booster en JSON.
+
+def _save_params(params, directory):
+    with open(os.path.join(directory, "params.json"), "w") as f:
+        json.dump({"params": np.asarray(params, dtype=float).tolist()}, f)
+
+
+def _load_params(directory):
+    with open(os.path.join(directory, "params.json")) as f:
+        return np.asarray(json.load(f)["params"], dtype=float)
+
+
+def _save_xgboost(model, directory):
+    model.save_model(os.path.join(directory, "model.json"))
+
+
+def _load_xgboost(directory):
+    from xgboost import XGBRegressor
+    model = XGBRegressor()
+    model.load_model(os.path.join(directory, "model.json"))
+    return model
+
+
+def _save_global_xgboost(model, directory):
+    model.model.save_model(os.path.join(directory, "model.json"))
+    with open(os.path.join(directory, "segments.json"), "w") as f:
+        json.dump({"categories": model.categories[1:], "regions": model.regions[1:],
+                   "freq": model.freq}, f)
+
+
+def _load_global_xgboost(directory):
+    from src.global_xgboost import GlobalXGBoost
+    with open(os.path.join(directory, "segments.json")) as f:
+        segments = json.load(f)
+    return GlobalXGBoost(_load_xgboost(directory), segments["categories"], segments["regions"],
+                         segments.get("freq", "MS"))
+
+
+SERIALIZERS = {
+    "sarima": (_save_params, _load_params),
+    "xgboost": (_save_xgboost, _load_xgboost),
+    "xgboost_global": (_save_global_xgboost, _load_global_xgboost),
+}
+
+
+def _library_version(model_type):
+    """Versión de la librería del modelo: un artefacto de otra versión no se reutiliza."""
+    try:
+        if model_type == "sarima":
+            import statsmodels
+            return statsmodels.__version__
+        if model_type in ("xgboost", "xgboost_global"):
+            import xgboost
+            return xgboost.__version__
+    except ImportError:
+        pass
+    return "unknown"
+
+
+class ModelRegistry:
+    """
+    Registro en disco de modelos ajustados. Cada entrada vive en
+    <root>/<model_type>/<llave>/ con un meta.json y el artefacto; la llave es
+    un hash de (tipo de modelo, hiperparámetros, segmento, hash de datos).
+
+    Al iniciar se indexan las entradas existentes (solo metadatos) y se
+    eliminan las vencidas; los artefactos se cargan bajo demanda. Las
+    escrituras se hacen en segundo plano y de forma atómica (directorio
+    temporal + rename), así un reinicio a mitad de escritura no deja
+    entradas corruptas.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, max_age=7 * 24 * 3600):
+        self.root = root
+        self.max_age = max_age
+        self._index = {}  # llave -> meta
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registry")
+        self.loads = 0
+        self.saves = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """MODEL_REGISTRY_DIR (vacío = deshabilitado) y MODEL_REGISTRY_MAX_AGE (s)."""
+        root = os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR)
+        if not root:
+            return None
+        return cls(root, max_age=float(os.getenv("MODEL_REGISTRY_MAX_AGE", str(7 * 24 * 3600))))
+
+    @staticmethod
+    def make_key(model_type, hyperparams, segment, data_hash):
+        payload = json.dumps(
+            {"model_type": model_type, "hyperparams": hyperparams,
+             "segment": list(segment), "data_hash": data_hash},
+            sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+    def _entry_dir(self, model_type, key):
+        return os.path.join(self.root, model_type, key)
+
+    def _is_fresh(self, meta):
+        return (time.time() - meta.get("created_at", 0) <= self.max_age
+                and meta.get("library_version") == _library_version(meta.get("model_type")))
+
+    def scan(self):
+        """Indexa las entradas en disco y borra las vencidas. Retorna cuántas quedan."""
+        if not os.path.isdir(self.root):
+            return 0
+        index = {}
+        for model_type in os.listdir(self.root):
+            type_dir = os.path.join(self.root, model_type)
+            if model_type not in SERIALIZERS or not os.path.isdir(type_dir):
+                continue
+            for key in os.listdir(type_dir):
+                meta_path = os.path.join(type_dir, key, "meta.json")
+                try:
+                    with open(meta_path) as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if self._is_fresh(meta):
+                    index[key] = meta
+                else:
+                    shutil.rmtree(os.path.join(type_dir, key), ignore_errors=True)
+        with self._lock:
+            self._index = index
+        return len(index)
+
+    def load(self, model_type, hyperparams, segment, data_hash):
+        """Artefacto guardado y vigente, o None."""
+        key = self.make_key(model_type, hyperparams, segment, data_hash)
+        with self._lock:
+            meta = self._index.get(key)
+        if meta is None or not self._is_fresh(meta):
+            self.misses += 1
+            return None
+        try:
+            artifact = SERIALIZERS[model_type][1](self._entry_dir(model_type, key))
+        except Exception as e:
+            print(f"[WARN] Entrada de registro ilegible {model_type}/{key}: {e}")
+            with self._lock:
+                self._index.pop(key, None)
+            self.misses += 1
+            return None
+        self.loads += 1
+        return artifact
+
+    def save(self, model_type, hyperparams, segment, data_hash, artifact):
+        """Guarda (o reemplaza) una entrada de forma atómica."""
+        key = self.make_key(model_type, hyperparams, segment, data_hash)
+        meta = {
+            "model_type": model_type,
+            "hyperparams": hyperparams,
+            "segment": list(segment),
+            "data_hash": data_hash,
+            "library_version": _library_version(model_type),
+            "created_at": time.time()
+        }
+        type_dir = os.path.join(self.root, model_type)
+        os.makedirs(type_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=type_dir)
+        try:
+            SERIALIZERS[model_type][0](artifact, tmp_dir)
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump(meta, f, default=str)
+            final_dir = self._entry_dir(model_type, key)
+            shutil.rmtree(final_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        with self._lock:
+            self._index[key] = meta
+        self.saves += 1
+
+    def save_async(self, *args):
+        """Como save, pero en un hilo de fondo (no bloquea la respuesta)."""
+        def _save():
+            try:
+                self.save(*args)
+            except Exception as e:
+                print(f"[WARN] No se pudo guardar el modelo en el registro: {e}")
+        return self._writer.submit(_save)
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._index)
+        return {"root": self.root, "entries": entries, "loads": self.loads,
+                "saves": self.saves, "misses": self.misses}
+
+    def close(self):
+        self._writer.shutdown(wait=True)
@@ -0,0 +1,53 @@
+import threading
+import time
+
+STATES = ("starting", "loading", "ready", "failed")
+
+
+class Readiness:
+    """
+    Estado de arranque del API: starting -> loading -> ready | failed.
+    Lleva los tiempos (s, desde `started_at`) de cada transición, del
+    calentamiento de modelos y de la primera respuesta exitosa.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.state = "starting"
+        self.detail = None
+        self.transitions = {"starting": 0.0}
+        self.import_seconds = None
+        self.first_response_seconds = None
+        self.warmup = {"status": "disabled"}
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return round(time.perf_counter() - self.started_at, 4)
+
+    def set(self, state, detail=None):
+        if state not in STATES:
+            raise ValueError(f"Estado desconocido: {state}")
+        with self._lock:
+            self.state = state
+            self.detail = detail
+            self.transitions.setdefault(state, self.elapsed())
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def record_response(self, status_code):
+        """Marca la primera respuesta 2xx (tiempo hasta la primera respuesta)."""
+        if self.first_response_seconds is None and 200 <= status_code < 300:
+            self.first_response_seconds = self.elapsed()
+
+    def info(self):
+        return {
+            "state": self.state,
+            "detail": self.detail,
+            "uptime_seconds": self.elapsed(),
+            "import_seconds": self.import_seconds,
+            "transitions_seconds": dict(self.transitions),
+            "first_response_seconds": self.first_response_seconds,
+            "warmup": dict(self.warmup)
+        }
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS, ALL_YEARS
+
+
+def _positions_by_value(codes, categories):
+    """{valor: posiciones ordenadas} a partir de códigos enteros (-1 = nulo)."""
+    order = np.argsort(codes, kind="stable").astype(np.int32)
+    sorted_codes = codes[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(categories) + 1))
+    return {
+        value: order[bounds[i]:bounds[i + 1]]
+        for i, value in enumerate(categories) if bounds[i + 1] > bounds[i]
+    }
+
+
+class RowIndex:
+    """
+    Índice de posiciones de fila por dimensión para un DataFrame ordenado por
+    fecha (ver compact_frame). Filtrar por categoría/región es leer un arreglo
+    de posiciones ya ordenado y el filtro de año es un rango contiguo de filas,
+    así que no hace falta recorrer ni copiar el DataFrame completo.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        cat = pd.Categorical(df["Category"])
+        reg = pd.Categorical(df["Region"])
+        cat_codes = cat.codes.astype(np.int64)
+        reg_codes = reg.codes.astype(np.int64)
+
+        self.by_category = _positions_by_value(cat_codes, list(cat.categories))
+        self.by_region = _positions_by_value(reg_codes, list(reg.categories))
+
+        # Índice combinado (categoría, región): evita intersecar en cada consulta
+        n_reg = len(reg.categories)
+        pair_codes = np.where((cat_codes < 0) | (reg_codes < 0), -1,
+                              cat_codes * n_reg + reg_codes)
+        pairs = [(c, r) for c in cat.categories for r in reg.categories]
+        self.by_pair = _positions_by_value(pair_codes, pairs)
+
+        # Filas ordenadas por fecha -> cada año es un rango [lo, hi)
+        years = df["Cod_Anio"].to_numpy()
+        self.years = np.unique(years).tolist()
+        self._years = years
+
+    def year_bounds(self, year):
+        y = int(year)
+        lo = int(np.searchsorted(self._years, y, side="left"))
+        hi = int(np.searchsorted(self._years, y, side="right"))
+        return lo, hi
+
+    def positions(self, category=ALL_CATEGORIES, region=ALL_REGIONS, year=ALL_YEARS):
+        """
+        Posiciones (ordenadas) de las filas que cumplen los filtros, o None si
+        no hay filtro alguno (todas las filas).
+        """
+        if category != ALL_CATEGORIES and region != ALL_REGIONS:
+            pos = self.by_pair.get((category, region))
+        elif category != ALL_CATEGORIES:
+            pos = self.by_category.get(category)
+        elif region != ALL_REGIONS:
+            pos = self.by_region.get(region)
+        else:
+            pos = None
+
+        empty = np.empty(0, dtype=np.int32)
+        if pos is None and (category != ALL_CATEGORIES or region != ALL_REGIONS):
+            return empty
+
+        if year != ALL_YEARS:
+            lo, hi = self.year_bounds(year)
+            if pos is None:
+                return np.arange(lo, hi, dtype=np.int32)
+            pos = pos[np.searchsorted(pos, lo):np.searchsorted(pos, hi)]
+        return pos
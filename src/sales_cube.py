@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+from src.frequency import day_ordinals, get_frequency, period_index, period_keys
+
+# Etiquetas de los agregados ("All") que usa el API y el frontend
+ALL_CATEGORIES = "All Categories"
+ALL_REGIONS = "All Regions"
+ALL_YEARS = "All years"
+
+
+class SalesCube:
+    """
+    Cubo denso de ventas mensuales indexado por (categoría, región, mes).
+
+    La posición 0 de las dos primeras dimensiones guarda el agregado
+    ("All Categories" / "All Regions"), así cualquier combinación de filtros
+    se resuelve leyendo un vector de meses, sin filtrar ni remuestrear el
+    DataFrame original. Con la capa diaria (mismas dimensiones por día) las
+    series semanales y diarias salen de un bincount sobre los días del rango.
+    """
+
+    def __init__(self, categories, regions, first_period, sales, counts,
+                 first_day=None, daily_sales=None, daily_counts=None):
+        self.categories = list(categories)
+        self.regions = list(regions)
+        self.first_period = int(first_period)  # año * 12 + (mes - 1)
+        self.sales = sales      # float64 (C+1, R+1, M)
+        self.counts = counts    # int64   (C+1, R+1, M), filas por celda
+        self.first_day = None if first_day is None else int(first_day)  # días desde 1970-01-01
+        self.daily_sales = daily_sales      # float64 (C+1, R+1, D)
+        self.daily_counts = daily_counts    # int64   (C+1, R+1, D)
+        self._cat_index = {c: i + 1 for i, c in enumerate(self.categories)}
+        self._cat_index[ALL_CATEGORIES] = 0
+        self._reg_index = {r: i + 1 for i, r in enumerate(self.regions)}
+        self._reg_index[ALL_REGIONS] = 0
+
+    @property
+    def n_months(self):
+        return self.sales.shape[2]
+
+    def _month_bounds(self, year):
+        """Rango [lo, hi) de meses del cubo que corresponden al año pedido."""
+        if year == ALL_YEARS:
+            return 0, self.n_months
+        lo = int(year) * 12 - self.first_period
+        hi = lo + 12
+        return max(lo, 0), min(max(hi, 0), self.n_months)
+
+    def _day_bounds(self, year):
+        """Rango [lo, hi) de días de la capa diaria que corresponden al año pedido."""
+        n_days = self.daily_sales.shape[2]
+        if year == ALL_YEARS:
+            return 0, n_days
+        start = np.datetime64(f"{int(year):04d}-01-01", "D").astype(np.int64)
+        end = np.datetime64(f"{int(year) + 1:04d}-01-01", "D").astype(np.int64)
+        return (int(np.clip(start - self.first_day, 0, n_days)),
+                int(np.clip(end - self.first_day, 0, n_days)))
+
+    def _cell(self, category, region):
+        ci = self._cat_index.get(category)
+        ri = self._reg_index.get(region)
+        if ci is None or ri is None:
+            return None
+        return ci, ri
+
+    def series(self, category=ALL_CATEGORIES, region=ALL_REGIONS, year=ALL_YEARS, freq="MS"):
+        """
+        Serie de frecuencia `freq` (MS, W-MON o D) equivalente a filtrar y
+        hacer resample(freq).sum().
+        Devuelve: (pd.Series, bool) -> serie y bandera de éxito.
+        """
+        cell = self._cell(category, region)
+        if cell is None:
+            return pd.Series(dtype='float64'), False
+        if freq != "MS":
+            return self._binned_series(cell, year, freq)
+
+        lo, hi = self._month_bounds(year)
+        active = np.flatnonzero(self.counts[cell[0], cell[1], lo:hi])
+        if active.size == 0:
+            return pd.Series(dtype='float64'), False
+
+        first, last = lo + active[0], lo + active[-1] + 1
+        index = period_index(self.first_period + first, last - first, "MS")
+        values = self.sales[cell[0], cell[1], first:last].copy()
+        return pd.Series(values, index=index, name='Sales'), True
+
+    def _binned_series(self, cell, year, freq):
+        """Serie semanal o diaria: bincount de los días con ventas por llave de periodo."""
+        get_frequency(freq)
+        if self.daily_sales is None:
+            raise ValueError("El cubo no tiene capa diaria.")
+        lo, hi = self._day_bounds(year)
+        active = np.flatnonzero(self.daily_counts[cell[0], cell[1], lo:hi])
+        if active.size == 0:
+            return pd.Series(dtype='float64'), False
+
+        keys = period_keys(self.first_day + lo + active, freq)
+        values = np.bincount(keys - keys[0], weights=self.daily_sales[cell[0], cell[1], lo + active])
+        return pd.Series(values, index=period_index(keys[0], len(values), freq), name='Sales'), True
+
+    def kpis(self, category=ALL_CATEGORIES, region=ALL_REGIONS, year=ALL_YEARS):
+        """KPIs (total, por región y por año) leídos directamente del cubo."""
+        empty = {"total_sales": 0, "by_region": [], "by_year": []}
+        cell = self._cell(category, region)
+        if cell is None:
+            return empty
+        ci, ri = cell
+
+        lo, hi = self._month_bounds(year)
+        counts = self.counts[ci, ri, lo:hi]
+        if counts.sum() == 0:
+            return empty
+        sales = self.sales[ci, ri, lo:hi]
+
+        # Por región: si hay filtro de región solo queda esa región
+        reg_ids = range(1, len(self.regions) + 1) if ri == 0 else [ri]
+        by_region = []
+        for r in reg_ids:
+            if self.counts[ci, r, lo:hi].sum() > 0:
+                by_region.append({
+                    "Region": self.regions[r - 1],
+                    "Sales": float(self.sales[ci, r, lo:hi].sum())
+                })
+        by_region.sort(key=lambda d: d["Sales"], reverse=True)
+
+        # Por año: agrupar los meses del rango por su año
+        years = (self.first_period + np.arange(lo, hi)) // 12
+        year_offsets = years - years[0]
+        year_sales = np.bincount(year_offsets, weights=sales)
+        year_counts = np.bincount(year_offsets, weights=counts)
+        by_year = [
+            {"Year": int(years[0] + i), "Sales": float(s)}
+            for i, (s, n) in enumerate(zip(year_sales, year_counts)) if n > 0
+        ]
+
+        return {
+            "total_sales": round(float(sales.sum()), 2),
+            "by_region": by_region,
+            "by_year": by_year
+        }
+
+
+def build_sales_cube(df):
+    """
+    Construye el cubo (mensual y diario) a partir del DataFrame crudo: los
+    ordinales de día se calculan una vez y cada capa es un bincount. Las
+    filas sin categoría o región solo cuentan en los agregados.
+    """
+    cat_codes, categories = pd.factorize(df['Category'], sort=True)
+    reg_codes, regions = pd.factorize(df['Region'], sort=True)
+    n_cat, n_reg = len(categories), len(regions)
+
+    # Posición extra (oculta) para nulos, solo si existen
+    cat_slots = n_cat + 1 + int((cat_codes < 0).any())
+    reg_slots = n_reg + 1 + int((reg_codes < 0).any())
+    cat_codes = np.where(cat_codes < 0, cat_slots - 1, cat_codes + 1)
+    reg_codes = np.where(reg_codes < 0, reg_slots - 1, reg_codes + 1)
+
+    # Filas sin fecha no caen en ningún mes (como en resample)
+    dates = df['Order_Date']
+    valid = dates.notna().to_numpy()
+    cat_codes, reg_codes = cat_codes[valid], reg_codes[valid]
+    days = day_ordinals(dates[valid])
+    cells = cat_codes * reg_slots + reg_codes
+    weights = np.nan_to_num(df['Sales'].to_numpy(dtype='float64')[valid])
+
+    def layer(periods):
+        first = int(periods.min())
+        n = int(periods.max()) - first + 1
+        flat = cells * n + (periods - first)
+        shape = (cat_slots, reg_slots, n)
+        sales = np.bincount(flat, weights=weights, minlength=cat_slots * reg_slots * n).reshape(shape)
+        counts = np.bincount(flat, minlength=cat_slots * reg_slots * n).reshape(shape)
+        # Agregados "All": primero por categoría, luego por región (incluye el total)
+        for arr in (sales, counts):
+            arr[0, 1:] = arr[1:, 1:].sum(axis=0)
+            arr[:, 0] = arr[:, 1:].sum(axis=1)
+        return first, sales, counts
+
+    first_period, sales, counts = layer(period_keys(days, "MS"))
+    first_day, daily_sales, daily_counts = layer(days)
+    return SalesCube(categories, regions, first_period, sales, counts,
+                     first_day, daily_sales, daily_counts)
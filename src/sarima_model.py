@@ -2,89 +2,199 @@ import numpy as np
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 import pandas as pd
 
+from src.backtesting import cross_validate
+from src.frequency import day_ordinals, fourier_terms, future_index, get_frequency
+from src.metrics import count, span
+
 # Parámetros estándar para SARIMA (pueden ser ajustados)
 ORDER = (0, 1, 1)
 SEASONAL_ORDER = (0, 1, 1, 12)
+# Hiperparámetros del modelo (también forman parte de la llave del registro)
+HYPERPARAMS = {"order": ORDER, "seasonal_order": SEASONAL_ORDER}
+# Por frecuencia. En semanal y diaria la estacionalidad anual (52 / 365
+# periodos) entra como `fourier` pares de términos exógenos: un rezago
+# estacional de ese largo suma un estado por periodo y cada paso del filtro
+# de Kalman cuesta O(k²) en el número de estados k
+SPECS = {
+    "MS": HYPERPARAMS,
+    "W-MON": {"order": (1, 1, 1), "seasonal_order": (0, 0, 0, 0), "fourier": 4},
+    "D": {"order": (1, 0, 1), "seasonal_order": (0, 1, 1, 7), "fourier": 3},
+}
+
+
+def hyperparams(freq="MS"):
+    """Hiperparámetros SARIMA de la frecuencia `freq`."""
+    get_frequency(freq)
+    return SPECS[freq]
+
+
+def _exog(index, spec):
+    """Términos de Fourier de las fechas `index`, o None si la especificación no los usa."""
+    terms = spec.get("fourier")
+    return fourier_terms(day_ordinals(index), terms) if terms else None
 
-def get_sarima_forecast(ts_history, steps=12):
+
+def _build_model(ts, spec=HYPERPARAMS):
+    return SARIMAX(
+        ts,
+        exog=_exog(ts.index, spec),
+        order=spec["order"],
+        seasonal_order=spec["seasonal_order"],
+        enforce_stationarity=False,
+        enforce_invertibility=False
+    )
+
+
+def fit_sarima(ts, params=None, freq="MS"):
     """
-    Entrena el modelo SARIMA y genera el pronóstico de 'steps' meses futuros.
+    Ajusta SARIMA sobre `ts`. Si se pasan `params` no se optimiza: solo se
+    filtra la serie con esos parámetros (mucho más barato que el MLE).
     """
-    try:
-        if len(ts_history) < 24:
-            return None, "Datos insuficientes para SARIMA (se requieren > 24 meses)."
-
-        model = SARIMAX(
-            ts_history,
-            order=ORDER,
-            seasonal_order=SEASONAL_ORDER,
-            enforce_stationarity=False,
-            enforce_invertibility=False
-        )
-        results = model.fit(disp=False) 
-
-        forecast = results.get_forecast(steps=steps)
+    model = _build_model(ts, hyperparams(freq))
+    if params is not None:
+        count("model_fits_total", model="sarima", kind="filter")
+        with span("sarima.filter"):
+            return model.filter(np.asarray(params))
+    count("model_fits_total", model="sarima", kind="mle")
+    with span("sarima.fit"):
+        return model.fit(disp=False)
+
+
+def _predict(results, ts, steps, freq="MS"):
+    """get_forecast de `steps` periodos después de `ts` (con sus exógenas futuras)."""
+    spec = hyperparams(freq)
+    exog = _exog(future_index(ts, steps, freq), spec) if spec.get("fourier") else None
+    return results.get_forecast(steps=steps, exog=exog)
+
+
+def _forecast_frame(results, steps, ts, freq="MS"):
+    """Pronóstico con intervalos al 95% y columnas normalizadas."""
+    with span("sarima.get_forecast"):
+        forecast = _predict(results, ts, steps, freq)
         forecast_df = forecast.summary_frame(alpha=0.05)
 
+    forecast_df.rename(columns={
+        'mean': 'Sales Forecast',
+        'mean_ci_lower': 'Lower Bound',
+        'mean_ci_upper': 'Upper Bound'
+    }, inplace=True)
+    if 'lower 95%' in forecast_df.columns:
         forecast_df.rename(columns={
-            'mean': 'Sales Forecast',
-            'mean_ci_lower': 'Lower Bound',
-            'mean_ci_upper': 'Upper Bound'
+            'lower 95%': 'Lower Bound',
+            'upper 95%': 'Upper Bound'
         }, inplace=True)
-        if 'lower 95%' in forecast_df.columns:
-            forecast_df.rename(columns={
-                'lower 95%': 'Lower Bound',
-                'upper 95%': 'Upper Bound'
-            }, inplace=True)
-            
-        final_cols = ['Sales Forecast', 'Lower Bound', 'Upper Bound']
-        forecast_df = forecast_df[final_cols].astype(float).round(2)
-        forecast_df['Sales Forecast'] = forecast_df['Sales Forecast'].clip(lower=0)
-
-        return forecast_df, "Success"
+
+    final_cols = ['Sales Forecast', 'Lower Bound', 'Upper Bound']
+    forecast_df = forecast_df[final_cols].astype(float).round(2)
+    forecast_df['Sales Forecast'] = forecast_df['Sales Forecast'].clip(lower=0)
+    return forecast_df
+
+
+def _fit_predict(train, horizon, freq="MS"):
+    """Ajusta sobre `train` y devuelve las `horizon` predicciones siguientes."""
+    results = fit_sarima(train, freq=freq)
+    with span("sarima.get_forecast"):
+        return _predict(results, train, horizon, freq).predicted_mean.values
+
+
+def _insufficient(frequency):
+    return (f"Datos insuficientes para SARIMA (se requieren > "
+            f"{frequency.min_history} {frequency.unit}).")
+
+
+def get_sarima_forecast(ts_history, steps=12, params=None, freq="MS"):
+    """
+    Entrena el modelo SARIMA y genera el pronóstico de 'steps' periodos futuros.
+    Con `params` (p. ej. de run_sarima_analysis) se reutilizan sin reoptimizar.
+    """
+    try:
+        frequency = get_frequency(freq)
+        if len(ts_history) < frequency.min_history:
+            return None, _insufficient(frequency)
+
+        results = fit_sarima(ts_history, params=params, freq=freq)
+        return _forecast_frame(results, steps, ts_history, freq), "Success"
 
     except Exception as e:
         return None, f"Error en el entrenamiento SARIMA: {e}"
 
 
-def run_backtest_sarima(ts_history, test_months=12):
+def run_backtest_sarima(ts_history, test_months=12, folds=1, step=None, window="expanding", freq="MS"):
     """
-    Realiza un backtest del modelo SARIMA.
+    Realiza un backtest del modelo SARIMA con origen móvil (ver
+    src.backtesting): `folds` pliegues de `test_months` periodos separados por
+    `step` periodos. Con folds=1 es el holdout clásico de los últimos periodos.
     """
-    if len(ts_history) < (24 + test_months):
-        return {
-            "status": "Error",
-            "message": f"Datos insuficientes para backtest SARIMA. Se necesitan > {24 + test_months} meses."
-        }
+    frequency = get_frequency(freq)
+    try:
+        metrics = cross_validate(ts_history, lambda train, h: _fit_predict(train, h, freq),
+                                 horizon=test_months, folds=folds, step=step, window=window,
+                                 min_train=frequency.min_history, season=frequency.season,
+                                 n_jobs=1)
+    except Exception as e:
+        return {"status": "Error", "message": f"Error en backtesting SARIMA: {e}"}
+    if metrics["status"] != "Success":
+        metrics["message"] = f"Backtest SARIMA: {metrics['message']}"
+    return metrics
+
+
+def run_sarima_analysis(ts_history, steps=12, test_months=12, folds=1, step=None, params=None,
+                        freq="MS"):
+    """
+    Ruta única "ajustar una vez, evaluar y pronosticar".
+
+    El backtest usa el motor de origen móvil; el ajuste del último pliegue
+    (entrenado con ts[:-test_months]) se extiende con los periodos reservados
+    (sin reoptimizar) para pronosticar desde el final de la serie. Si la
+    serie es muy corta para el backtest, se ajusta sobre la serie completa
+    y solo se pronostica.
 
-    train_data = ts_history[:-test_months]
-    test_data = ts_history[-test_months:]
+    Con `params` (p. ej. del registro de modelos, ajustados con
+    ts[:-test_months]) el último pliegue solo filtra, sin reoptimizar.
 
+    Retorna dict con:
+      - status: "Success" | "Error"
+      - metrics: dict como el de run_backtest_sarima
+      - forecast: DataFrame como el de get_sarima_forecast
+      - params: parámetros usados, reutilizables con get_sarima_forecast
+    """
     try:
-        model = SARIMAX(
-            train_data,
-            order=ORDER,
-            seasonal_order=SEASONAL_ORDER,
-            enforce_stationarity=False,
-            enforce_invertibility=False
-        )
-        results = model.fit(disp=False)
-        forecast = results.get_forecast(steps=test_months)
-        predictions = forecast.predicted_mean
-
-        # Calcular Métricas
-        rmse = np.sqrt(np.mean((test_data.values - predictions.values)**2))
-        mask = test_data.values != 0
-        mape = np.mean(
-            np.abs((test_data.values[mask] - predictions.values[mask]) / test_data.values[mask])
-        ) * 100
+        frequency = get_frequency(freq)
+        if len(ts_history) < frequency.min_history:
+            return {"status": "Error", "message": _insufficient(frequency)}
+
+        last_origin = len(ts_history) - test_months
+        fitted = {}
+
+        def fit_predict(train, horizon):
+            if len(train) == last_origin:
+                results = fit_sarima(train, params=params, freq=freq)
+                fitted["last"] = results
+            else:
+                results = fit_sarima(train, freq=freq)
+            with span("sarima.get_forecast"):
+                return _predict(results, train, horizon, freq).predicted_mean.values
+
+        metrics = cross_validate(ts_history, fit_predict, horizon=test_months,
+                                 folds=folds, step=step, min_train=frequency.min_history,
+                                 season=frequency.season, n_jobs=1)
+        if "last" in fitted:
+            # Mismos parámetros, ahora condicionados en la serie completa
+            # (append solo filtra los periodos nuevos: costo lineal en la serie)
+            held_out = ts_history[last_origin:]
+            with span("sarima.append"):
+                results = fitted["last"].append(held_out, exog=_exog(held_out.index, hyperparams(freq)),
+                                                refit=False)
+        else:
+            metrics["message"] = f"Backtest SARIMA: {metrics['message']}"
+            results = fit_sarima(ts_history, freq=freq)
 
         return {
             "status": "Success",
-            "test_period_months": test_months,
-            "mape": mape,
-            "rmse": rmse
+            "metrics": metrics,
+            "forecast": _forecast_frame(results, steps, ts_history, freq),
+            "params": np.asarray(results.params)
         }
 
     except Exception as e:
-        return {"status": "Error", "message": f"Error en backtesting SARIMA: {e}"}
\ No newline at end of file
+        return {"status": "Error", "message": f"Error en el análisis SARIMA: {e}"}
@@ -0,0 +1,154 @@
+import json
+
+import numpy as np
+
+try:  # Codificador JSON rápido (opcional)
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Formatos de respuesta de los endpoints de pronóstico
+FORMATS = {
+    "json": "application/json",
+    "columnar": "application/vnd.retail.columnar+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FORECAST_COLUMNS = ("Sales Forecast", "Lower Bound", "Upper Bound")
+
+
+def negotiate(fmt=None, accept=None):
+    """
+    Formato de respuesta: el parámetro `format` manda; si no, el encabezado
+    Accept (primer tipo conocido); por defecto "json". ValueError si `fmt`
+    no es un formato válido.
+    """
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"format debe ser uno de: {', '.join(FORMATS)}.")
+        return fmt
+    for part in (accept or "").split(","):
+        media = part.split(";")[0].strip()
+        for name, media_type in FORMATS.items():
+            if media == media_type:
+                return name
+    return "json"
+
+
+def _plain(obj):
+    """Arreglos NumPy -> listas (NaN -> None) para el json estándar."""
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            return [None if v != v else v for v in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, float) and obj != obj:
+        return None
+    return obj
+
+
+def encode_json(obj):
+    """JSON compacto en bytes; arreglos NumPy directo (NaN -> null)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_plain(obj), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _epoch_days(index):
+    return np.asarray(index.values.astype("datetime64[D]").astype(np.int64), dtype=np.int32)
+
+
+class ForecastSeries:
+    """
+    Historia + pronóstico de un segmento en forma columnar (fechas como días
+    desde 1970-01-01 y valores float64). Es lo que se guarda en la caché; cada
+    formato de respuesta se arma a partir de los arreglos, sin pasar por filas.
+    """
+
+    status = "success"
+
+    def __init__(self, model_type, history_days, history, forecast_days, forecast, freq="MS"):
+        self.model_type = model_type
+        self.freq = freq
+        self.history_days = history_days
+        self.history = history
+        self.forecast_days = forecast_days
+        self.forecast = forecast          # {columna: arreglo} en FORECAST_COLUMNS
+        self._encoded = {}
+
+    @classmethod
+    def from_frames(cls, model_type, ts_history, forecast_df, freq="MS"):
+        return cls(
+            model_type,
+            _epoch_days(ts_history.index),
+            ts_history.to_numpy(dtype=np.float64),
+            _epoch_days(forecast_df.index),
+            {c: forecast_df[c].to_numpy(dtype=np.float64) for c in FORECAST_COLUMNS},
+            freq
+        )
+
+    @staticmethod
+    def _dates(days):
+        return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").tolist()
+
+    def to_records(self, **extra):
+        """Formato original de /sales/forecast (filas con fechas como texto)."""
+        columns = [_plain(self.forecast[c]) for c in FORECAST_COLUMNS]
+        records = [dict(zip(("Date",) + FORECAST_COLUMNS, row))
+                   for row in zip(self._dates(self.forecast_days), *columns)]
+        return {"status": self.status, "model_used": self.model_type, "freq": self.freq,
+                "history": {"index": self._dates(self.history_days),
+                            "data": self.history.tolist()},
+                "forecast": records, **extra}
+
+    def to_columnar(self, **extra):
+        """Arreglos por columna; fechas en días desde 1970-01-01 (date_unit)."""
+        return {"status": self.status, "model_used": self.model_type, "freq": self.freq,
+                "format": "columnar", "date_unit": "epoch_day",
+                "history": {"Date": self.history_days, "Sales": self.history},
+                "forecast": {"Date": self.forecast_days, **self.forecast}, **extra}
+
+    def to_arrow(self, **extra):
+        """
+        Stream Arrow IPC con una tabla: Date (date32), Part (history |
+        forecast), Sales y las columnas del pronóstico. status, model_used,
+        freq y los extras (JSON) van en la metadata del esquema.
+        """
+        import pyarrow as pa
+
+        n_hist, n_fc = len(self.history_days), len(self.forecast_days)
+        empty_hist, empty_fc = np.full(n_hist, np.nan), np.full(n_fc, np.nan)
+        columns = {
+            "Date": pa.array(np.concatenate([self.history_days, self.forecast_days]), pa.date32()),
+            "Part": pa.DictionaryArray.from_arrays(
+                pa.array(np.repeat(np.array([0, 1], dtype=np.int8), [n_hist, n_fc])),
+                pa.array(["history", "forecast"])),
+            "Sales": pa.array(np.concatenate([self.history, empty_fc]), from_pandas=True),
+        }
+        for c in FORECAST_COLUMNS:
+            columns[c] = pa.array(np.concatenate([empty_hist, self.forecast[c]]), from_pandas=True)
+        metadata = {"status": self.status, "model_used": self.model_type, "freq": self.freq,
+                    **{k: encode_json(v).decode("utf-8") for k, v in extra.items()}}
+        table = pa.table(columns).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def encode(self, fmt, **extra):
+        """(bytes, media_type) en el formato pedido. Sin extras se memoriza."""
+        body = self._encoded.get(fmt) if not extra else None
+        if body is None:
+            if fmt == "arrow":
+                body = self.to_arrow(**extra)
+            elif fmt == "columnar":
+                body = encode_json(self.to_columnar(**extra))
+            else:
+                body = encode_json(self.to_records(**extra))
+            if not extra:
+                self._encoded[fmt] = body
+        return body, FORMATS[fmt]
@@ -1,46 +1,70 @@
 import numpy as np
 import pandas as pd
 from xgboost import XGBRegressor
-from src.data_processing import create_features_for_ml # Importa desde nuestro nuevo módulo
+from src.feature_engine import FeatureSpec, build_feature_matrix, future_index, recursive_forecast
+from src.backtesting import cross_validate
+from src.frequency import FREQUENCIES, get_frequency
+from src.metrics import count, span
 
-def get_xgboost_forecast(ts_history, steps=12):
+# Hiperparámetros del modelo (también forman parte de la llave del registro)
+XGB_PARAMS = {"objective": "reg:squarederror", "n_estimators": 100}
+# Features: calendario + lag_12 (como create_features_for_ml)
+XGB_FEATURES = FeatureSpec(calendar=("month", "quarter", "year"), lags=(12,), fill="bfill")
+# Semanal y diaria: calendario de la frecuencia + rezago de una temporada
+FEATURE_SPECS = {
+    freq: XGB_FEATURES if freq == "MS" else
+    FeatureSpec(calendar=f.calendar, lags=(f.season,), fill="bfill", freq=freq)
+    for freq, f in FREQUENCIES.items()
+}
+
+
+def _fit_predict(ts_history, steps, model=None, freq="MS"):
     """
-    Entrena el modelo XGBoost y genera el pronóstico de 'steps' meses futuros.
+    Entrena sobre `ts_history` y predice los `steps` periodos siguientes.
+    Con `model` (ya entrenado con esta serie) se omite el entrenamiento.
+    Más allá de una temporada el rezago se toma de las propias predicciones.
+    Retorna (predicciones, fechas_futuras, modelo).
     """
-    try:
-        if len(ts_history) < 24:
-            return None, "Datos insuficientes para XGBoost (se requieren > 24 meses)."
-            
-        # 1. Crear features para todo el historial
-        X, y = create_features_for_ml(ts_history)
+    spec = FEATURE_SPECS[freq]
+    # 1-2. Crear features para todo el historial y entrenar el modelo
+    if model is None:
+        with span("xgboost.features"):
+            X, y, _ = build_feature_matrix([ts_history], spec)
+        count("model_fits_total", model="xgboost", kind="fit")
+        with span("xgboost.fit"):
+            model = XGBRegressor(**XGB_PARAMS)
+            model.fit(X, y)
+
+    # 3. Generar pronóstico futuro (features de los periodos futuros sin armar DataFrames);
+    #    fechas al inicio de cada periodo, como la historia y los demás modelos
+    future_dates = future_index(ts_history, steps, freq)
+    with span("xgboost.predict"):
+        predictions = recursive_forecast(model.predict, [ts_history], steps, spec)[0]
+    return predictions, future_dates, model
+
 
-        # 2. Entrenar el modelo
-        model = XGBRegressor(objective='reg:squarederror', n_estimators=100)
-        model.fit(X, y)
+def get_xgboost_forecast(ts_history, steps=12, freq="MS"):
+    """
+    Entrena el modelo XGBoost y genera el pronóstico de 'steps' periodos futuros.
+    """
+    forecast_df, status, _ = fit_xgboost_forecast(ts_history, steps, freq=freq)
+    return forecast_df, status
 
-        # 3. Generar pronóstico futuro
-        # Para hacer esto, necesitamos crear los features de los meses futuros
-        last_date = ts_history.index[-1]
-        future_dates = pd.date_range(start=last_date, periods=steps + 1, freq='ME')[1:]
-        
-        # Necesitamos el 'lag_12' para los meses futuros.
-        # Combinamos historial y futuro para calcular el lag correctamente
-        future_df = pd.DataFrame(index=future_dates)
-        future_df['Sales'] = np.nan # Placeholder
-        
-        # Combinamos todo
-        full_ts = pd.concat([ts_history, future_df['Sales']])
-        
-        # Creamos features para el set completo
-        full_features_X, _ = create_features_for_ml(full_ts)
-        
-        # Seleccionamos solo las filas futuras para predecir
-        X_future = full_features_X.iloc[-steps:]
 
-        # Predecir
-        predictions = model.predict(X_future)
-        predictions = predictions.clip(min=0) # No predecir ventas negativas # No predecir ventas negativas
-        
+def fit_xgboost_forecast(ts_history, steps=12, model=None, freq="MS"):
+    """
+    Como get_xgboost_forecast, pero acepta un modelo ya entrenado (p. ej. del
+    registro) y retorna también el modelo: (forecast_df, status, modelo).
+    """
+    try:
+        frequency = get_frequency(freq)
+        if len(ts_history) < frequency.min_history:
+            return None, (f"Datos insuficientes para XGBoost (se requieren > "
+                          f"{frequency.min_history} {frequency.unit})."), None
+
+        predictions, future_dates, model = _fit_predict(ts_history, steps, model, freq)
+        predictions = predictions.clip(min=0) # No predecir ventas negativas
+
         # Crear DataFrame de pronóstico (simplificado, sin CI)
         forecast_df = pd.DataFrame({
             'Sales Forecast': predictions,
@@ -48,50 +72,25 @@ def get_xgboost_forecast(ts_history, steps=12):
             'Upper Bound': np.nan
         }, index=future_dates)
 
-        return forecast_df, "Success"
+        return forecast_df, "Success", model
 
     except Exception as e:
-        return None, f"Error en el entrenamiento XGBoost: {e}"
+        return None, f"Error en el entrenamiento XGBoost: {e}", None
 
 
-def run_backtest_xgboost(ts_history, test_months=12):
+def run_backtest_xgboost(ts_history, test_months=12, folds=1, step=None, window="expanding", freq="MS"):
     """
-    Realiza un backtest del modelo XGBoost.
+    Realiza un backtest del modelo XGBoost con origen móvil (ver
+    src.backtesting): `folds` pliegues de `test_months` periodos separados por
+    `step` periodos. Con folds=1 es el holdout clásico de los últimos periodos.
     """
-    if len(ts_history) < (24 + test_months):
-        return {
-            "status": "Error",
-            "message": f"Datos insuficientes para backtest XGBoost. Se necesitan > {24 + test_months} meses."
-        }
-
-    # 1. Crear features para todos los datos
-    X, y = create_features_for_ml(ts_history)
-
-    # 2. Dividir en Entrenamiento y Prueba
-    X_train, X_test = X.iloc[:-test_months], X.iloc[-test_months:]
-    y_train, y_test = y.iloc[:-test_months], y.iloc[-test_months:]
-
+    frequency = get_frequency(freq)
     try:
-        # 3. Entrenar el modelo
-        model = XGBRegressor(objective='reg:squarederror', n_estimators=100)
-        model.fit(X_train, y_train)
-
-        # 4. Predecir en el set de prueba
-        predictions = model.predict(X_test)
-
-        # 5. Calcular Métricas
-        rmse = np.sqrt(np.mean((y_test.values - predictions)**2))
-        mask = y_test.values != 0
-        mape = np.mean(
-            np.abs((y_test.values[mask] - predictions[mask]) / y_test.values[mask])
-        ) * 100
-
-        return {
-            "status": "Success",
-            "test_period_months": test_months,
-            "mape": mape,
-            "rmse": rmse
-        }
-
+        metrics = cross_validate(ts_history, lambda train, h: _fit_predict(train, h, freq=freq)[0],
+                                 horizon=test_months, folds=folds, step=step, window=window,
+                                 min_train=frequency.min_history, season=frequency.season)
     except Exception as e:
-        return {"status": "Error", "message": f"Error en backtesting XGBoost: {e}"}
\ No newline at end of file
+        return {"status": "Error", "message": f"Error en backtesting XGBoost: {e}"}
+    if metrics["status"] != "Success":
+        metrics["message"] = f"Backtest XGBoost: {metrics['message']}"
+    return metrics
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Las pruebas importan `src`, `scripts` y api_service desde la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# api_service sin registro en disco, sin vigilancia del archivo y con el pool
+# de hilos (se fijan antes de importarlo; no dependen del entorno del desarrollador)
+os.environ["MODEL_REGISTRY_DIR"] = ""
+os.environ["DATA_RELOAD_INTERVAL"] = "0"
+os.environ["MODEL_EXECUTOR"] = "thread"
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import cross_validate, rolling_origin_splits
+
+
+def test_single_fold_uses_last_horizon():
+    assert rolling_origin_splits(48, horizon=12) == [(0, 36, 48)]
+
+
+def test_minimum_length_is_accepted():
+    # min_train + horizon + (folds - 1) * step puntos exactos
+    assert rolling_origin_splits(24 + 12 + 2 * 6, horizon=12, folds=3, step=6) == [
+        (0, 24, 36), (0, 30, 42), (0, 36, 48)]
+
+
+def test_one_point_short_raises():
+    with pytest.raises(ValueError, match="requieren ≥ 48 puntos y hay 47"):
+        rolling_origin_splits(47, horizon=12, folds=3, step=6)
+
+
+@pytest.mark.parametrize("folds", (0, -1))
+def test_invalid_folds(folds):
+    with pytest.raises(ValueError):
+        rolling_origin_splits(100, horizon=12, folds=folds)
+
+
+def test_step_defaults_to_horizon():
+    splits = rolling_origin_splits(60, horizon=12, folds=3)
+    assert [origin for _, origin, _ in splits] == [24, 36, 48]
+    assert splits[-1][2] == 60
+
+
+def test_rolling_window_keeps_train_length():
+    splits = rolling_origin_splits(60, horizon=12, folds=3, window="rolling")
+    assert [origin - start for start, origin, _ in splits] == [24, 24, 24]
+    assert [start for start, _, _ in splits] == [0, 12, 24]
+
+
+def test_unknown_window():
+    with pytest.raises(ValueError):
+        rolling_origin_splits(60, window="sliding")
+
+
+@pytest.mark.parametrize("n,horizon,folds,step,min_train",
+                         [(120, 13, 4, 5, 52), (400, 28, 6, 7, 56), (37, 12, 1, None, 24)])
+def test_test_windows_stay_inside_series(n, horizon, folds, step, min_train):
+    splits = rolling_origin_splits(n, horizon, folds, step, min_train=min_train)
+    assert len(splits) == folds
+    for start, origin, end in splits:
+        assert 0 <= start < origin and end - origin == horizon and end <= n
+        assert origin - start >= min_train
+    assert splits[-1][2] == n
+
+
+def _series(n=60):
+    t = np.arange(n)
+    return pd.Series(1000 + 10 * t + 200 * np.sin(2 * np.pi * t / 12),
+                     index=pd.date_range("2014-01-01", periods=n, freq="MS"))
+
+
+def test_cross_validate_perfect_forecast():
+    ts = _series()
+    values = ts.to_numpy()
+
+    def fit_predict(train, horizon):
+        return values[len(train):len(train) + horizon]
+
+    result = cross_validate(ts, fit_predict, horizon=12, folds=3, step=6)
+    assert result["status"] == "Success" and result["folds"] == 3
+    assert result["mape"] == result["rmse"] == result["mase"] == 0
+    assert [f["origin"] for f in result["fold_metrics"]] == [36, 42, 48]
+
+
+def test_cross_validate_same_metrics_in_threads():
+    ts = _series()
+
+    def fit_predict(train, horizon):
+        return np.full(horizon, train.iloc[-12:].mean())
+
+    serial = cross_validate(ts, fit_predict, folds=3, step=6, n_jobs=1)
+    threaded = cross_validate(ts, fit_predict, folds=3, step=6, n_jobs=3)
+    assert serial == threaded
+
+
+def test_cross_validate_short_series_is_error():
+    result = cross_validate(_series(30), lambda train, h: np.zeros(h))
+    assert result["status"] == "Error"
+    assert "requieren ≥ 36" in result["message"]
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from scripts.superstore_calendar import (DIAS, MESES, NOMBRES_LEGADOS, corregir_nombres,
+                                         derivar_calendario)
+
+
+def test_legacy_names_table():
+    assert NOMBRES_LEGADOS == {"Miã©rcoles": "Miércoles", "Sã¡bado": "Sábado"}
+
+
+def test_corregir_nombres_object():
+    serie = pd.Series(["Lunes", "Miã©rcoles", "Sã¡bado", "Sábado", None])
+    assert corregir_nombres(serie).tolist() == ["Lunes", "Miércoles", "Sábado", "Sábado", None]
+
+
+def test_corregir_nombres_categorical():
+    serie = pd.Series(["Miã©rcoles", "Jueves", "Miã©rcoles"], dtype="category")
+    assert corregir_nombres(serie).tolist() == ["Miércoles", "Jueves", "Miércoles"]
+    # Sin nombres legados la serie se devuelve tal cual (no se copia)
+    limpia = pd.Series(["Miércoles", "Jueves"], dtype="category")
+    assert corregir_nombres(limpia) is limpia
+
+
+def test_corregir_nombres_is_idempotent():
+    serie = pd.Series(DIAS["es"] + MESES["es"])
+    pd.testing.assert_series_equal(corregir_nombres(serie), serie)
+
+
+@pytest.mark.parametrize("idioma", ("es", "en"))
+def test_derivar_calendario_names(idioma):
+    fechas = pd.Series(pd.to_datetime(["2014-01-01", "2014-03-15", "2016-02-29", None]))
+    calendario = derivar_calendario(fechas, idioma)
+    esperado_dia = [DIAS[idioma][d] for d in (2, 5, 0)]        # miércoles, sábado, lunes
+    assert list(calendario["nom_dia"][:3]) == esperado_dia
+    assert list(calendario["nom_mes"][:3]) == [MESES[idioma][m] for m in (0, 2, 1)]
+    assert pd.isna(calendario["nom_dia"][3])
+    assert list(calendario["anio_trimestre"][:3]) == ["2014-Q1", "2014-Q1", "2016-Q1"]
+    assert list(calendario["anio_mes"][:3]) == ["2014-01", "2014-03", "2016-02"]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_engine import FeatureSpec, build_feature_matrix, recursive_forecast
+from src.frequency import get_frequency
+
+
+def _series(n, freq, start="2014-01-01", seed=0):
+    index = pd.date_range(start, periods=n, freq=freq, name="Order_Date")
+    values = np.random.default_rng(seed).gamma(2.0, 100.0, size=n)
+    return pd.Series(values, index=index, name="Sales")
+
+
+def _replay(future):
+    """predict que registra las features y devuelve los valores reales, en orden."""
+    seen, cursor = [], [0]
+
+    def predict(X):
+        seen.append(X.copy())
+        out = future[cursor[0]:cursor[0] + len(X)]
+        cursor[0] += len(X)
+        return out
+    return predict, seen
+
+
+@pytest.mark.parametrize("freq,spec", [
+    ("MS", FeatureSpec(calendar=("month", "quarter", "year"), lags=(12,))),
+    ("MS", FeatureSpec(calendar=("month_sin", "month_cos"), lags=(1, 12), rolling=(3, 6))),
+    ("W-MON", FeatureSpec(calendar=get_frequency("W-MON").calendar, lags=(1, 52), rolling=(4,),
+                          freq="W-MON")),
+    ("D", FeatureSpec(calendar=get_frequency("D").calendar, lags=(7,), rolling=(7,),
+                      rolling_shift=2, freq="D")),
+])
+def test_recursive_features_match_training_features(freq, spec):
+    full = _series(90 if freq != "D" else 200, freq)
+    steps = 15
+    history = full.iloc[:-steps]
+    predict, seen = _replay(full.to_numpy()[-steps:])
+
+    forecast = recursive_forecast(predict, [history], steps, spec)
+
+    X_full, _, _ = build_feature_matrix([full], spec)
+    np.testing.assert_allclose(np.vstack(seen), X_full[-steps:])
+    np.testing.assert_allclose(forecast[0], full.to_numpy()[-steps:])
+
+
+def test_multiple_series_share_blocks():
+    spec = FeatureSpec(lags=(3, 12))
+    series = [_series(40, "MS", seed=1), _series(30, "MS", start="2015-03-01", seed=2)]
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        return np.zeros(len(X))
+
+    out = recursive_forecast(predict, series, 7, spec)
+    assert [len(o) for o in out] == [7, 7]
+    assert calls == [6, 6, 2]         # bloques de block_size = 3 pasos × 2 series
+
+
+def test_build_feature_matrix_offsets_and_bfill():
+    spec = FeatureSpec(lags=(12,))
+    series = [_series(20, "MS"), _series(15, "MS", seed=3)]
+    X, y, offsets = build_feature_matrix(series, spec)
+    np.testing.assert_array_equal(offsets, [0, 20, 35])
+    np.testing.assert_allclose(y, np.concatenate([s.to_numpy() for s in series]))
+    lag = X[:, spec.names.index("lag_12")]
+    assert not np.isnan(lag).any()
+    # Los primeros 12 rezagos toman el primer valor válido de la serie
+    np.testing.assert_allclose(lag[:12], series[0].iloc[0])
+
+
+@pytest.mark.parametrize("freq", ("MS", "W-MON"))
+def test_xgboost_forecast_dates_and_model_reuse(freq):
+    pytest.importorskip("xgboost")
+    from src.xgboost_model import fit_xgboost_forecast
+
+    history = _series(2 * get_frequency(freq).min_history, freq)
+    forecast, status, model = fit_xgboost_forecast(history, 6, freq=freq)
+    assert status == "Success"
+    # Fechas al inicio de cada periodo, contiguas a la historia
+    expected = pd.date_range(history.index[-1], periods=7, freq=freq)[1:]
+    np.testing.assert_array_equal(forecast.index.values, expected.values)
+    assert (forecast["Sales Forecast"] >= 0).all()
+
+    reused, _, _ = fit_xgboost_forecast(history, 6, model=model, freq=freq)
+    pd.testing.assert_frame_equal(reused, forecast)
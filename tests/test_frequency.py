@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.frequency import (bin_series, day_ordinals, first_key, future_index, get_frequency,
+                           period_days, period_index, period_keys)
+
+FREQS = ("MS", "W-MON", "D")
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(0)
+    days = rng.integers(0, 4 * 365, size=2000)
+    dates = pd.to_datetime("2014-01-03") + pd.to_timedelta(days, unit="D")
+    return pd.Series(rng.gamma(2.0, 100.0, size=len(dates)), index=dates).sort_index()
+
+
+@pytest.mark.parametrize("freq", FREQS)
+def test_bin_series_matches_resample(orders, freq):
+    expected = orders.resample(freq).sum()
+    binned = bin_series(day_ordinals(orders.index), orders.to_numpy(), freq)
+    np.testing.assert_array_equal(binned.index.values, expected.index.values)
+    np.testing.assert_allclose(binned.to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize("freq", FREQS)
+def test_period_days_label_each_period(orders, freq):
+    keys = period_keys(day_ordinals(orders.index), freq)
+    labels = period_days(keys, freq).astype("datetime64[D]").astype("datetime64[ns]")
+    # Etiqueta del grupo de resample de cada fila (W-MON: el lunes que cierra la semana)
+    groups = orders.groupby(pd.Grouper(freq=freq))
+    expected = orders.resample(freq).sum().index[groups.ngroup().to_numpy()]
+    np.testing.assert_array_equal(labels, expected.values)
+    # Las llaves son consecutivas: un periodo más es la llave siguiente
+    np.testing.assert_array_equal(period_keys(period_days(keys + 1, freq), freq), keys + 1)
+
+
+def test_known_keys():
+    day = day_ordinals(pd.DatetimeIndex(["2017-12-31"]))
+    assert period_keys(day, "MS")[0] == 2017 * 12 + 11
+    assert pd.Timestamp(period_days(period_keys(day, "W-MON"), "W-MON")[0], unit="D") == \
+        pd.Timestamp("2018-01-01")                 # la semana termina el lunes siguiente
+    assert period_keys(day, "D")[0] == day[0]
+
+
+@pytest.mark.parametrize("freq", FREQS)
+def test_period_index_and_future_index(freq):
+    history = pd.Series(1.0, index=pd.date_range("2016-01-04", periods=30, freq=freq))
+    key = first_key(history.index, freq)
+    np.testing.assert_array_equal(period_index(key, 30, freq).values, history.index.values)
+
+    future = future_index(history, 5, freq)
+    expected = pd.date_range(history.index[-1], periods=6, freq=freq)[1:]
+    np.testing.assert_array_equal(future.values, expected.values)
+
+
+def test_unknown_frequency():
+    with pytest.raises(ValueError):
+        get_frequency("QS")
+    with pytest.raises(ValueError):
+        period_keys(np.array([0]), "QS")
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.superstore_groupin import NIVELES, agrupar_ventas, agrupar_ventas_rollup
+
+CONJUNTOS = (["Region", "Category"], ["Region"], [])
+
+
+@pytest.fixture(scope="module")
+def ventas():
+    rng = np.random.default_rng(0)
+    n = 1500
+    horas = pd.to_timedelta(rng.integers(0, 24, n), unit="h")   # varias filas por día
+    return pd.DataFrame({
+        "Order_Date": pd.to_datetime("2015-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+        + horas,
+        "Region": rng.choice(["Central", "East", "West"], n),
+        "Category": rng.choice(["Furniture", "Technology"], n),
+        "Sales": rng.gamma(2.0, 100.0, n),
+        "Quantity": rng.integers(1, 10, n),
+        "Profit": rng.normal(20, 30, n),
+        "Discount": rng.choice([0.0, 0.1, 0.2, np.nan], n),
+    })
+
+
+@pytest.fixture(scope="module")
+def rollup(ventas):
+    return agrupar_ventas_rollup(ventas, conjuntos=CONJUNTOS)
+
+
+def _normalizar(df):
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+@pytest.mark.parametrize("nivel", ("diario", "semanal", "mensual", "anio", "trimestre", "anio_mes", "nom_dia"))
+@pytest.mark.parametrize("por", CONJUNTOS)
+def test_rollup_matches_agrupar_ventas(ventas, rollup, nivel, por):
+    esperado = agrupar_ventas(ventas, nivel=nivel, por=por)
+    obtenido = rollup[(nivel, tuple(por))]
+    assert list(obtenido.columns) == list(esperado.columns)
+    pd.testing.assert_frame_equal(_normalizar(obtenido), _normalizar(esperado),
+                                  check_dtype=False, rtol=1e-9)
+
+
+def test_rollup_has_every_table(rollup):
+    assert set(rollup) == {(nivel, tuple(por)) for nivel in NIVELES for por in CONJUNTOS}
+
+
+def test_rollup_rejects_unknown_level(ventas):
+    with pytest.raises(ValueError):
+        agrupar_ventas_rollup(ventas, niveles=("horario",))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from src.hierarchy import RECONCILIATION_METHODS, hierarchy_nodes, reconcile, summing_matrix
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS
+
+CATEGORIES = ["Furniture", "Office Supplies", "Technology"]
+REGIONS = ["Central", "East", "South", "West"]
+
+
+@pytest.fixture
+def hierarchy():
+    nodes = hierarchy_nodes(CATEGORIES, REGIONS)
+    bottom = [i for i, (c, r) in enumerate(nodes) if c != ALL_CATEGORIES and r != ALL_REGIONS]
+    return nodes, bottom, summing_matrix(nodes, [nodes[i] for i in bottom])
+
+
+def test_summing_matrix_structure(hierarchy):
+    nodes, bottom, S = hierarchy
+    assert S.shape == (1 + 3 + 4 + 12, 12)
+    assert np.all(S[0] == 1)                       # el total suma todo
+    np.testing.assert_array_equal(S[bottom], np.eye(12))
+    np.testing.assert_array_equal(S[1:4].sum(axis=1), [4, 4, 4])
+    np.testing.assert_array_equal(S[4:8].sum(axis=1), [3, 3, 3, 3])
+
+
+@pytest.mark.parametrize("method", RECONCILIATION_METHODS)
+def test_reconciled_forecasts_are_coherent(hierarchy, method):
+    nodes, bottom, S = hierarchy
+    rng = np.random.default_rng(0)
+    base = rng.gamma(2.0, 500.0, size=(len(nodes), 6))    # base incoherente
+    reconciled = reconcile(base, S, method, bottom=bottom)
+    assert reconciled.shape == base.shape
+    np.testing.assert_allclose(reconciled, S @ reconciled[bottom], rtol=1e-10)
+
+
+def test_bottom_up_keeps_bottom_level(hierarchy):
+    nodes, bottom, S = hierarchy
+    base = np.random.default_rng(1).normal(100, 10, size=(len(nodes), 4))
+    np.testing.assert_allclose(reconcile(base, S, "bottom_up", bottom=bottom)[bottom],
+                               base[bottom])
+    # Solo el nivel base también sirve
+    np.testing.assert_allclose(reconcile(base[bottom], S, "bottom_up"),
+                               reconcile(base, S, "bottom_up", bottom=bottom))
+
+
+@pytest.mark.parametrize("method", ("ols", "wls"))
+def test_coherent_base_is_unchanged(hierarchy, method):
+    nodes, bottom, S = hierarchy
+    coherent = S @ np.random.default_rng(2).uniform(0, 1000, size=(len(bottom), 5))
+    np.testing.assert_allclose(reconcile(coherent, S, method), coherent, rtol=1e-9)
+
+
+def test_unknown_method(hierarchy):
+    _, _, S = hierarchy
+    with pytest.raises(ValueError):
+        reconcile(np.zeros((S.shape[0], 1)), S, "mint")
@@ -0,0 +1,94 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from scripts.superstore_incremental import (escribir_parte, filtrar_nuevos, fusionar_ordenado,
+                                            marca_checkpoint)
+from src.data_processing import COMPACTED_PARTS_KEY, delta_parts, read_parquet_store
+
+
+def _rows(ids, dates):
+    return pd.DataFrame({"Row_Id": ids, "Order_Date": pd.to_datetime(dates),
+                         "Sales": np.arange(len(ids), dtype="float64")})
+
+
+def test_filtrar_nuevos_by_row_id():
+    df = _rows([1, 2, 3, 4], ["2017-01-01", "2016-12-01", "2017-02-01", "2017-01-15"])
+    nuevos = filtrar_nuevos(df, {"max_row_id": 2, "max_order_date": "2017-12-31"})
+    assert nuevos["Row_Id"].tolist() == [3, 4]
+
+
+def test_filtrar_nuevos_by_date_without_row_id():
+    df = _rows([1, 2, 3], ["2017-01-01", "2017-01-02", "2017-01-03"]).drop(columns="Row_Id")
+    nuevos = filtrar_nuevos(df, {"max_row_id": None, "max_order_date": "2017-01-02"})
+    assert nuevos["Order_Date"].tolist() == [pd.Timestamp("2017-01-03")]
+
+
+def test_marca_checkpoint_sorts_as_text():
+    marcas = [marca_checkpoint({"max_row_id": n}) for n in (9, 10, 100)]
+    assert marcas == sorted(marcas)
+    assert marca_checkpoint({"max_row_id": None, "max_order_date": "2017-03-01"}) == "2017-03-01"
+
+
+def test_fusionar_ordenado_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    existente = _rows(range(50), np.sort(pd.to_datetime("2016-01-01")
+                                         + pd.to_timedelta(rng.integers(0, 60, 50), unit="D")))
+    delta = _rows(range(50, 70), pd.to_datetime("2016-01-01")
+                  + pd.to_timedelta(rng.integers(0, 90, 20), unit="D"))
+
+    fusionado = fusionar_ordenado(existente, delta)
+    esperado = (pd.concat([existente, delta], ignore_index=True)
+                .sort_values("Order_Date", kind="mergesort", ignore_index=True))
+    pd.testing.assert_frame_equal(fusionado, esperado)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "superstore_clean.parquet")
+    _rows([1, 2], ["2017-01-01", "2017-01-02"]).to_parquet(path, index=False)
+    return path
+
+
+def test_parts_are_read_with_base(store):
+    escribir_parte(_rows([3], ["2017-01-03"]), store, marca_checkpoint({"max_row_id": 2}))
+    escribir_parte(_rows([4, 5], ["2017-01-04", "2017-01-05"]), store,
+                   marca_checkpoint({"max_row_id": 3}))
+    assert len(delta_parts(store)) == 2
+    assert read_parquet_store(store)["Row_Id"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_rerun_replaces_orphan_part(store):
+    # Corrida desde el checkpoint 2 cuyo checkpoint no se guardó
+    escribir_parte(_rows([3, 4], ["2017-01-03", "2017-01-04"]), store, "0000000002")
+    # La corrida siguiente parte del mismo checkpoint (y trae una fila más)
+    escribir_parte(_rows([3, 4, 5], ["2017-01-03", "2017-01-04", "2017-01-05"]), store,
+                   "0000000002")
+    assert len(delta_parts(store)) == 1
+    assert read_parquet_store(store)["Row_Id"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_rerun_from_older_checkpoint_drops_newer_parts(store):
+    escribir_parte(_rows([3], ["2017-01-03"]), store, "0000000002")
+    escribir_parte(_rows([4], ["2017-01-04"]), store, "0000000003")
+    escribir_parte(_rows([3, 4], ["2017-01-03", "2017-01-04"]), store, "0000000002")
+    assert read_parquet_store(store)["Row_Id"].tolist() == [1, 2, 3, 4]
+
+
+def test_compacted_parts_are_skipped(store):
+    path = escribir_parte(_rows([3], ["2017-01-03"]), store, "0000000002")
+    # Base que ya incluye la parte (compactación interrumpida antes de borrarla)
+    table = pa.Table.from_pandas(_rows([1, 2, 3], ["2017-01-01", "2017-01-02", "2017-01-03"]),
+                                 preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, COMPACTED_PARTS_KEY: json.dumps([os.path.basename(path)])})
+    pq.write_table(table, store)
+
+    assert delta_parts(store) == []
+    assert delta_parts(store, include_compacted=True) == [path]
+    assert read_parquet_store(store)["Row_Id"].tolist() == [1, 2, 3]
@@ -0,0 +1,66 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.metrics import Metrics, MetricsMiddleware, run_traced, span
+
+
+class Body(BaseModel):
+    model_type: str
+
+
+def _client(metrics):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=metrics, model_types=("sarima", "xgboost"))
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int, model_type: str = ""):
+        return {"id": item_id}
+
+    @app.post("/batch")
+    def batch(body: Body, request: Request):
+        request.state.model_type = body.model_type
+        return {}
+
+    return TestClient(app)
+
+
+def _requests(metrics):
+    return {dict(key)["model_type"]: value
+            for key, value in metrics.snapshot("http_requests_total").items()}
+
+
+def test_labels_from_query_and_route_template():
+    metrics = Metrics()
+    client = _client(metrics)
+    client.get("/items/1", params={"model_type": "sarima"})
+    client.get("/items/2", params={"model_type": "prophet"})
+    client.get("/items/3")
+    keys = [dict(key) for key in metrics.snapshot("http_requests_total")]
+    assert {k["endpoint"] for k in keys} == {"/items/{item_id}"}
+    assert _requests(metrics) == {"sarima": 1, "other": 1, "": 1}
+
+
+def test_model_type_from_request_body():
+    metrics = Metrics()
+    client = _client(metrics)
+    client.post("/batch", json={"model_type": "xgboost"})
+    client.post("/batch", json={"model_type": "prophet"})
+    assert _requests(metrics) == {"xgboost": 1, "other": 1}
+    (count, _), = [v for k, v in metrics.snapshot("http_request_duration_seconds").items()
+                   if dict(k)["model_type"] == "xgboost"]
+    assert count == 1
+
+
+def test_run_traced_collects_spans():
+    def work():
+        with span("stage.a"):
+            return 42
+
+    result, events = run_traced(work)
+    assert result == 42
+    assert [(kind, name, labels) for kind, name, _, labels in events] == [
+        ("observe", "stage_duration_seconds", {"stage": "stage.a"})]
+    metrics = Metrics()
+    metrics.merge(events)
+    assert metrics.snapshot("stage_duration_seconds")[(("stage", "stage.a"),)][0] == 1
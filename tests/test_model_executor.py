@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+
+import pytest
+from fastapi import HTTPException
+
+import api_service
+from src.model_executor import JobTimeoutError, ModelExecutor, QueueFullError
+
+
+def _broken():
+    raise BrokenExecutor("worker muerto")
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ModelExecutor(backend="thread", max_workers=1, max_pending=1, timeout=0.2)
+    monkeypatch.setattr(api_service, "EXECUTOR", executor)
+    yield executor
+    executor.shutdown()
+
+
+def test_run_returns_result_and_frees_slot(executor):
+    assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+    assert executor.pending == 0
+
+
+def test_queue_full(executor):
+    release = threading.Event()
+    blocked = executor.submit(release.wait)
+    try:
+        with pytest.raises(QueueFullError):
+            executor.submit(sum, [1])
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(api_service.run_model(sum, [1]))
+        assert error.value.status_code == 429
+        assert error.value.headers["Retry-After"]
+    finally:
+        release.set()
+        blocked.result()
+
+
+def test_timeout(executor):
+    with pytest.raises(JobTimeoutError):
+        asyncio.run(executor.run(time.sleep, 0.5))
+    time.sleep(0.5)                     # el trabajo ocupa su cupo hasta terminar
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(api_service.run_model(time.sleep, 0.5))
+    assert error.value.status_code == 504
+
+
+def test_broken_pool_is_replaced(executor):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(api_service.run_model(_broken))
+    assert error.value.status_code == 503
+    # El siguiente trabajo crea un pool nuevo
+    assert asyncio.run(executor.run(sum, [2, 2])) == 4
+
+
+def test_run_model_returns_result(executor):
+    assert asyncio.run(api_service.run_model(max, 3, 7)) == 7
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        ModelExecutor(backend="gpu")
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.model_registry import ModelRegistry
+
+SEGMENT = ("Technology", "West", "All Years")
+HYPERPARAMS = {"order": [1, 1, 1], "seasonal_order": [1, 1, 1, 12]}
+
+
+def test_sarima_params_round_trip(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    params = np.array([0.31, -0.2, 0.05, 1234.5])
+    registry.save("sarima", HYPERPARAMS, SEGMENT, "hash-a", params)
+
+    np.testing.assert_array_equal(registry.load("sarima", HYPERPARAMS, SEGMENT, "hash-a"), params)
+    # Otra versión de los datos u otros hiperparámetros no reutilizan la entrada
+    assert registry.load("sarima", HYPERPARAMS, SEGMENT, "hash-b") is None
+    assert registry.load("sarima", {**HYPERPARAMS, "order": [2, 1, 1]}, SEGMENT, "hash-a") is None
+
+    # Tras un reinicio la entrada se recupera del disco
+    reopened = ModelRegistry(str(tmp_path))
+    assert reopened.scan() == 1
+    np.testing.assert_array_equal(reopened.load("sarima", HYPERPARAMS, SEGMENT, "hash-a"), params)
+
+
+def test_expired_entries_are_removed(tmp_path):
+    ModelRegistry(str(tmp_path)).save("sarima", HYPERPARAMS, SEGMENT, "hash-a", np.ones(3))
+    reopened = ModelRegistry(str(tmp_path), max_age=-1)
+    assert reopened.scan() == 0
+    assert reopened.load("sarima", HYPERPARAMS, SEGMENT, "hash-a") is None
+
+
+def test_xgboost_round_trip(tmp_path):
+    xgboost = pytest.importorskip("xgboost")
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(60, 4)), rng.normal(size=60)
+    model = xgboost.XGBRegressor(n_estimators=20, max_depth=3).fit(X, y)
+
+    ModelRegistry(str(tmp_path)).save("xgboost", {"n_estimators": 20}, SEGMENT, "hash-a", model)
+    reopened = ModelRegistry(str(tmp_path))
+    reopened.scan()
+    loaded = reopened.load("xgboost", {"n_estimators": 20}, SEGMENT, "hash-a")
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("MODEL_REGISTRY_DIR", "")
+    assert ModelRegistry.from_env() is None
+    monkeypatch.setenv("MODEL_REGISTRY_DIR", str(tmp_path))
+    assert ModelRegistry.from_env().root == str(tmp_path)
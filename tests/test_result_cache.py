@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import api_service
+from src.result_cache import ResultCache, data_fingerprint
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # "a" pasa a ser la más reciente
+    cache.set("c", 3)                   # desaloja "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 2)
+
+
+def test_expired_entries_are_misses():
+    cache = ResultCache(maxsize=4, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a", "missing") == "missing"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_purge_by_predicate():
+    cache = ResultCache()
+    for key in (("forecast", "h1"), ("forecast", "h2"), ("evaluation", "h1")):
+        cache.set(key, key)
+    assert cache.purge(lambda key: key[-1] == "h1") == 2
+    assert cache.get(("forecast", "h2")) == ("forecast", "h2")
+
+
+def test_fingerprint_follows_content():
+    df = pd.DataFrame({"Sales": [1.0, 2.0], "Region": ["East", "West"]})
+    assert data_fingerprint(df) == data_fingerprint(df.copy())
+    assert data_fingerprint(df) != data_fingerprint(df.assign(Sales=[1.0, 2.5]))
+
+
+@pytest.fixture
+def swapped(monkeypatch):
+    """Estado del API tras una recarga: la versión vigente es "new"."""
+    monkeypatch.setattr(api_service, "STORE", SimpleNamespace(current=SimpleNamespace(data_hash="new")))
+    cache = ResultCache(maxsize=1, ttl=60)
+    monkeypatch.setattr(api_service, "RESULT_CACHE", cache)
+    return cache
+
+
+def test_superseded_version_is_not_cached(swapped):
+    swapped.set(("forecast", "new"), "live")
+    api_service.cache_set(SimpleNamespace(data_hash="old"), ("forecast", "old"), "stale")
+    # La entrada vigente sigue en la caché (maxsize=1: un set la habría desalojado)
+    assert swapped.get(("forecast", "new")) == "live"
+    assert swapped.get(("forecast", "old")) is None
+    assert swapped.stats()["evictions"] == 0
+
+
+def test_current_version_is_cached(swapped):
+    api_service.cache_set(SimpleNamespace(data_hash="new"), ("forecast", "new"), "fresh")
+    assert swapped.get(("forecast", "new")) == "fresh"
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing import _apply_filters, aggregate_sales, build_row_index, compact_frame
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS, ALL_YEARS
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(1)
+    n = 2000
+    dates = pd.to_datetime("2014-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit="D")
+    df = pd.DataFrame({
+        "Order_Date": dates,          # sin ordenar: compact_frame lo ordena
+        "Category": pd.Categorical(rng.choice(["Furniture", "Office Supplies", "Technology"], n)),
+        "Region": pd.Categorical(rng.choice(["Central", "East", "South", "West"], n)),
+        "Sales": rng.gamma(2.0, 100.0, n),
+    })
+    df.loc[[5, 50], "Category"] = np.nan
+    df = compact_frame(df)
+    return df, build_row_index(df)
+
+
+FILTERS = [(c, r, y) for c in [ALL_CATEGORIES, "Technology", "Toys"]
+           for r in [ALL_REGIONS, "South"] for y in [ALL_YEARS, "2014", "2017", "2030"]]
+
+
+def test_compact_frame(frame):
+    df, _ = frame
+    assert df["Order_Date"].is_monotonic_increasing
+    assert df["Cod_Anio"].dtype == "int16"
+    assert isinstance(df.index, pd.RangeIndex)
+
+
+@pytest.mark.parametrize("category,region,year", FILTERS)
+def test_positions_match_mask(frame, category, region, year):
+    df, index = frame
+    expected = _apply_filters(df, category, region, year)
+    filtered = _apply_filters(df, category, region, year, index=index)
+    np.testing.assert_array_equal(filtered.index.to_numpy(), expected.index.to_numpy())
+    pos = index.positions(category, region, year)
+    if pos is not None:
+        assert np.all(np.diff(pos) > 0)
+
+
+def test_no_filter_returns_all_rows(frame):
+    df, index = frame
+    assert index.positions() is None
+    assert _apply_filters(df, index=index) is df
+
+
+def test_null_category_only_in_aggregate(frame):
+    df, index = frame
+    all_rows = sum(len(p) for p in index.by_category.values())
+    assert all_rows == len(df) - 2
+
+
+def test_aggregate_with_index(frame):
+    df, index = frame
+    ts, ok = aggregate_sales(df, "Furniture", "East", "2015", index=index)
+    expected, _ = aggregate_sales(df, "Furniture", "East", "2015")
+    assert ok
+    pd.testing.assert_series_equal(ts, expected)
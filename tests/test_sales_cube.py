@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing import aggregate_sales_batch
+from src.sales_cube import ALL_CATEGORIES, ALL_REGIONS, ALL_YEARS, build_sales_cube
+
+CATEGORIES = ["Furniture", "Office Supplies", "Technology"]
+REGIONS = ["Central", "East", "South", "West"]
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = np.random.default_rng(0)
+    n = 3000
+    dates = pd.to_datetime("2014-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D")
+    return pd.DataFrame({
+        "Order_Date": dates,
+        "Category": rng.choice(CATEGORIES, n),
+        "Region": rng.choice(REGIONS, n),
+        "Sales": rng.gamma(2.0, 100.0, n),
+    })
+
+
+def _resampled(df, category, region, year, freq):
+    """Referencia: filtrar con máscaras y resample(freq).sum()."""
+    mask = pd.Series(True, index=df.index)
+    if category != ALL_CATEGORIES:
+        mask &= df["Category"] == category
+    if region != ALL_REGIONS:
+        mask &= df["Region"] == region
+    if year != ALL_YEARS:
+        mask &= df["Order_Date"].dt.year == int(year)
+    return df[mask].set_index("Order_Date")["Sales"].resample(freq).sum()
+
+
+SLICES = [(c, r, y) for c in [ALL_CATEGORIES, "Technology"]
+          for r in [ALL_REGIONS, "West"] for y in [ALL_YEARS, "2015"]]
+
+
+@pytest.mark.parametrize("freq", ("MS", "W-MON", "D"))
+def test_batch_series_match_resample(orders, freq):
+    results = aggregate_sales_batch(orders, SLICES, freq=freq)
+    for (category, region, year), (ts, ok) in zip(SLICES, results):
+        expected = _resampled(orders, category, region, year, freq)
+        assert ok
+        np.testing.assert_array_equal(ts.index.values, expected.index.values)
+        np.testing.assert_allclose(ts.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_prebuilt_cube_is_reused(orders):
+    cube = build_sales_cube(orders)
+    (ts, ok), = aggregate_sales_batch(None, [("Furniture", "East", ALL_YEARS)], cube=cube)
+    expected = _resampled(orders, "Furniture", "East", ALL_YEARS, "MS")
+    assert ok
+    np.testing.assert_allclose(ts.to_numpy(), expected.to_numpy())
+
+
+def test_missing_slices(orders):
+    results = aggregate_sales_batch(orders, [("Toys", ALL_REGIONS, ALL_YEARS),
+                                             (ALL_CATEGORIES, ALL_REGIONS, "2020")])
+    assert [ok for _, ok in results] == [False, False]
+    assert all(ts.empty for ts, _ in results)
+
+
+def test_cube_kpis_match_dataframe(orders):
+    cube = build_sales_cube(orders)
+    result = cube.kpis("Technology", ALL_REGIONS, "2016")
+    subset = orders[(orders["Category"] == "Technology") & (orders["Order_Date"].dt.year == 2016)]
+    assert result["total_sales"] == pytest.approx(round(subset["Sales"].sum(), 2))
+    by_region = subset.groupby("Region")["Sales"].sum()
+    assert {d["Region"]: d["Sales"] for d in result["by_region"]} == pytest.approx(by_region.to_dict())